@@ -5,6 +5,7 @@ from pytest_django.lazy_django import skip_if_no_django
 
 from src.users.tests.factories import UserFactory
 from vprad.actions import actions_registry
+from vprad.helpers import clear_url_caches
 
 
 @pytest.hookimpl(trylast=True)
@@ -80,6 +81,20 @@ def authenticated_browser(selenium, user_client, live_server):
 
 @pytest.fixture(scope='function')
 def actions():
-    """ Simple fixture to purge the actions registry. """
+    """ Simple fixture to purge the actions registry during a test. """
+    saved = list(actions_registry.by_name.values())
+    actions_registry.clear()
     yield
-    actions_registry.by_name.clear()
+    actions_registry.clear()
+    for act in saved:
+        actions_registry.add_action(act)
+    clear_url_caches()
+
+
+@pytest.fixture()
+def run_on_commit(mocker):
+    """ Run the `transaction.on_commit` callbacks right away.
+
+    The transaction of a test is never committed.
+    """
+    mocker.patch('django.db.transaction.on_commit', lambda func, using=None: func())
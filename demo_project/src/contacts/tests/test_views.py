@@ -1,6 +1,8 @@
 from urllib.parse import urlparse
 
 import pytest
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
 from django.urls import reverse
 
 from src.contacts.tests.factories import PersonFactory
@@ -36,8 +38,247 @@ def test_contact_detail_renders(user_client, db):
     assert resp.status_code == 200
 
 
+def test_contact_detail_embeds_batch(user_client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    contact = PersonFactory.create()
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    names = ['phone_numbers', 'email_addresses']
+    with CaptureQueriesContext(connection) as queries:
+        resp = user_client.get(url, {'_embed_related': ','.join(names)})
+    assert resp.status_code == 200
+    content = resp.content.decode()
+    for name in names:
+        assert f'data-embed="{name}"' in content
+    for number in contact.phone_numbers.all():
+        assert number.number in content
+    for email in contact.email_addresses.all():
+        assert email.email in content
+    # The contact is loaded once for all the embeds.
+    parent_queries = [q for q in queries.captured_queries
+                      if q['sql'].startswith('SELECT "contacts_contact"."id"')]
+    assert len(parent_queries) == 1
+    assert user_client.get(url, {'_embed_related': 'phone_numbers,nothing'}).status_code == 404
+
+
+def test_contact_detail_embeds_batch_failed(user_client, mocker):
+    from django.http import HttpResponseForbidden
+    contact = PersonFactory.create()
+    mocker.patch.object(EmbeddedPhoneNumber, 'get', return_value=HttpResponseForbidden('No phones'))
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    resp = user_client.get(url, {'_embed_related': 'phone_numbers,email_addresses'})
+    content = resp.content.decode()
+    assert 'No phones' not in content
+    assert 'ui error message' in content
+    assert contact.email_addresses.first().email in content
+
+
+@pytest.mark.parametrize('error', [PermissionDenied, Http404, ZeroDivisionError])
+def test_contact_detail_embeds_batch_raises(user_client, mocker, error):
+    contact = PersonFactory.create()
+    mocker.patch.object(EmbeddedPhoneNumber, 'get', side_effect=error('No phones'))
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    resp = user_client.get(url, {'_embed_related': 'phone_numbers,email_addresses'})
+    assert resp.status_code == 200
+    content = resp.content.decode()
+    assert 'ui error message' in content
+    assert contact.email_addresses.first().email in content
+
+
 def test_embedded_comes_from_registry(db):
     """ Test that if an embedded view is in the registry it is used. """
     view = ContactDetailView.as_view()
     embed = view.view_class._embeddables['phone_numbers'].view_class
     assert issubclass(embed, EmbeddedPhoneNumber)
+
+
+@pytest.mark.parametrize('sort', ['', 'full_name', '-full_name'])
+def test_contact_list_keyset_pagination(request_factory, test_user, sort):
+    from src.contacts.models import Contact
+    from src.contacts.views import ContactListView
+    # Many equal names, so pages split between rows of the same name.
+    PersonFactory.create_batch(25, first_name='Same', last_name='Name')
+    PersonFactory.create_batch(10)
+    expected = list(Contact.objects.order_by(sort or 'full_name', 'pk').values_list('pk', flat=True))
+    view = ContactListView.as_view(pagination='keyset')
+
+    def get_page(cursor=None):
+        params = {'sort': sort} if sort else {}
+        if cursor:
+            params['cursor'] = cursor
+        request = request_factory.get(reverse('contacts_contact_list'), params)
+        request.user = test_user
+        response = view(request)
+        context = response.context_data
+        assert (b'cursor=' in response.render().content) == bool(context['keyset_page'].next_cursor or
+                                                                 context['keyset_page'].previous_cursor)
+        return context['keyset_page'], [row.record.pk for row in context['table'].rows]
+
+    seen, pages, cursor = [], [], None
+    while True:
+        page, pks = get_page(cursor)
+        pages.append((cursor, pks))
+        seen += pks
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+    assert len(pages) == 4
+    # Back from the last page.
+    page, pks = get_page(cursor)
+    page, pks = get_page(page.previous_cursor)
+    assert pks == pages[-2][1]
+
+
+@pytest.mark.parametrize('order', ['assignee', '-assignee'])
+def test_keyset_pagination_nullable(db, test_user, order):
+    from django.db.models import F
+    from src.contacts.models import Contact
+    from vprad.views.generic.keyset import keyset_paginate
+    # More NULLs than rows per page.
+    PersonFactory.create_batch(3, assignee=None)
+    PersonFactory.create_batch(3, assignee=test_user)
+    field = F('assignee')
+    expected = list(Contact.objects.order_by(field.desc(nulls_first=True) if order.startswith('-') else
+                                             field.asc(nulls_last=True), 'pk').values_list('pk', flat=True))
+    queryset = Contact.objects.order_by(order)
+    seen, pages, cursor = [], [], None
+    while True:
+        page = keyset_paginate(queryset, 2, cursor)
+        pages.append([obj.pk for obj in page.object_list])
+        seen += pages[-1]
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+    # And back.
+    page = keyset_paginate(queryset, 2, page.previous_cursor)
+    assert [obj.pk for obj in page.object_list] == pages[-2]
+
+
+def test_keyset_bad_cursors(db):
+    from src.contacts.models import Contact
+    from vprad.views.generic.keyset import keyset_paginate, encode_cursor
+    contacts = PersonFactory.create_batch(3)
+    queryset = Contact.objects.order_by('pk')
+    first_page = [contacts[0].pk, contacts[1].pk]
+    # Values of the wrong type, unsigned and tampered cursors give the first page.
+    for cursor in (encode_cursor(('pk', ), ['abc']),
+                   encode_cursor(('pk', ), [contacts[0].pk]).split(':')[0],
+                   encode_cursor(('pk', ), [contacts[0].pk]) + 'x'):
+        assert [obj.pk for obj in keyset_paginate(queryset, 2, cursor).object_list] == first_page
+    page = keyset_paginate(queryset, 2, encode_cursor(('pk', ), [str(contacts[0].pk)]))
+    assert [obj.pk for obj in page.object_list] == [contacts[1].pk, contacts[2].pk]
+
+
+@pytest.mark.parametrize('strategy', ['exact', 'cached', 'estimated'])
+def test_contact_list_counts(request_factory, test_user, django_assert_num_queries, strategy):
+    from django.core.cache import cache
+    from src.contacts.views import ContactListView
+    cache.clear()
+    PersonFactory.create_batch(12)
+    view = ContactListView.as_view(count_strategy=strategy)
+
+    def get_list(**params):
+        request = request_factory.get(reverse('contacts_contact_list'), params)
+        request.user = test_user
+        response = view(request)
+        return response.context_data, response.render().content.decode()
+
+    context, content = get_list()
+    assert context['row_count'] == 12
+    assert not context['row_count_estimated']
+    assert '12 rows' in content
+    assert context['table'].paginator.num_pages == 2
+    # A single count, shared by both paginators (or none when cached).
+    with django_assert_num_queries(2 if strategy == 'cached' else 3):
+        context, content = get_list(page=2)
+    assert context['row_count'] == 12
+    context, content = get_list(full_name='no such name')
+    assert context['row_count'] == 0
+
+
+def test_cached_count_empty_queryset(db):
+    from src.contacts.models import Contact
+    from vprad.views.generic.counts import get_cached_count, get_estimated_count
+    assert get_cached_count(Contact.objects.filter(pk__in=[]), 'test', 60) == 0
+    assert get_cached_count(Contact.objects.none(), 'test', 60) == 0
+    assert get_estimated_count(Contact.objects.none()) in (0, None)
+
+
+def test_contact_list_export(user_client):
+    import csv
+    import json
+    from src.contacts.models import Contact
+    PersonFactory.create_batch(5)
+    PersonFactory.create(first_name='Exported', last_name='Person', contact_type=Contact.ContactType.NATURAL)
+    url = reverse('contacts_contact_list')
+    resp = user_client.get(url, {'_export': 'csv', 'sort': 'full_name'})
+    assert resp.streaming
+    assert resp['Content-Disposition'] == 'attachment; filename="contact.csv"'
+    lines = list(csv.reader(b''.join(resp.streaming_content).decode().splitlines()))
+    assert len(lines) == 7
+    names = [dict(zip(lines[0], line))['Full name'] for line in lines[1:]]
+    assert names == sorted(names)
+
+    resp = user_client.get(url, {'_export': 'jsonl', 'full_name': 'Exported'})
+    rows = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+    assert len(rows) == 1
+    assert rows[0]['full_name'] == 'Person, Exported'
+    assert rows[0]['contact_type'] == str(Contact.ContactType.NATURAL.label)
+    assert b'_export=csv' in user_client.get(url).content
+
+
+def test_export_values(db):
+    import csv
+    import datetime
+    import decimal
+    import json
+    import django_tables2 as tables
+    from vprad.views.generic.export import export_response
+
+    class ValuesTable(tables.Table):
+        text = tables.Column()
+        number = tables.Column()
+        price = tables.Column()
+        flag = tables.Column()
+        day = tables.Column()
+
+    data = [{'text': '=HYPERLINK("http://x")', 'number': -3, 'price': decimal.Decimal('1.50'),
+             'flag': True, 'day': datetime.date(2020, 1, 31)},
+            {'text': '@SUM(A1)', 'number': 7, 'price': None, 'flag': False, 'day': None}]
+    table = ValuesTable(data=data)
+    response = export_response(table, data, 'csv', 'values')
+    lines = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+    # Formulas are quoted, numbers are not.
+    assert [line[:2] for line in lines[1:]] == [["'=HYPERLINK(\"http://x\")", '-3'], ["'@SUM(A1)", '7']]
+    response = export_response(table, data, 'jsonl', 'values')
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    assert rows[0] == {'text': '=HYPERLINK("http://x")', 'number': -3, 'price': '1.50',
+                       'flag': True, 'day': '2020-01-31'}
+    assert rows[1] == {'text': '@SUM(A1)', 'number': 7, 'price': None, 'flag': False, 'day': None}
+
+
+def test_export_prefetched(db, django_assert_num_queries):
+    import csv
+    import django_tables2 as tables
+    from src.contacts.models import Contact
+    from src.contacts.tests.factories import PhoneNumberFactory
+    from vprad.views.generic.export import export_response
+    for contact in PersonFactory.create_batch(5):
+        PhoneNumberFactory.create(parent=contact, number=f'555 {contact.pk}')
+
+    class PhonesTable(tables.Table):
+        phones = tables.ManyToManyColumn(accessor='phone_numbers')
+
+        class Meta:
+            model = Contact
+            fields = ['full_name', 'phones']
+
+    queryset = Contact.objects.prefetch_related('phone_numbers').order_by('-full_name')
+    response = export_response(PhonesTable(data=queryset), queryset, 'csv', 'contacts', chunk_size=2)
+    # Three pages of two rows, each with its prefetch.
+    with django_assert_num_queries(6):
+        lines = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+    assert [name for name, phones in lines[1:]] == list(queryset.values_list('full_name', flat=True))
+    assert all('555' in phones for name, phones in lines[1:])
@@ -1,11 +1,9 @@
 import django_filters
-from braces.views import SelectRelatedMixin
 from django.http import HttpResponse
-from django_filters import FilterSet
 import django_tables2 as tables
 
 from src.contacts.models import Contact, ContactPostalAddress, ContactPhoneNumber, ContactEmailAddress
-from vprad.views.generic.list import VListView, VEmbeddableListView
+from vprad.views.generic.list import VListView, VEmbeddableListView, VSearchFilterSet
 from vprad.views.generic.detail import VDetailView
 from vprad.views.helpers import get_model_url_name
 from vprad.views.registry import register_model_view, register_view
@@ -25,7 +23,7 @@ class ContactTable(tables.Table):
         fields = ('contact_type', 'full_name', 'language', 'assignee', )
 
 
-class ContactFilter(FilterSet):
+class ContactFilter(VSearchFilterSet):
     full_name = django_filters.CharFilter(lookup_expr='icontains')
 
     class Meta:
@@ -34,11 +32,9 @@ class ContactFilter(FilterSet):
 
 
 @register_model_view(model=Contact, view_type=ViewType.LIST)
-class ContactListView(SelectRelatedMixin,
-                      VListView):
+class ContactListView(VListView):
     table_class = ContactTable
     model = Contact
-    select_related = ['assignee', ]
     filterset_class = ContactFilter
 
 
@@ -73,10 +69,8 @@ class EmbeddedPhoneNumber(VEmbeddableListView):
 
 
 @register_model_view(model=Contact, view_type=ViewType.DETAIL)
-class ContactDetailView(SelectRelatedMixin,
-                        VDetailView):
+class ContactDetailView(VDetailView):
     model = Contact
-    select_related = ['assignee', ]
     embed_related = ('partner',
                      (EmbeddedPostalAddress, 'phone_numbers', 'email_addresses'))
     fields = (('full_name', 'contact_type'),
@@ -91,6 +85,5 @@ def sample_view(request):
 
 # TODO: Temporary to check hamburger link in embedded list
 @register_model_view(model=ContactPostalAddress, view_type='list')
-class PostalAddressListView(SelectRelatedMixin,
-                            VListView):
+class PostalAddressListView(VListView):
     model = ContactPostalAddress
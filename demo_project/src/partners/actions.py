@@ -24,7 +24,8 @@ def create_partner(request_user,
                     Partner.PartnerStatus.REJECTED,
                     Partner.PartnerStatus.DISABLED],
             target=Partner.PartnerStatus.APPROVED,
-            icon='thumbs up')
+            icon='thumbs up',
+            bulk_update=True)
 def approve_partner(instance, request_user):
     instance.save()
 
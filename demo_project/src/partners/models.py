@@ -27,6 +27,8 @@ class Partner(TimeStampedModel):
                                  )
 
     icon_class = 'industry'
+    # Relations used by __str__ (see vprad.views.helpers.get_related_lookups).
+    display_related = ('contact', )
 
     class Meta:
         verbose_name = _('Partner')
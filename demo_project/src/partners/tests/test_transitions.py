@@ -3,7 +3,7 @@ from src.partners.models import Partner
 from src.partners.tests.factories import PartnerFactory
 from src.users.tests.factories import UserFactory
 from vprad.actions import actions_registry
-from vprad.actions.signals import transition_pre, transition_post
+from vprad.actions.signals import transition_pre, transition_post, transition_bulk_post
 
 
 def test_constraints():
@@ -50,3 +50,82 @@ def test_transition(db):
 
     transition_pre.disconnect(pre)
     transition_post.disconnect(post)
+
+
+def test_available_actions_for_many(db, django_assert_num_queries):
+    partners = [PartnerFactory.create(status=status)
+                for status in Partner.PartnerStatus.values]
+    with django_assert_num_queries(1):
+        many = actions_registry.get_available_actions_for_many(partners)
+    assert list(many.keys()) == partners
+    for partner in partners:
+        single = list(actions_registry.get_available_actions_for(instance=partner))
+        assert many[partner] == single
+
+
+def test_transition_table():
+    table = actions_registry.get_transition_table(Partner, Partner.status)
+    assert [a.name for a in table.get_transitions(Partner.PartnerStatus.DISABLED)] == ['approve_partner']
+    for status in Partner.PartnerStatus.values:
+        partner = PartnerFactory.build(status=status)
+        assert sorted(a.name for a in actions_registry.get_available_transitions_for(instance=partner,
+                                                                                     field=Partner.status)) == \
+            sorted(a.name for a in actions_registry.get_available_actions_for(instance=partner))
+    graph = table.as_dict()
+    assert graph[Partner.PartnerStatus.NEW] == {'approve_partner': Partner.PartnerStatus.APPROVED,
+                                                'reject_partner': Partner.PartnerStatus.REJECTED,
+                                                'disable_partner': Partner.PartnerStatus.DISABLED}
+    assert '"New account" -> "Approved partner" [label="approve_partner"];' in table.as_dot()
+
+
+def test_call_bulk(db, django_assert_num_queries):
+    user = UserFactory.create()
+    new = PartnerFactory.create_batch(3, status=Partner.PartnerStatus.NEW)
+    approved = PartnerFactory.create(status=Partner.PartnerStatus.APPROVED)
+    bulk_post = MagicMock()
+    transition_bulk_post.connect(bulk_post)
+
+    action = actions_registry.find_cls_action(Partner, 'approve_partner')
+    # SAVEPOINT, SELECT, UPDATE, RELEASE
+    with django_assert_num_queries(4):
+        pks = action.call_bulk(Partner.objects.all(), request_user=user)
+    assert sorted(pks) == sorted(p.pk for p in new)
+    assert Partner.objects.filter(status=Partner.PartnerStatus.APPROVED).count() == 4
+    bulk_post.assert_called_once_with(signal=transition_bulk_post,
+                                      sender=action,
+                                      pks=pks,
+                                      old_values={pk: Partner.PartnerStatus.NEW for pk in pks},
+                                      new_value=Partner.PartnerStatus.APPROVED)
+
+    # Transitions without bulk_update are called one by one:
+    bulk_post.reset_mock()
+    action = actions_registry.find_cls_action(Partner, 'disable_partner')
+    pks = action.call_bulk(Partner.objects.filter(pk__in=[new[0].pk, approved.pk]),
+                           request_user=user, reconsider=False)
+    assert sorted(pks) == sorted([new[0].pk, approved.pk])
+    assert Partner.objects.filter(status=Partner.PartnerStatus.DISABLED).count() == 2
+    bulk_post.assert_called_once()
+    transition_bulk_post.disconnect(bulk_post)
+
+
+def test_bulk_action_view(user_client):
+    partners = PartnerFactory.create_batch(2, status=Partner.PartnerStatus.NEW)
+    action = actions_registry.find_cls_action(Partner, 'approve_partner')
+    url = action.get_bulk_url() + '?' + '&'.join('pk=%s' % p.pk for p in partners) + '&next=/'
+    resp = user_client.get(url)
+    assert resp.status_code == 200
+    resp = user_client.post(url)
+    assert resp.status_code == 302
+    assert resp.url == '/'
+    assert Partner.objects.filter(status=Partner.PartnerStatus.APPROVED).count() == 2
+
+
+def test_call_bulk_atomic_on_queryset_db(db, mocker):
+    from django.db import transaction
+    user = UserFactory.create()
+    partner = PartnerFactory.create(status=Partner.PartnerStatus.NEW)
+    atomic = mocker.patch('django.db.transaction.atomic', wraps=transaction.atomic)
+    action = actions_registry.find_cls_action(Partner, 'disable_partner')
+    assert action.call_bulk(Partner.objects.using('default').filter(pk=partner.pk),
+                            request_user=user, reconsider=False) == [partner.pk]
+    assert atomic.call_args_list[0] == mocker.call(using='default')
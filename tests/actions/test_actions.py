@@ -34,6 +34,13 @@ def test_register_action(actions, mocker):
         actions_registry.find_cls_action(User, 'made_up')
 
 
+@pytest.mark.parametrize('full_name', ['job', 'stats'])
+def test_register_reserved_name(actions, mocker, full_name):
+    with pytest.raises(ValueError, match=r'The action name .* is reserved'):
+        register_action(name='reserved', full_name=full_name)(mocker.stub())
+    assert full_name not in actions_registry.by_name
+
+
 def test_cls_action(actions):
     User = get_user_model()
 
@@ -186,3 +193,158 @@ def test_url(actions):
 
     with pytest.raises(ValueError, match=r'Action .* needs an instance'):
         action.get_absolute_url()
+
+
+def test_indexed_lookups(actions):
+    User = get_user_model()
+
+    class Proxy(User):
+        class Meta:
+            proxy = True
+            app_label = 'users'
+
+    def noop(instance):
+        return
+
+    first_name = User._meta.get_field('first_name')
+    register_model_action(model=User, name='on_user', takes_self=True)(noop)
+    register_model_action(model=Proxy, name='on_proxy', takes_self=True)(noop)
+    register_model_action(model=User, name='on_field', takes_self=True,
+                          attached_field=first_name)(noop)
+    register_model_action(model=User, name='on_class', takes_self=False)(noop)
+
+    names = [a.name for a in actions_registry.get_all_actions_for(instance=Proxy())]
+    assert names == ['on_user', 'on_proxy', 'on_field']
+    names = [a.name for a in actions_registry.get_all_actions_for(instance=User())]
+    assert names == ['on_user', 'on_field']
+    names = [a.name for a in actions_registry.get_all_actions_for(instance=User(),
+                                                                  attached_field=first_name)]
+    assert names == ['on_field']
+    names = [a.name for a in actions_registry.get_all_actions_for(instance=User(),
+                                                                  attached_field=None)]
+    assert names == ['on_user']
+    names = [a.name for a in actions_registry.get_all_actions_for(cls=Proxy)]
+    assert names == ['on_class']
+    assert actions_registry.find_cls_action(Proxy, 'on_proxy').name == 'on_proxy'
+    with pytest.raises(ActionDoesNotExist):
+        actions_registry.find_cls_action(Proxy, 'on_user')
+
+    actions_registry.clear()
+    assert list(actions_registry.get_all_actions_for(instance=User())) == []
+    with pytest.raises(ActionDoesNotExist):
+        actions_registry.find_cls_action(User, 'on_user')
+
+
+def test_conditions_cache(actions):
+    from vprad.actions.cache import conditions_cache
+    User = get_user_model()
+
+    def change_username(instance):
+        return
+
+    def method(instance, request_user):
+        pass
+
+    user = User(pk=1, username='marc')
+    condition = create_autospec(method, return_value=True)
+    register_action(cls=User, needs_instance=True, conditions=(condition, ),
+                    full_name='test_cache')(change_username)
+    action = actions_registry.find_action('test_cache')
+    with conditions_cache():
+        assert action.check_conditions(instance=user, request_user=user)
+        assert action.check_conditions(instance=user, request_user=user)
+        condition.assert_called_once_with(user, user)
+        action.call(instance=user)
+        assert action.check_conditions(instance=user, request_user=user)
+        assert condition.call_count == 2
+    assert action.check_conditions(instance=user, request_user=user)
+    assert condition.call_count == 3
+    with conditions_cache():
+        # Memoized checks are used for many instances too.
+        assert action.check_conditions(instance=user, request_user=user)
+        assert actions_registry.get_available_actions_for_many([user], request_user=user)[user] == [action]
+        assert condition.call_count == 4
+
+
+def test_conditions_cache_cleared_after_call(actions):
+    from vprad.actions.cache import conditions_cache
+    User = get_user_model()
+    user = User(pk=1, username='marc')
+    condition = create_autospec(lambda instance: None, return_value=True)
+
+    def rename(instance):
+        # Checked while the action runs, ie. before the state changes.
+        assert actions_registry.find_action('test_rename').check_conditions(instance=instance)
+
+    register_action(cls=User, needs_instance=True, conditions=(condition, ),
+                    full_name='test_rename')(rename)
+    action = actions_registry.find_action('test_rename')
+    with conditions_cache():
+        action.call(instance=user)
+        assert condition.call_count == 1
+        assert action.check_conditions(instance=user)
+        assert condition.call_count == 2
+
+
+def test_form_classes_cache(actions):
+    from vprad.actions.views import ActionViewHelper
+    User = get_user_model()
+    names = iter(['first', 'second'])
+
+    def rename(instance, first_name=lambda: next(names)):
+        return
+
+    register_model_action(model=User, name='rename', takes_self=True)(rename)
+    action = actions_registry.find_cls_action(User, 'rename')
+    helper = ActionViewHelper(action=action, object=User())
+    again = ActionViewHelper(action=action, object=User())
+    assert helper.action_form is again.action_form
+    form_class = helper.action_form
+    assert helper.action_form(prefix='_method')['first_name'].initial == 'first'
+    assert again.action_form(prefix='_method')['first_name'].initial == 'second'
+
+    register_model_action(model=User, name='other', takes_self=True)(rename)
+    assert ActionViewHelper(action=action, object=User()).action_form is not form_class
+
+
+def test_dispatcher(actions, settings, test_user, user_client):
+    from django.urls import resolve
+    settings.VPRAD_ACTIONS_DISPATCHER = True
+    User = get_user_model()
+
+    def rename(instance, first_name):
+        instance.first_name = first_name
+        instance.save()
+        return instance
+
+    register_model_action(model=User, name='rename')(rename)
+    clear_url_caches()
+    action = actions_registry.find_cls_action(User, 'rename')
+    url = action.get_absolute_url(test_user)
+    assert url == f'/action/{action.full_name}/{test_user.pk}'
+    assert action.get_bulk_url() == f'/action/{action.full_name}/bulk'
+    assert resolve(url).url_name == 'vprad_action_pk'
+
+    resp = user_client.post(url, {'_method-first_name': 'Dispatched'})
+    assert resp.status_code == 302
+    test_user.refresh_from_db()
+    assert test_user.first_name == 'Dispatched'
+    assert user_client.get(f'/action/{action.full_name}').status_code == 404
+    assert user_client.get('/action/no_such_action').status_code == 404
+
+
+def test_incremental_urls(actions):
+    from vprad.actions import urls
+
+    def noop(world):
+        return
+
+    clear_url_caches()
+    register_action(full_name='test_incremental')(noop)
+    assert urls.urlpatterns._cached is None
+    assert actions_registry.find_action('test_incremental').get_absolute_url() == '/action/test_incremental'
+    cached = urls.urlpatterns._cached
+    register_action(full_name='test_incremental2')(noop)
+    # Appended to the urlconf, not rebuilt.
+    assert urls.urlpatterns._cached[:len(cached)] == cached
+    assert actions_registry.find_action('test_incremental2').get_absolute_url() == '/action/test_incremental2'
@@ -0,0 +1,87 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from vprad.actions import actions_registry
+from vprad.actions.decorators import register_model_action
+from vprad.actions.jobs import drain_jobs
+from vprad.actions.models import ActionJob
+from vprad.helpers import clear_url_caches
+
+
+def test_background_action(actions, settings, test_user, user_client):
+    settings.VPRAD_ACTIONS_JOB_RUNNER = None
+    User = get_user_model()
+
+    def rename(instance, first_name):
+        instance.first_name = first_name
+        instance.save()
+        return instance
+
+    register_model_action(model=User, name='rename', background=True)(rename)
+    clear_url_caches()
+    action = actions_registry.find_cls_action(User, 'rename')
+    resp = user_client.post(action.get_absolute_url(test_user),
+                            {'_method-first_name': 'Renamed'})
+    job = ActionJob.objects.get()
+    assert resp.status_code == 302
+    assert resp.url == job.get_absolute_url()
+    assert job.status == ActionJob.Status.PENDING
+    test_user.refresh_from_db()
+    assert test_user.first_name != 'Renamed'
+
+    resp = user_client.get(job.get_absolute_url())
+    assert resp.status_code == 200
+    assert 'X-IC-CancelPolling' not in resp
+
+    assert drain_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == ActionJob.Status.DONE
+    test_user.refresh_from_db()
+    assert test_user.first_name == 'Renamed'
+    resp = user_client.get(job.get_absolute_url(), HTTP_X_IC_REQUEST='true')
+    assert resp['X-IC-CancelPolling'] == 'true'
+
+
+def test_background_bulk_action(actions, settings, test_user, user_client):
+    settings.VPRAD_ACTIONS_JOB_RUNNER = None
+    User = get_user_model()
+    others = [User.objects.create(username=f'other{i}') for i in range(2)]
+
+    def rename(instance, first_name):
+        instance.first_name = first_name
+        instance.save()
+
+    register_model_action(model=User, name='rename', background=True)(rename)
+    clear_url_caches()
+    action = actions_registry.find_cls_action(User, 'rename')
+    url = action.get_bulk_url() + '?' + '&'.join('pk=%s' % user.pk for user in others)
+    resp = user_client.post(url, {'_method-first_name': 'Renamed'})
+    job = ActionJob.objects.get()
+    assert resp.url == job.get_absolute_url()
+    assert not User.objects.filter(first_name='Renamed').exists()
+    assert drain_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == ActionJob.Status.DONE, job.error
+    assert set(User.objects.filter(first_name='Renamed')) == set(others)
+
+
+def test_stale_jobs_fail(db, settings):
+    settings.VPRAD_ACTIONS_JOB_TIMEOUT = 60
+    now = timezone.now()
+    lost = ActionJob.objects.create(action_name='lost', status=ActionJob.Status.RUNNING,
+                                    started=now - datetime.timedelta(seconds=61))
+    running = ActionJob.objects.create(action_name='running', status=ActionJob.Status.RUNNING,
+                                       started=now - datetime.timedelta(seconds=30))
+    assert drain_jobs() == 0
+    lost.refresh_from_db()
+    running.refresh_from_db()
+    assert lost.status == ActionJob.Status.FAILED
+    assert lost.finished and 'Timed out' in lost.error
+    assert running.status == ActionJob.Status.RUNNING
+    settings.VPRAD_ACTIONS_JOB_TIMEOUT = None
+    ActionJob.objects.filter(pk=lost.pk).update(status=ActionJob.Status.RUNNING)
+    drain_jobs()
+    lost.refresh_from_db()
+    assert lost.status == ActionJob.Status.RUNNING
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+
+from vprad.actions import actions_registry, stats
+from vprad.actions.decorators import register_action
+
+
+def test_stats(actions, settings):
+    settings.VPRAD_ACTIONS_STATS = True
+    stats.reset_stats()
+
+    def is_ready(request_user):
+        return True
+
+    def launch(request_user):
+        return
+
+    register_action(conditions=[is_ready], full_name='test_stats')(launch)
+    action = actions_registry.find_action('test_stats')
+    assert action.check_conditions(request_user=None)
+    action.call(request_user=None)
+    data = stats.get_stats()
+    assert data[stats.CHECK]['test_stats']['count'] == 1
+    assert data[stats.CALL]['test_stats']['count'] == 1
+    condition = data[stats.CONDITION][f'test_stats:{__name__}.test_stats.<locals>.is_ready']
+    assert set(condition.keys()) == {'count', 'total', 'p50', 'p95', 'p99'}
+    assert condition['p50'] <= condition['p99'] <= condition['total']
+
+    settings.VPRAD_ACTIONS_STATS = False
+    action.call(request_user=None)
+    assert stats.get_stats()[stats.CALL]['test_stats']['count'] == 1
+    stats.reset_stats()
+
+
+def test_stats_view(actions, client, db):
+    user = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+    client.force_login(user)
+    resp = client.get('/action/stats')
+    assert resp.status_code == 200
+    assert set(resp.json().keys()) == {stats.CALL, stats.CHECK, stats.CONDITION}
+    user.is_staff = False
+    user.save()
+    assert client.get('/action/stats').status_code == 403
+
+
+def test_stats_command(capsys):
+    call_command('vprad_actions_stats')
+    assert 'p95 (ms)' in capsys.readouterr().out
+
+
+def test_stats_failures_counted(actions, settings):
+    settings.VPRAD_ACTIONS_STATS = True
+    stats.reset_stats()
+
+    def broken(request_user):
+        raise RuntimeError("broken")
+
+    register_action(conditions=[broken], full_name='test_broken')(lambda request_user: None)
+    action = actions_registry.find_action('test_broken')
+    with pytest.raises(RuntimeError):
+        action.check_conditions(request_user=None)
+    data = stats.get_stats()
+    assert data[stats.CHECK]['test_broken']['count'] == 1
+    assert data[stats.CONDITION][f'test_broken:{__name__}.test_stats_failures_counted.<locals>.broken']['count'] == 1
+    stats.reset_stats()
+
+
+def test_stats_merge(monkeypatch):
+    stats.reset_stats()
+    # Two processes, with different timings.
+    fast, slow = stats.TimingStats(), stats.TimingStats()
+    for _ in range(90):
+        fast.add(0.001)
+    for _ in range(10):
+        slow.add(0.1)
+    monkeypatch.setattr(stats, '_process_key', 'vprad_actions_stats:process:fast')
+    stats._stats[('call', 'merged')] = fast
+    stats.publish_stats()
+    monkeypatch.setattr(stats, '_process_key', 'vprad_actions_stats:process:slow')
+    stats._stats[('call', 'merged')] = slow
+    stats.publish_stats()
+    stats._stats.clear()
+    monkeypatch.setattr(stats, '_process_key', 'vprad_actions_stats:process:reader')
+    merged = stats.get_stats()[stats.CALL]['merged']
+    assert merged['count'] == 100
+    assert 0.001 <= merged['p50'] < 0.0011
+    assert 0.1 <= merged['p95'] <= 0.1 * stats.BUCKET_BASE
+    stats.reset_stats()
+
+
+def test_stats_processes(monkeypatch):
+    stats.reset_stats()
+    # A process not publishing for long drops from the list.
+    cache.set(stats.CACHE_PROCESSES_KEY, {'vprad_actions_stats:process:gone': time.time() - stats.CACHE_TIMEOUT - 1})
+    monkeypatch.setattr(stats, '_process_key', 'vprad_actions_stats:process:live')
+    stats.publish_stats()
+    assert list(stats._live_processes()) == ['vprad_actions_stats:process:live']
+    stats.reset_stats()
+    assert stats._live_processes() == {}
+
+
+def test_stats_reset_other_processes(monkeypatch):
+    stats.reset_stats()
+    stats.record(stats.CALL, 'before_reset', 0.001)
+    # Another process resets after these started counting.
+    monkeypatch.setattr(stats, '_counting_since', stats._counting_since - 10)
+    cache.set(stats.CACHE_RESET_KEY, time.time(), stats.CACHE_TIMEOUT)
+    stats.publish_stats()
+    assert 'before_reset' not in stats.get_stats()[stats.CALL]
+    # Once dropped, they are kept.
+    stats.record(stats.CALL, 'after_reset', 0.001)
+    stats.publish_stats()
+    assert 'after_reset' in stats.get_stats()[stats.CALL]
+    stats.reset_stats()
@@ -1,8 +1,9 @@
+from functools import partial
 from unittest.mock import ANY
 
 import pytest
 
-from vprad.helpers import call_with_context
+from vprad.helpers import call_with_context, get_call_plan
 
 
 def dumb_method(a_param,
@@ -42,3 +43,41 @@ def test_call_with_context_kwargs(mocker):
     assert ret == "1/1"
     with pytest.raises(TypeError, match=r'Missing \'a_param\' parameter to call .*kwargs_method\''):
         call_with_context(kwargs_method, extra=123)
+
+
+def test_call_plan():
+    plan = get_call_plan(dumb_method)
+    assert plan is get_call_plan(dumb_method)
+    assert plan.names == ('a_param', 'typed_param', 'default_param', 'default_typed_param')
+    assert plan.required == {'a_param', 'typed_param'}
+    assert plan.defaults == {'default_param': 123, 'default_typed_param': '1234'}
+    assert plan.annotations == {'typed_param': int, 'default_typed_param': str}
+    assert not plan.accepts_kwargs
+    assert get_call_plan(kwargs_method).accepts_kwargs
+
+
+class Caller:
+    def __call__(self, a_param, typed_param: int = 1):
+        return f"{a_param}/{typed_param}"
+
+    def method(self, a_param):
+        return a_param
+
+
+def test_call_with_context_partial_and_objects():
+    assert call_with_context(partial(dumb_method, typed_param=2), a_param=1) == "1/2/123/1234"
+    with pytest.raises(TypeError, match=r'Missing \'a_param\' parameter to call .*partial\''):
+        call_with_context(partial(dumb_method, typed_param=2))
+    assert call_with_context(Caller(), a_param=1, other=2) == "1/1"
+    assert get_call_plan(Caller()).qualname.endswith('.Caller')
+    # Bound methods share the plan of their function.
+    assert get_call_plan(Caller().method) is get_call_plan(Caller().method)
+    assert get_call_plan(Caller().method).names == ('a_param', )
+
+
+def test_call_with_context_no_annotation_checks(mocker, settings):
+    settings.VPRAD_CHECK_CALL_ANNOTATIONS = False
+    m = mocker.patch('vprad.helpers.log_warning')
+    ret = call_with_context(dumb_method, a_param=1, typed_param='2')
+    assert ret == "1/2/123/1234"
+    m.assert_not_called()
@@ -0,0 +1,60 @@
+import threading
+from unittest.mock import MagicMock
+
+from vprad.helpers import LazyClosureSequence, SnapshotRegistry
+
+
+def test_lazy_closure_sequence():
+    get_items = MagicMock(return_value=[])
+    seq = LazyClosureSequence(get_items)
+    assert len(seq) == 0
+    assert list(seq) == []
+    get_items.assert_called_once_with()
+
+    seq.append('a')
+    assert list(seq) == ['a']
+    seq.reset_cache()
+    get_items.return_value = ['b']
+    seq.append('c')
+    assert list(seq) == ['b']
+    assert get_items.call_count == 2
+
+
+def test_lazy_closure_sequence_builds_once():
+    started = threading.Event()
+    calls = []
+
+    def get_items():
+        calls.append(1)
+        started.wait(1)
+        return ['a']
+
+    seq = LazyClosureSequence(get_items)
+    threads = [threading.Thread(target=len, args=(seq, )) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+
+
+def test_snapshot_registry():
+    listener = MagicMock()
+    registry = SnapshotRegistry()
+    registry.subscribe(listener)
+    registry['a'] = 1
+    snapshot = registry.snapshot()
+    registry['b'] = 2
+    assert dict(snapshot) == {'a': 1}
+    assert dict(registry) == {'a': 1, 'b': 2}
+    assert registry.version == 2
+    listener.assert_called_with('b', 2, False)
+    registry['b'] = 3
+    listener.assert_called_with('b', 3, True)
+    # Iterating a registry changing meanwhile is safe.
+    for key in registry.keys():
+        registry[key + key] = 0
+    registry.clear()
+    listener.assert_called_with(None, None, True)
+    assert len(registry) == 0
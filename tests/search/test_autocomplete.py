@@ -0,0 +1,106 @@
+import pytest
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+
+from src.contacts.models import Contact
+from src.contacts.tests.factories import PersonFactory
+from vprad.search.autocomplete import autocomplete, get_autocomplete_stats, reset_autocomplete_stats, \
+    get_scope, get_scope_queryset, SCOPE_SALT
+from vprad.search.index import search
+
+
+@pytest.fixture
+def contacts(db, settings):
+    settings.VPRAD_SEARCH_INDEX = True
+    cache.clear()
+    reset_autocomplete_stats()
+    # No random web addresses: they are searched too.
+    yield [PersonFactory.create(first_name=first_name, last_name='Flowers', web_address='')
+           for first_name in ('Ramona', 'Ramón', 'Rafael', 'Julia')]
+    cache.clear()
+
+
+def test_autocomplete_narrows(contacts, django_assert_num_queries):
+    queryset = Contact.objects.all()
+    rows, more = autocomplete(queryset, 'ra')
+    assert [pk for pk, text in rows] == [c.pk for c in search(queryset, 'ra')]
+    assert not more
+    # Longer terms are narrowed from the cached rows of 'ra'.
+    with django_assert_num_queries(0):
+        assert [text for pk, text in autocomplete(queryset, 'Ram')[0]] == ['Flowers, Ramona', 'Flowers, Ramón']
+        assert [text for pk, text in autocomplete(queryset, 'ramona')[0]] == ['Flowers, Ramona']
+        assert [text for pk, text in autocomplete(queryset, 'ramona')[0]] == ['Flowers, Ramona']
+        assert [text for pk, text in autocomplete(queryset, 'ra flo')[0]] == \
+               [text for pk, text in rows]
+    assert get_autocomplete_stats() == {'hits': 1, 'narrowed': 3, 'misses': 1, 'hit_ratio': 0.8}
+    # Other scopes are not shared.
+    autocomplete(queryset.filter(first_name='Julia'), 'ramo', scope='julia')
+    assert get_autocomplete_stats()['misses'] == 2
+
+
+def test_autocomplete_limits(contacts, settings):
+    settings.VPRAD_AUTOCOMPLETE_FETCH = 2
+    queryset = Contact.objects.all()
+    rows, more = autocomplete(queryset, 'r', limit=1)
+    assert len(rows) == 1 and more
+    # 'r' had more rows than fetched, 'ram' is queried.
+    assert len(autocomplete(queryset, 'ram')[0]) == 2
+    assert get_autocomplete_stats()['misses'] == 2
+
+
+def test_autocomplete_view(contacts, user_client, settings):
+    settings.VPRAD_AUTOCOMPLETE = True
+    julia = contacts[-1]
+    url = reverse('vprad_autocomplete', kwargs={'app_label': 'contacts', 'model_name': 'contact'})
+    widget = Contact.get_fk_widget()
+    widget.queryset = Contact.objects.all()
+    data = user_client.get(widget.get_url() + '&term=ramona').json()
+    assert data == {'results': [{'id': contacts[0].pk, 'text': 'Flowers, Ramona'}],
+                    'more': False, 'limited': False}
+    # The url of the widgets has the scope of their queryset.
+    widget.queryset = Contact.objects.filter(first_name='Julia')
+    scoped_url = widget.get_url()
+    assert scoped_url.startswith(url + '?scope=')
+    assert widget.build_attrs({})['data-ajax--delay'] == 250
+    data = user_client.get(scoped_url + '&term=flo').json()
+    assert data['results'] == [{'id': julia.pk, 'text': 'Flowers, Julia'}]
+    # Without a valid scope of the model, nothing is listed.
+    assert user_client.get(url, {'term': 'flo'}).status_code == 404
+    assert user_client.get(url, {'term': 'flo', 'scope': 'bad'}).status_code == 404
+    other_url = reverse('vprad_autocomplete', kwargs={'app_label': 'users', 'model_name': 'user'})
+    assert user_client.get(other_url + scoped_url[len(url):]).status_code == 404
+    assert user_client.get(reverse('vprad_autocomplete_stats')).status_code == 403
+    # Disabled, the widgets keep the django_select2 view.
+    settings.VPRAD_AUTOCOMPLETE = False
+    assert not widget.get_url().startswith(url)
+
+
+def test_autocomplete_new_objects(contacts, run_on_commit):
+    queryset = Contact.objects.all()
+    assert len(autocomplete(queryset, 'ramona')[0]) == 1
+    PersonFactory.create(first_name='Ramona', last_name='Second', web_address='')
+    assert len(autocomplete(queryset, 'ramona')[0]) == 2
+
+
+def test_scope_is_json(contacts, settings):
+    julia = contacts[-1]
+    queryset = Contact.objects.filter(first_name__in=['Julia', 'Rafael'], pk__gte=julia.pk).order_by('-pk')
+    scope = get_scope(queryset)
+    # Plain data, no pickles.
+    data = signing.loads(scope, salt=SCOPE_SALT)
+    assert data['model'] == 'contacts.Contact'
+    assert data['order'] == ['-pk']
+    scoped, key = get_scope_queryset(Contact, scope)
+    assert list(scoped) == [julia]
+    assert get_scope_queryset(Contact, get_scope(queryset))[1] == key
+    # Filters that can not be told as lookups have no scope.
+    assert get_scope(Contact.objects.filter(Q(first_name='Julia') | Q(last_name='Flowers'))) is None
+    assert get_scope(Contact.objects.exclude(first_name='Julia')) is None
+    # Unsigned, tampered and expired scopes are refused.
+    forged = signing.dumps({'model': 'contacts.Contact', 'filters': [], 'order': []})
+    assert get_scope_queryset(Contact, forged) is None
+    assert get_scope_queryset(Contact, scope[:-2]) is None
+    settings.VPRAD_AUTOCOMPLETE_SCOPE_MAX_AGE = -1
+    assert get_scope_queryset(Contact, scope) is None
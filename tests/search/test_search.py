@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from src.contacts.models import Contact
+from src.contacts.tests.factories import PersonFactory
+from vprad.search.index import search, search_all, reindex
+from vprad.search.index import get_search_text
+
+
+@pytest.fixture(params=[True, False], ids=['index', 'fields'])
+def search_index(request, settings, db):
+    settings.VPRAD_SEARCH_INDEX = request.param
+    return request.param
+
+
+def _names(queryset):
+    return sorted(contact.first_name for contact in queryset)
+
+
+def test_search_text(db):
+    contact = PersonFactory.create(first_name='Áurea', last_name='Pérez', web_address='https://www.example.com/')
+    assert get_search_text(contact) == 'pérez áurea https www example com'
+
+
+def test_search(search_index):
+    PersonFactory.create(first_name='Áurea', last_name='Pérez', web_address='https://www.example.com/')
+    PersonFactory.create(first_name='Aurelio', last_name='Gómez', web_address='')
+    PersonFactory.create(first_name='Juan', last_name='Pérez', web_address='https://juan.org/')
+    contacts = Contact.objects.all()
+    assert _names(search(contacts, 'pérez')) == ['Juan', 'Áurea']
+    assert _names(search(contacts, 'Pérez juan')) == ['Juan']
+    assert _names(search(contacts, 'example')) == ['Áurea']
+    assert _names(search(contacts, '')) == ['Aurelio', 'Juan', 'Áurea']
+    assert _names(search(contacts.filter(first_name='Juan'), 'pérez')) == ['Juan']
+    if search_index:
+        # Words prefixes, without diacritics.
+        assert _names(search(contacts, 'aure')) == ['Aurelio', 'Áurea']
+        assert _names(search(contacts, 'exa perez')) == ['Áurea']
+
+
+def test_index_updates(settings, db):
+    settings.VPRAD_SEARCH_INDEX = True
+    contact = PersonFactory.create(first_name='Ramona', last_name='Flowers')
+    assert list(search(Contact.objects.all(), 'ramona')) == [contact]
+    contact.first_name = 'Romana'
+    contact.save()
+    assert list(search(Contact.objects.all(), 'ramona')) == []
+    assert list(search(Contact.objects.all(), 'romana')) == [contact]
+    # Not indexed without signals, until reindexed.
+    Contact.objects.filter(pk=contact.pk).update(first_name='Renata', full_name='Flowers, Renata')
+    assert list(search(Contact.objects.all(), 'renata')) == []
+    assert reindex([Contact])['contacts.Contact'] == 1
+    assert list(search(Contact.objects.all(), 'renata')) == [contact]
+    contact.delete(soft=False)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM vprad_search_doc WHERE body LIKE '%%renata%%'")
+        assert cursor.fetchone() == (0, )
+
+
+def test_search_views(search_index, user_client):
+    PersonFactory.create(first_name='Ramona', last_name='Flowers')
+    PersonFactory.create(first_name='Scott', last_name='Pilgrim')
+    response = user_client.get(reverse('contacts_contact_list'), {'q': 'flowers'})
+    assert [row.record.first_name for row in response.context['table'].page.object_list] == ['Ramona']
+    response = user_client.get(reverse('search'), {'q': 'pilg'})
+    assert response.status_code == 200
+    (model, objects), = search_all('pilgrim')
+    assert model is Contact and [obj.first_name for obj in objects] == ['Scott']
+    assert b'Flowers, Ramona' not in response.content
+    if search_index:
+        assert b'Pilgrim, Scott' in response.content
@@ -0,0 +1,72 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.urls import reverse
+
+from src.contacts.tests.factories import PersonFactory
+from vprad.site.jinja.cache import get_fragment_cache_stats, get_fragment_key, reset_fragment_cache_stats
+
+
+@pytest.fixture
+def fragment_cache(settings, db):
+    settings.VPRAD_FRAGMENT_CACHE = True
+    cache.clear()
+    reset_fragment_cache_stats()
+    yield
+    cache.clear()
+
+
+def test_render_fields_cached(fragment_cache, user_client):
+    contact = PersonFactory.create(first_name='Fragment')
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    assert b'Fragment' in user_client.get(url).content
+    assert b'Fragment' in user_client.get(url).content
+    assert get_fragment_cache_stats()['render_fields'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+    # Saving the object, or one it points to, makes it stale.
+    contact.first_name = 'Changed'
+    contact.save()
+    assert b'Changed' in user_client.get(url).content
+    contact.assignee.username = 'new_assignee'
+    contact.assignee.save()
+    assert b'new_assignee' in user_client.get(url).content
+    assert get_fragment_cache_stats()['render_fields']['misses'] == 3
+
+
+def test_embedded_list_cached(fragment_cache, user_client):
+    contact = PersonFactory.create()
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    user_client.get(url, {'_embed_related': 'phone_numbers'})
+    user_client.get(url, {'_embed_related': 'phone_numbers'})
+    assert get_fragment_cache_stats()['embedded_list'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+    # Related objects saves make their parent stale.
+    number = contact.phone_numbers.first()
+    number.number = '+34 600 000 000'
+    number.save()
+    assert b'+34 600 000 000' in user_client.get(url, {'_embed_related': 'phone_numbers'}).content
+    number.delete()
+    assert b'+34 600 000 000' not in user_client.get(url, {'_embed_related': 'phone_numbers'}).content
+    # Other sorting of the list, other fragment.
+    user_client.get(url, {'_embed_related': 'phone_numbers', 'sort': 'number'})
+    assert get_fragment_cache_stats()['embedded_list']['misses'] == 4
+    assert user_client.get(reverse('vprad_fragment_cache_stats')).status_code == 403
+
+
+def test_generations_after_commit_and_m2m(fragment_cache, test_user, mocker):
+    on_commit = mocker.patch('django.db.transaction.on_commit')
+    group = Group.objects.create(name='Fragments')
+    keys = get_fragment_key('t', 'n', [test_user]), get_fragment_key('t', 'n', [group])
+    test_user.groups.add(group)
+    changed = get_fragment_key('t', 'n', [test_user]), get_fragment_key('t', 'n', [group])
+    assert keys[0] != changed[0] and keys[1] != changed[1]
+    # And again once committed, after the renders made meanwhile.
+    test_user.save()
+    saved = get_fragment_key('t', 'n', [test_user])
+    on_commit.call_args[0][0]()
+    assert get_fragment_key('t', 'n', [test_user]) != saved
+
+
+def test_fragment_cache_disabled(user_client, db):
+    reset_fragment_cache_stats()
+    contact = PersonFactory.create()
+    user_client.get(reverse('contacts_contact_detail', args=[contact.pk]))
+    assert get_fragment_cache_stats() == {}
@@ -0,0 +1,73 @@
+import pytest
+from django.http import HttpResponse
+from django.urls import reverse
+
+from src.contacts.tests.factories import PersonFactory, PhoneNumberFactory
+from vprad.views.generic.conditional import ConditionalGetMixin
+
+
+@pytest.fixture
+def conditional_get(settings, db):
+    settings.VPRAD_CONDITIONAL_GET = True
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+def test_detail_not_modified(conditional_get, user_client):
+    contact = PersonFactory.create(first_name='Conditional')
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert 'no-cache' in response['Cache-Control']
+    assert response['Last-Modified']
+    not_modified = _revalidate(user_client, url, response)
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    # Saving changes the validator.
+    contact.first_name = 'Changed'
+    contact.save()
+    response = _revalidate(user_client, url, response)
+    assert response.status_code == 200
+    assert b'Changed' in response.content
+
+
+def test_embedded_list_not_modified(conditional_get, user_client):
+    contact = PersonFactory.create()
+    url = reverse('contacts_contact_detail', args=[contact.pk]) + '?_embed_related=phone_numbers'
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert _revalidate(user_client, url, response).status_code == 304
+    phone = PhoneNumberFactory.create(parent=contact, number='555 0101')
+    response = _revalidate(user_client, url, response)
+    assert response.status_code == 200
+    assert b'555 0101' in response.content
+    phone.delete()
+    response = _revalidate(user_client, url, response)
+    assert response.status_code == 200
+    assert b'555 0101' not in response.content
+
+
+def test_embeds_batch_never_not_modified(conditional_get, user_client):
+    contact = PersonFactory.create()
+    url = reverse('contacts_contact_detail', args=[contact.pk]) + '?_embed_related=phone_numbers,email_addresses'
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert 'ETag' not in response
+    assert user_client.get(url, HTTP_IF_NONE_MATCH='*').status_code == 200
+
+
+def test_disabled_by_default(db, user_client):
+    contact = PersonFactory.create()
+    response = user_client.get(reverse('contacts_contact_detail', args=[contact.pk]))
+    assert 'ETag' not in response
+
+
+def test_no_state_renders(conditional_get, request_factory):
+    view = ConditionalGetMixin()
+    view.kwargs = {}
+    view.request = request_factory.get('/', HTTP_IF_NONE_MATCH='*')
+    response = view.conditional(lambda: HttpResponse('rendered'))
+    assert response.status_code == 200
+    assert 'ETag' not in response
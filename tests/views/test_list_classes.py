@@ -0,0 +1,82 @@
+from src.contacts.models import Contact
+from vprad.views.generic.list import VListView, VEmbeddableListView
+
+
+class ContactsView(VListView):
+    model = Contact
+    include = ('first_name', 'last_name')
+    filterset_fields = {'first_name': ['exact', 'icontains']}
+
+
+class OtherContactsView(ContactsView):
+    include = ('first_name', )
+
+
+def test_generated_classes_cached():
+    table_class = ContactsView().get_table_class()
+    assert ContactsView().get_table_class() is table_class
+    assert OtherContactsView().get_table_class() is not table_class
+    assert list(table_class.base_columns) == ['id', 'first_name', 'last_name']
+
+    filterset_class = ContactsView().get_filterset_class()
+    assert ContactsView().get_filterset_class() is filterset_class
+    # Plus the search of the models with search fields.
+    assert set(filterset_class.base_filters) == {'first_name', 'first_name__icontains', 'q'}
+
+
+def test_embedded_table_class():
+    class Embedded(VEmbeddableListView):
+        model = Contact
+        include = ('first_name', )
+
+    table_class = Embedded().get_table_class()
+    assert Embedded().get_table_class() is table_class
+    assert table_class is not OtherContactsView().get_table_class()
+
+
+class PlainContactsView(VListView):
+    model = Contact
+    include = ('first_name', 'last_name')
+    projection = True
+
+
+class ProjectedContactsView(VListView):
+    model = Contact
+    include = ('full_name', 'contact_type', 'assignee')
+    projection = True
+
+
+def test_projection(request_factory, test_user):
+    from src.contacts.tests.factories import PersonFactory
+    PersonFactory.create_batch(3, assignee=test_user)
+
+    def get_table(view_class, **params):
+        request = request_factory.get('/', params)
+        request.user = test_user
+        response = view_class.as_view()(request)
+        response.render()
+        return response.context_data['table']
+
+    table = get_table(PlainContactsView)
+    record = table.page.object_list.data[0]
+    assert isinstance(record, dict)
+    assert set(record) == {'pk', 'id', 'first_name', 'last_name'}
+    assert table.rows[0].get_cell_value('id') == record['id']
+    assert f'/contacts/contact/{record["id"]}/detail' in table.as_html(table.request)
+
+    # Choices and relations need instances, with only the columns shown.
+    table = get_table(ProjectedContactsView)
+    record = table.page.object_list.data[0]
+    assert isinstance(record, Contact)
+    assert record.get_deferred_fields() >= {'first_name', 'last_name', 'web_address'}
+    assert 'full_name' not in record.get_deferred_fields()
+    assert table.rows[0].get_cell_value('assignee') == test_user
+
+    class KeysetView(PlainContactsView):
+        pagination = 'keyset'
+        paginate_by = 2
+
+    table = get_table(KeysetView)
+    assert len(table.rows) == 2
+    assert isinstance(table.data.data[0], dict)
+
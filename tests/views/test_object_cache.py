@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from src.contacts.models import Contact
+from src.contacts.tests.factories import PersonFactory
+from src.partners.models import Partner
+from src.partners.tests.factories import PartnerFactory
+from src.users.tests.factories import UserFactory
+from vprad.actions import actions_registry
+from vprad.views.generic.detail import VDetailView
+from vprad.views.object_cache import bump_generation, cache_object, get_cached_object
+
+
+@pytest.fixture
+def object_cache(settings, db):
+    settings.VPRAD_OBJECT_CACHE = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _contact_queries(client, *requests):
+    with CaptureQueriesContext(connection) as queries:
+        responses = [client.get(*request) for request in requests]
+    count = len([q for q in queries.captured_queries if q['sql'].startswith('SELECT "contacts_contact"."id"')])
+    return count, responses
+
+
+def test_detail_views_share_object(object_cache, user_client):
+    contact = PersonFactory.create(first_name='Cached')
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    assert _contact_queries(user_client, (url, ))[0] == 1
+    # The page and its embeds, served from the cache.
+    count, responses = _contact_queries(user_client, (url, ), (url, {'_embed_related': 'phone_numbers,email_addresses'}))
+    assert count == 0
+    assert b'Cached' in responses[0].content
+    # Saving forgets it.
+    contact.first_name = 'Changed'
+    contact.save()
+    count, responses = _contact_queries(user_client, (url, ), (url, ))
+    assert count == 1
+    assert b'Changed' in responses[1].content
+    bump_generation(Contact)
+    assert _contact_queries(user_client, (url, ))[0] == 1
+    contact.delete(soft=False)
+    assert user_client.get(url).status_code == 404
+
+
+def test_object_cache_disabled(user_client, db):
+    contact = PersonFactory.create()
+    url = reverse('contacts_contact_detail', args=[contact.pk])
+    assert _contact_queries(user_client, (url, ), (url, ))[0] == 2
+
+
+def test_actions_forget(object_cache):
+    user = UserFactory.create()
+    partner = PartnerFactory.create(status=Partner.PartnerStatus.NEW)
+    cache_object(partner)
+    cached = get_cached_object(Partner, partner.pk)
+    assert cached == partner and cached is not partner
+    # Bulk transitions don't save the instances.
+    action = actions_registry.find_cls_action(Partner, 'approve_partner')
+    action.call_bulk(Partner.objects.filter(pk=partner.pk), request_user=user)
+    assert get_cached_object(Partner, partner.pk) is None
+    cache_object(partner)
+    action = actions_registry.find_cls_action(Partner, 'disable_partner')
+    action.call(instance=partner, request_user=user, reconsider=False)
+    assert get_cached_object(Partner, partner.pk) is None
+
+
+def test_forget_after_commit(object_cache, mocker):
+    on_commit = mocker.patch('django.db.transaction.on_commit')
+    partner = PartnerFactory.create()
+    cache_object(partner)
+    partner.save()
+    # Cached again by a request before the commit:
+    cache_object(partner)
+    on_commit.call_args[0][0]()
+    assert get_cached_object(Partner, partner.pk) is None
+
+
+def test_actions_post_not_cached(object_cache, user_client):
+    partner = PartnerFactory.create(status=Partner.PartnerStatus.NEW)
+    cache_object(partner)
+    Partner.objects.filter(pk=partner.pk).update(status=Partner.PartnerStatus.APPROVED)
+    action = actions_registry.find_cls_action(Partner, 'approve_partner')
+    # The cached copy is still new, the partner is not.
+    assert user_client.post(action.get_absolute_url(partner)).status_code == 403
+
+
+def test_cached_object_honours_queryset(object_cache, request_factory):
+    contact = PersonFactory.create()
+    cache_object(contact)
+
+    class OwnOnlyView(VDetailView):
+        model = Contact
+
+        def get_queryset(self):
+            return Contact.objects.none()
+
+    view = OwnOnlyView()
+    view.setup(request_factory.get('/'), pk=contact.pk)
+    with pytest.raises(Http404):
+        view.get_object()
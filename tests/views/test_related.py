@@ -0,0 +1,37 @@
+from src.contacts.models import Contact, ContactPostalAddress
+from src.partners.models import Partner
+from vprad.views.helpers import get_related_lookups
+
+
+def test_related_lookups():
+    assert get_related_lookups(Contact, ('full_name', 'assignee')) == (('assignee', ), ())
+    assert get_related_lookups(Contact, (('full_name', 'assignee__username'), 'web_address')) == (('assignee', ), ())
+    # Many relations are prefetched.
+    assert get_related_lookups(Contact, ('phone_numbers', 'email_addresses__email')) == \
+        ((), ('phone_numbers', 'email_addresses'))
+    # Generic foreign keys too, their parts joined.
+    assert get_related_lookups(ContactPostalAddress, ('content_type', 'parent')) == \
+        (('content_type', ), ('parent', ))
+    # The relations used by __str__ (display_related), of the model and of those shown.
+    assert get_related_lookups(Partner, ('status', )) == (('contact', ), ())
+    assert get_related_lookups(Contact, ('partner', 'partner__status')) == (('partner__contact', ), ())
+    assert get_related_lookups(Contact, ('no_such_field', 'full_name')) == ((), ())
+
+
+def test_list_queries(user_client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from src.contacts.tests.factories import PersonFactory
+    from src.users.tests.factories import UserFactory
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as queries:
+            assert user_client.get(reverse('contacts_contact_list')).status_code == 200
+        return len(queries)
+
+    PersonFactory.create(assignee=UserFactory.create())
+    few = count_queries()
+    for user in UserFactory.create_batch(6):
+        PersonFactory.create(assignee=user)
+    assert count_queries() == few
@@ -0,0 +1,61 @@
+import pytest
+from django.urls import resolve, reverse, NoReverseMatch, Resolver404
+
+from src.contacts.models import Contact
+from vprad.helpers import clear_url_caches, get_url_for
+from vprad.views.urls import reverse_model_view
+
+
+@pytest.fixture
+def dict_resolver(settings):
+    settings.VPRAD_VIEWS_DICT_RESOLVER = True
+    clear_url_caches()
+    yield
+    settings.VPRAD_VIEWS_DICT_RESOLVER = False
+    clear_url_caches()
+
+
+def test_dict_resolver(dict_resolver, user_client):
+    match = resolve('/contacts/contact/5/detail')
+    assert match.url_name == 'contacts_contact_detail'
+    assert match.kwargs == {'pk': '5'}
+    assert match.route == 'contacts/contact/<str:pk>/detail'
+    assert resolve('/contacts/contact/list').url_name == 'contacts_contact_list'
+    # Views outside the model views still resolve.
+    assert resolve('/contacts/sample_view/').url_name == 'sample_view'
+
+    assert reverse('contacts_contact_detail', args=[5]) == '/contacts/contact/5/detail'
+    assert reverse_model_view('contacts_contact_detail', 5) == '/contacts/contact/5/detail'
+    assert reverse_model_view('contacts_contact_list') == '/contacts/contact/list'
+    assert get_url_for(Contact(pk=5)) == '/contacts/contact/5/detail'
+    with pytest.raises(NoReverseMatch):
+        reverse_model_view('contacts_contact_list', 5)
+    assert user_client.get('/contacts/contact/list').status_code == 200
+
+
+def test_dict_resolver_not_found(dict_resolver):
+    for path in ('/contacts/contact/5/nothing', '/contacts/nothing/list',
+                 '/contacts/contact//detail', '/contacts/contact/1/2/detail'):
+        with pytest.raises(Resolver404):
+            resolve(path)
+
+
+def test_url_templates(mocker):
+    import vprad.views.urls
+    clear_url_caches()
+    spy = mocker.spy(vprad.views.urls, 'reverse')
+    urls = [get_url_for(Contact(pk=pk)) for pk in (1, 2, 'a b')]
+    assert urls == ['/contacts/contact/1/detail',
+                    '/contacts/contact/2/detail',
+                    '/contacts/contact/a%20b/detail']
+    assert spy.call_count == 1
+    assert get_url_for(Contact(pk='a b')) == reverse('contacts_contact_detail', args=['a b'])
+    assert reverse_model_view('contacts_contact_list') == '/contacts/contact/list'
+    with pytest.raises(NoReverseMatch):
+        reverse_model_view('contacts_nothing_detail', 1)
+    with pytest.raises(NoReverseMatch):
+        reverse_model_view('contacts_nothing_detail', 1)
+    assert spy.call_count == 3
+    clear_url_caches()
+    get_url_for(Contact(pk=1))
+    assert spy.call_count == 4
@@ -1,4 +1,4 @@
-from vprad.actions.decorators import register_action, register_model_action, transition
+from vprad.actions.decorators import register_action, register_model_action, transition, condition_q
 from vprad.actions.registry import actions_registry, ActionDoesNotExist, ActionNotAllowed
 
 default_app_config = 'vprad.actions.apps.VActionsConfig'
@@ -8,5 +8,6 @@ __all__ = [actions_registry,
            register_action,
            register_model_action,
            transition,
+           condition_q,
            ActionDoesNotExist,
            ActionNotAllowed]
\ No newline at end of file
@@ -16,4 +16,6 @@ class VActionsConfig(AppConfig):
 
     def ready(self):
         autodiscover_modules('actions')
-        logger.info("VPRad Actions ready with %d actions", len(actions_registry.by_name.keys()))
+        tables = actions_registry.compile_transitions()
+        logger.info("VPRad Actions ready with %d actions and %d transition tables",
+                    len(actions_registry.by_name.keys()), len(tables))
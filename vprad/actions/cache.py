@@ -0,0 +1,52 @@
+""" Request scoped memoization of action conditions.
+
+While a `conditions_cache()` block is active (`ConditionsCacheMiddleware`
+opens one for each request) `Action.check_conditions` remembers its result
+by (action, model, pk, user), so each condition runs at most once per
+object. Calling any action clears the cache, before and after the call,
+as it may change the outcome.
+"""
+import contextlib
+import typing as t
+from contextvars import ContextVar
+
+# Holds a dict of cache key -> result while active.
+_conditions_cache = ContextVar('vprad_conditions_cache', default=None)
+
+
+@contextlib.contextmanager
+def conditions_cache():
+    """ Memoize action conditions inside the block. """
+    token = _conditions_cache.set({})
+    try:
+        yield
+    finally:
+        _conditions_cache.reset(token)
+
+
+def get_conditions_cache() -> t.Optional[t.Dict[t.Tuple, bool]]:
+    """ Return the active cache, or None outside a `conditions_cache()` block. """
+    return _conditions_cache.get()
+
+
+def clear_conditions_cache():
+    cache = _conditions_cache.get()
+    if cache is not None:
+        cache.clear()
+
+
+def conditions_cache_key(action, cls, instance, kwargs) -> t.Optional[t.Tuple]:
+    """ Return the cache key for a `check_conditions` call or None if not cacheable.
+
+    Only calls with nothing but a `request_user` as extra context and with either
+    a saved instance or a class are cached.
+    """
+    if kwargs.keys() - {'request_user'}:
+        return None
+    user = kwargs.get('request_user', None)
+    user_key = getattr(user, 'pk', user)
+    if instance:
+        if instance.pk is None:
+            return None
+        return action.full_name, instance.__class__, instance.pk, user_key
+    return action.full_name, cls, None, user_key
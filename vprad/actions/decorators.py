@@ -1,14 +1,14 @@
-import collections
 import functools
 import logging
 import typing as t
 
 from django.db import models
+from django.db.models import Q
 from django.db.models.query_utils import DeferredAttribute
 
 from vprad.actions.registry import actions_registry
 from vprad.actions.signals import transition_pre, transition_post
-from vprad.actions.types import default_full_name, Action
+from vprad.actions.types import default_full_name, Action, CONDITION_Q_ATTR
 from vprad.helpers import get_icon_for, log_with_caller, call_with_context
 
 
@@ -25,7 +25,7 @@ def register_action(name: str = None,
                     **kwargs):
     if not conditions:
         conditions = tuple()
-    elif not isinstance(conditions, collections.Iterable):
+    elif not isinstance(conditions, t.Iterable):
         conditions = (conditions, )
     else:
         conditions = tuple(conditions)
@@ -59,20 +59,45 @@ def register_action(name: str = None,
     return _inner
 
 
+def condition_q(q: t.Callable):
+    """ Declare the `Q` form of an action condition.
+
+    `q` is called (with `call_with_context`) with `action`, `cls` and
+    `request_user` and must return a `Q` object matching exactly those
+    instances for which the condition holds. This allows checking the
+    condition for many instances with a single query
+    (see `VActionsRegistry.get_available_actions_for_many`).
+
+        @condition_q(lambda: Q(partner__isnull=True))
+        def has_no_partner(instance):
+            return not hasattr(instance, 'partner')
+    """
+    def _inner(func):
+        setattr(func, CONDITION_Q_ATTR, q)
+        return func
+    return _inner
+
+
 def transition(model: t.Type[models.Model],
                verbose_name: str,
                attached_field: models.Field,
                source, target,
                conditions: t.Union[t.Set[t.Callable], t.Callable] = None,
-               icon: str = None):
+               icon: str = None,
+               bulk_update: bool = False):
     """ A transition is a specific kind of action.
 
-    A condition is added requiring `field` to be one of the `source` values,
-    then on call it will be updated to target.
-    If create_comment is True, a comment will be created.
+    A condition is added requiring `field` to be one of the `source` values
+    (or any value if `source` is '*'), then on call it will be updated to target.
+    The transitions of a model field are compiled into a `TransitionTable`
+    (see `VActionsRegistry.get_transition_table`).
+    Set `bulk_update` if the function does nothing but save the instance,
+    so `Action.call_bulk` can run the transition as a single UPDATE.
     """
-    if not isinstance(source, t.Iterable):
-        source = (source, )
+    if source != '*':
+        if isinstance(source, str) or not isinstance(source, t.Iterable):
+            source = (source, )
+        source = frozenset(source)
     if not conditions:
         conditions = tuple()
     elif not isinstance(conditions, t.Iterable):
@@ -80,6 +105,12 @@ def transition(model: t.Type[models.Model],
     else:
         conditions = tuple(conditions)
 
+    def _condition_q():
+        if source == '*':
+            return Q()
+        return Q(**{'%s__in' % attached_field.name: source})
+
+    @condition_q(_condition_q)
     def _condition(instance):
         if source == '*':
             return True
@@ -94,7 +125,10 @@ def transition(model: t.Type[models.Model],
                  'needs_instance': True,
                  'icon': icon,
                  'attached_field': attached_field,
-                 'conditions': conditions}
+                 'conditions': conditions,
+                 'source': source,
+                 'target': target,
+                 'bulk_update': bulk_update}
 
     def _inner(func):
         @functools.wraps(func)
@@ -138,7 +172,8 @@ def register_model_action(model: t.Type[models.Model],
                           icon: str = None,
                           takes_self: bool = True,
                           attached_field: models.Field = None,
-                          conditions: t.Union[t.Callable, t.Set[t.Callable]] = None):
+                          conditions: t.Union[t.Callable, t.Set[t.Callable]] = None,
+                          background: bool = False):
     if not icon:
         icon = get_icon_for(model)
 
@@ -150,5 +185,6 @@ def register_model_action(model: t.Type[models.Model],
         'attached_field': attached_field,
         'needs_instance': takes_self,
         'cls': model,
+        'background': background,
     }
     return register_action(**action_kwargs)
\ No newline at end of file
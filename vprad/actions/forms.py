@@ -19,7 +19,6 @@ class ActionForm(forms.Form):
 
     def __init__(self, instance=None, *args, **kwargs):
         initial = kwargs.pop('initial') if 'initial' in kwargs else {}
-        print("xinitial ", initial)
         if instance is None:
             self.instance = None
         else:
@@ -27,6 +26,10 @@ class ActionForm(forms.Form):
             object_data = model_to_dict(instance, self.fields.keys(), None)
             initial.update(object_data)
         super().__init__(*args, initial=initial, **kwargs)
+        # The form class is built once per action (see AnnotationFormFactory),
+        # so callable limit_choices_to are applied for each form.
+        for formfield in self.fields.values():
+            apply_limit_choices_to_to_formfield(formfield)
 
 
 @attr.s(auto_attribs=True)
@@ -41,7 +44,11 @@ class AnnotationFormFactory:
             then the field's formfield is used. If a default value is provided
             it will be passed on to initial.
 
-    The defaults might be a callable, in which case it is called.
+    The defaults might be a callable, in which case it is called
+    each time a form is created.
+
+    The factory of each action is built once and cached by the
+    registry (see `VActionsRegistry.get_form_factory`).
     """
     # Those are not considered (because we supply values for them):
     reserved_words = ['self',
@@ -53,8 +60,8 @@ class AnnotationFormFactory:
 
     name: str
     verbose_name: str
-    instance: models.Model
     method: t.Callable
+    instance: models.Model = attr.ib(default=None)
     base_form_class: ActionForm = attr.ib(default=ActionForm)
     model: t.Type[models.Model] = attr.ib(default=None)
 
@@ -85,7 +92,8 @@ class AnnotationFormFactory:
             elif name in model_fields:
                 formfield = get_formfield_for_field(model_fields[name])
                 if data.default != data.empty:
-                    formfield.initial = data.default() if callable(data.default) else data.default
+                    # Django calls a callable initial for each form.
+                    formfield.initial = data.default
                     formfield.required = False
                 params[name] = formfield
             else:
@@ -21,3 +21,10 @@ def get_instance_field_actions(instance, user, field_name):
                                                            request_user=user,
                                                            attached_field=field))
 
+
+
+@register_global(name='get_instances_actions')
+def get_instances_actions(instances, user):
+    return actions_registry.get_available_actions_for_many(instances,
+                                                           request_user=user,
+                                                           attached_field=None)
@@ -0,0 +1,154 @@
+""" Background execution of actions.
+
+Actions registered with `background=True` are not called from `ActionView`,
+instead the submitted form data is stored in an `ActionJob` and the user
+is sent to the job status page. Bulk calls (`BulkActionView`) are queued
+the same way, with the pks of the selected objects.
+
+Jobs are drained from the database table, by default by a local thread pool
+right after the request commits (`VPRAD_ACTIONS_JOB_RUNNER = 'thread'`).
+With `VPRAD_ACTIONS_JOB_RUNNER = None` they are left for the
+`vprad_actions_worker` management command.
+
+A job still running `VPRAD_ACTIONS_JOB_TIMEOUT` seconds after it started
+is taken for lost (its worker died) and marked as failed by the next
+drain. It is not run again: the action may have done part of its work.
+"""
+import datetime
+import json
+import logging
+import traceback
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction, connections
+from django.utils import timezone
+from django.utils.datastructures import MultiValueDict
+
+from vprad.actions.registry import actions_registry, ActionNotAllowed
+from vprad.actions.types import Action
+
+logger = logging.getLogger('vprad.actions.jobs')
+# Key of the job data with the pks of a bulk call (see `Action.call_bulk`).
+BULK_PKS_KEY = '_bulk_pks'
+_executor: t.Optional[ThreadPoolExecutor] = None
+
+
+def enqueue_action(action: Action, instance, request_user, data: MultiValueDict, pks: t.Iterable = None):
+    """ Queue a call to `action` with the form `data` submitted by `request_user`.
+
+    With `pks` the action is called in bulk on those objects instead.
+    """
+    from vprad.actions.models import ActionJob
+    data = {k: v for k, v in data.lists() if k not in ('csrfmiddlewaretoken', BULK_PKS_KEY)}
+    if pks is not None:
+        data[BULK_PKS_KEY] = [str(pk) for pk in pks]
+    job = ActionJob.objects.create(action_name=action.full_name,
+                                   object_pk=str(instance.pk) if instance else None,
+                                   user=request_user if getattr(request_user, 'pk', None) else None,
+                                   data=json.dumps(data))
+    runner = getattr(settings, 'VPRAD_ACTIONS_JOB_RUNNER', 'thread')
+    if runner == 'thread':
+        transaction.on_commit(_submit_drain)
+    logger.info("Queued job %s", job)
+    return job
+
+
+def _submit_drain():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'VPRAD_ACTIONS_JOB_THREADS', 2),
+                                       thread_name_prefix='vprad-jobs')
+    _executor.submit(_drain_in_thread)
+
+
+def _drain_in_thread():
+    try:
+        drain_jobs()
+    finally:
+        connections.close_all()
+
+
+def claim_next_job():
+    """ Mark the oldest pending job as running, and return it (or None). """
+    from vprad.actions.models import ActionJob
+    pending = ActionJob.objects.filter(status=ActionJob.Status.PENDING)
+    for pk in pending.values_list('pk', flat=True)[:10]:
+        # The conditional update makes sure only one worker gets the job.
+        claimed = pending.filter(pk=pk).update(status=ActionJob.Status.RUNNING,
+                                               started=timezone.now())
+        if claimed:
+            return ActionJob.objects.get(pk=pk)
+    return None
+
+
+def fail_stale_jobs() -> int:
+    """ Mark as failed the jobs running for longer than `VPRAD_ACTIONS_JOB_TIMEOUT`. """
+    from vprad.actions.models import ActionJob
+    timeout = getattr(settings, 'VPRAD_ACTIONS_JOB_TIMEOUT', 3600)
+    if timeout is None:
+        return 0
+    now = timezone.now()
+    failed = ActionJob.objects.filter(status=ActionJob.Status.RUNNING,
+                                      started__lt=now - datetime.timedelta(seconds=timeout)) \
+        .update(status=ActionJob.Status.FAILED,
+                finished=now,
+                error="Timed out: the worker running the job stopped.")
+    if failed:
+        logger.warning("Marked %d stale jobs as failed", failed)
+    return failed
+
+
+def run_job(job):
+    """ Call the action of a running `job`, and record the outcome. """
+    from vprad.actions.models import ActionJob
+    from vprad.actions.views import ActionViewHelper
+    from vprad.helpers import get_url_for
+    try:
+        with transaction.atomic():
+            action = actions_registry.find_action(job.action_name)
+            data = MultiValueDict(json.loads(job.data))
+            bulk_pks = data.getlist(BULK_PKS_KEY) if BULK_PKS_KEY in data else None
+            instance = None
+            if job.object_pk is not None:
+                instance = action.cls._default_manager.get(pk=job.object_pk)
+            user = get_user_model()._default_manager.get(pk=job.user_id) if job.user_id else None
+            # Bulk calls check the conditions on each object.
+            if bulk_pks is None and not action.check_conditions(instance=instance, request_user=user):
+                raise ActionNotAllowed("Action not available")
+            helper = ActionViewHelper(action, instance)
+            bound_forms = helper.bind_forms(data)
+            errors = {name: form.errors for name, form in bound_forms.items() if not form.is_valid()}
+            if errors:
+                raise ValueError("Invalid form data: %s" % errors)
+            if bulk_pks is None:
+                result = helper.call_with_forms(user, bound_forms)
+            else:
+                kwargs = helper.get_call_kwargs(user, bound_forms)
+                kwargs.pop('instance')
+                action.call_bulk(action.cls._default_manager.filter(pk__in=bulk_pks), **kwargs)
+                result = None
+        job.status = ActionJob.Status.DONE
+        job.result_url = get_url_for(result) or ''
+    except Exception:
+        logger.exception("Job %s failed", job)
+        job.status = ActionJob.Status.FAILED
+        job.error = traceback.format_exc()
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'result_url', 'error', 'finished'])
+    return job
+
+
+def drain_jobs(max_jobs: int = None) -> int:
+    """ Run pending jobs until there are none left (or `max_jobs` ran). """
+    fail_stale_jobs()
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from vprad.actions import stats
+
+
+class Command(BaseCommand):
+    help = "Show the timings of actions and their conditions, as published to the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help="Output JSON instead of a table.")
+        parser.add_argument('--reset', action='store_true',
+                            help="Forget the published timings (the running processes drop "
+                                 "theirs on their next publish).")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            stats.reset_stats()
+            return
+        data = stats.get_stats()
+        if options['json']:
+            self.stdout.write(json.dumps(data, indent=2))
+            return
+        row = "%-10s %10s %12s %10s %10s %10s  %s"
+        self.stdout.write(row % ('kind', 'count', 'total (ms)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'name'))
+        for kind, entries in data.items():
+            for name, s in entries.items():
+                self.stdout.write(row % (kind, s['count'],
+                                         '%.2f' % (s['total'] * 1000),
+                                         '%.3f' % (s['p50'] * 1000),
+                                         '%.3f' % (s['p95'] * 1000),
+                                         '%.3f' % (s['p99'] * 1000),
+                                         name))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from vprad.actions.jobs import drain_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background action jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once there are no pending jobs.")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to wait between polls for new jobs.")
+
+    def handle(self, *args, **options):
+        while True:
+            done = drain_jobs()
+            if done:
+                self.stdout.write("Ran %d jobs" % done)
+            if options['once']:
+                break
+            time.sleep(options['interval'])
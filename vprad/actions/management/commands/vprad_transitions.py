@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from vprad.actions import actions_registry
+
+
+class Command(BaseCommand):
+    help = "Print the compiled transition tables as Graphviz DOT graphs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*',
+                            help="Only show these models (as app_label.ModelName).")
+
+    def handle(self, *args, **options):
+        for table in actions_registry.compile_transitions():
+            # noinspection PyProtectedMember
+            if options['models'] and table.model._meta.label not in options['models']:
+                continue
+            self.stdout.write(table.as_dot())
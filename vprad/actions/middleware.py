@@ -0,0 +1,14 @@
+from vprad.actions.cache import conditions_cache
+
+
+class ConditionsCacheMiddleware:
+    """ Memoize action conditions for the duration of each request.
+
+    See `vprad.actions.cache`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with conditions_cache():
+            return self.get_response(request)
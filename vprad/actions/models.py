@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import models
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+
+
+class ActionJob(models.Model):
+    """ An action call queued to run in the background.
+
+    See `vprad.actions.jobs`.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    action_name = models.CharField(max_length=255,
+                                   verbose_name=_('Action'))
+    object_pk = models.CharField(max_length=255, null=True, blank=True,
+                                 verbose_name=_('Object'))
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             null=True,
+                             on_delete=models.SET_NULL,
+                             related_name='+',
+                             verbose_name=_('User'))
+    # The submitted form data, as JSON.
+    data = models.TextField(default='{}')
+    status = models.CharField(max_length=10,
+                              choices=Status.choices,
+                              default=Status.PENDING,
+                              db_index=True,
+                              verbose_name=_('Status'))
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name=_('Created'))
+    started = models.DateTimeField(null=True, blank=True,
+                                   verbose_name=_('Started'))
+    finished = models.DateTimeField(null=True, blank=True,
+                                    verbose_name=_('Finished'))
+    result_url = models.CharField(max_length=2000, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        verbose_name = _('Action job')
+        verbose_name_plural = _('Action jobs')
+        ordering = ('created', )
+
+    icon_class = 'tasks'
+
+    def __str__(self):
+        return "%s #%s" % (self.action_name, self.pk)
+
+    def get_absolute_url(self):
+        return reverse('vprad_actions_job', args=[self.pk])
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
@@ -1,13 +1,20 @@
 import logging
+import threading
 import typing as t
+from collections import OrderedDict
 
 import attr
 from django.db import models
+from django.db.models import BooleanField, Case, Value, When
 from django.db.models.query_utils import DeferredAttribute
 
-from vprad.actions.types import Action
+from vprad.actions.cache import get_conditions_cache, conditions_cache_key
+from vprad.actions.types import Action, TransitionTable
+from vprad.helpers import SnapshotRegistry
 
 logger = logging.getLogger("vprad.actions")
+# Taken by the fixed routes under action/ (see `vprad.actions.urls`).
+RESERVED_NAMES = ('job', 'stats')
 
 
 class ActionDoesNotExist(Exception):
@@ -20,13 +27,32 @@ class ActionNotAllowed(Exception):
 
 @attr.s(auto_attribs=True, slots=True)
 class VActionsRegistry:
-    by_name: t.Dict[str, Action] = attr.ib(default=attr.Factory(dict), repr=False, init=False)
+    # Changes are swapped in under `_lock` (see `SnapshotRegistry`), so the
+    # registry can be read from any thread while actions are added.
+    by_name: t.Mapping[str, Action] = attr.ib(default=attr.Factory(SnapshotRegistry), repr=False, init=False)
+    _lock: threading.RLock = attr.ib(default=attr.Factory(threading.RLock), repr=False, init=False)
+    # Secondary indexes, maintained by `add_action` (their lists are never changed in place):
+    _by_cls: t.Dict[t.Optional[t.Type], t.Tuple[Action, ...]] = attr.ib(default=attr.Factory(dict),
+                                                                         repr=False, init=False)
+    _by_cls_name: t.Dict[t.Tuple[t.Type, str], Action] = attr.ib(default=attr.Factory(dict),
+                                                                 repr=False, init=False)
+    _by_field: t.Dict[t.Any, t.Tuple[Action, ...]] = attr.ib(default=attr.Factory(dict),
+                                                              repr=False, init=False)
+    _position: t.Dict[str, int] = attr.ib(default=attr.Factory(dict), repr=False, init=False)
+    # Results of `get_all_actions_for` by (class, wants_instance, attached_field).
+    _lookup_cache: t.Dict[t.Tuple, t.Tuple[Action, ...]] = attr.ib(default=attr.Factory(dict),
+                                                                   repr=False, init=False)
+    # AnnotationFormFactory by action full_name (see `get_form_factory`).
+    _form_factories: t.Dict[str, t.Any] = attr.ib(default=attr.Factory(dict), repr=False, init=False)
+    # Compiled transitions by (model, field).
+    _transition_tables: t.Dict[t.Tuple, TransitionTable] = attr.ib(default=attr.Factory(dict),
+                                                                   repr=False, init=False)
 
     def find_cls_action(self, cls: t.Type, name: str):
-        for act in self.by_name.values():
-            if act.name == name and act.cls == cls:
-                return act
-        raise ActionDoesNotExist("No action named '%s' for class '%s'" % (name, cls))
+        try:
+            return self._by_cls_name[(cls, name)]
+        except KeyError:
+            raise ActionDoesNotExist("No action named '%s' for class '%s'" % (name, cls))
 
     def find_action(self, full_name: str):
         """ Find an action on the global registry. """
@@ -35,9 +61,83 @@ class VActionsRegistry:
         raise ActionDoesNotExist("No action by the name '%s' in the registry" % full_name)
 
     def add_action(self, act: Action):
-        if act.full_name in self.by_name:
-            raise ValueError("The registry already has an action named %s", act.full_name)
-        self.by_name[act.full_name] = act
+        if act.full_name in RESERVED_NAMES:
+            raise ValueError("The action name %s is reserved" % act.full_name)
+        with self._lock:
+            if act.full_name in self.by_name:
+                raise ValueError("The registry already has an action named %s", act.full_name)
+            self._position[act.full_name] = len(self._position)
+            self._by_cls[act.cls] = self._by_cls.get(act.cls, ()) + (act,)
+            self._by_cls_name.setdefault((act.cls, act.name), act)
+            self._by_field[act.attached_field] = self._by_field.get(act.attached_field, ()) + (act,)
+            # Publishes the action (and notifies the listeners), then the caches
+            # are dropped, so none of the new ones misses it.
+            self.by_name[act.full_name] = act
+            self._clear_caches()
+
+    def clear(self):
+        """ Remove all the actions from the registry. """
+        with self._lock:
+            self._position = {}
+            self._by_cls = {}
+            self._by_cls_name = {}
+            self._by_field = {}
+            self.by_name.clear()
+            self._clear_caches()
+
+    def _clear_caches(self):
+        self._lookup_cache = {}
+        self._transition_tables = {}
+        self._form_factories = {}
+
+    def get_form_factory(self, act: Action):
+        """ Return the `AnnotationFormFactory` building the forms of `act`.
+
+        It is cached for the actions in the registry, until the registry changes.
+        """
+        from vprad.actions.forms import AnnotationFormFactory
+        factories = self._form_factories
+        factory = factories.get(act.full_name, None)
+        if factory is None or factory.method is not act.function:
+            factory = AnnotationFormFactory(name=act.name,
+                                            verbose_name=act.verbose_name,
+                                            method=act.function,
+                                            model=act.cls)
+            if self.by_name.get(act.full_name, None) is act:
+                factories[act.full_name] = factory
+        return factory
+
+    def _lookup(self, cls: t.Optional[t.Type], wants_instance: bool, attached_field):
+        """ Compute the actions of `cls` for `get_all_actions_for`.
+
+        With `wants_instance` the actions needing an instance of `cls`
+        (or any of its bases) are returned, otherwise the class actions
+        of `cls` and those not bound to any class.
+        The result is in registration order.
+        """
+        if cls is None:
+            candidates = self.by_name.values()
+        else:
+            classes = [k for k in cls.__mro__ if k in self._by_cls]
+            if not wants_instance:
+                classes.append(None)
+            candidates = [act for k in classes for act in self._by_cls.get(k, ())]
+        if attached_field != '__all__':
+            candidates = [act for act in candidates if act.attached_field == attached_field]
+        if cls is not None:
+            candidates = [act for act in candidates if act.needs_instance == wants_instance]
+            candidates.sort(key=lambda act: self._position[act.full_name])
+        return tuple(candidates)
+
+    def _cached_lookup(self, cls: t.Optional[t.Type], wants_instance: bool, attached_field):
+        key = (cls, wants_instance, attached_field)
+        cache = self._lookup_cache
+        try:
+            return cache[key]
+        except KeyError:
+            # If the registry changes meanwhile, the result goes to a dropped cache.
+            found = cache[key] = self._lookup(cls, wants_instance, attached_field)
+            return found
 
     def get_all_actions_for(self, *,
                             cls=None,
@@ -52,19 +152,17 @@ class VActionsRegistry:
         """
         if isinstance(attached_field, DeferredAttribute):
             attached_field = attached_field.field
+        if instance and cls:
+            # Instance actions need an instance, class actions must not have one.
+            return
+        if attached_field != '__all__' and attached_field not in self._by_field:
+            return
+        lookup_cls = instance.__class__ if instance else cls or None
+        yield from self._cached_lookup(lookup_cls, bool(instance), attached_field)
 
-        for act in self.by_name.values():
-            if instance and not act.needs_instance:
-                continue
-            if instance and act.needs_instance and not isinstance(instance, act.cls):
-                continue
-            if cls and act.needs_instance:
-                continue
-            if cls and act.cls and not issubclass(cls, act.cls):
-                continue
-            if attached_field != '__all__' and attached_field != act.attached_field:
-                continue
-            yield act
+    def get_bulk_actions_for(self, cls: t.Type[models.Model]) -> t.Tuple[Action, ...]:
+        """ Get the actions that can be called on many instances of `cls` (see `Action.call_bulk`). """
+        return self._cached_lookup(cls, True, '__all__')
 
     def get_available_actions_for(self, *,
                                   cls=None,
@@ -77,6 +175,107 @@ class VActionsRegistry:
             if act.check_conditions(cls=cls, instance=instance, request_user=request_user):
                 yield act
 
+    def get_transition_table(self, model: t.Type[models.Model], field: models.Field) -> TransitionTable:
+        """ Return the `TransitionTable` for the transitions of `model` on `field`. """
+        if isinstance(field, DeferredAttribute):
+            field = field.field
+        key = (model, field)
+        tables = self._transition_tables
+        try:
+            return tables[key]
+        except KeyError:
+            transitions = (act for act in self._cached_lookup(model, True, field)
+                           if act.source is not None)
+            table = tables[key] = TransitionTable.from_actions(model, field, transitions)
+            return table
 
-actions_registry = VActionsRegistry()
+    def compile_transitions(self) -> t.List[TransitionTable]:
+        """ Build the `TransitionTable` of every model field having transitions. """
+        keys = OrderedDict()
+        for act in self.by_name.values():
+            if act.source is not None and act.cls:
+                keys[(act.cls, act.attached_field)] = True
+        return [self.get_transition_table(model, field) for model, field in keys.keys()]
+
+    def get_available_transitions_for(self, *,
+                                      instance: models.Model,
+                                      field: models.Field,
+                                      request_user=None):
+        """ Get the transitions available for `instance` from the current value of `field`. """
+        table = self.get_transition_table(instance.__class__, field)
+        for act in table.get_transitions(table.field.value_from_object(instance)):
+            if act.check_conditions(instance=instance, request_user=request_user):
+                yield act
+
+    def get_available_actions_for_many(self,
+                                       instances: t.Iterable[models.Model],
+                                       request_user=None,
+                                       attached_field: models.Field = '__all__'):
+        """ Get available actions for many instances at once.
+
+        Returns an OrderedDict of instance -> list of available actions.
+        Conditions with a `Q` form (see `condition_q`) are checked with one
+        query per model against the database, the others are called
+        for each instance that passed those.
+        """
+        result = OrderedDict((obj, []) for obj in instances)
+        cache = get_conditions_cache()
+        by_cls = OrderedDict()
+        for obj in result.keys():
+            by_cls.setdefault(obj.__class__, []).append(obj)
+        for model, objs in by_cls.items():
+            acts = list(self.get_all_actions_for(instance=objs[0],
+                                                 attached_field=attached_field))
+            keys = {}
+            if cache is not None:
+                keys = {(obj.pk, act.full_name): conditions_cache_key(act, None, obj, {'request_user': request_user})
+                        for obj in objs for act in acts}
+            cached = {pk_name: cache[key] for pk_name, key in keys.items() if key is not None and key in cache}
+            # Only the objects with some action not memoized yet are checked.
+            pending = [obj for obj in objs if any((obj.pk, act.full_name) not in cached for act in acts)]
+            passed = self._check_q_conditions_many(model, pending, acts, request_user) if pending else {}
+            for obj in objs:
+                for act in acts:
+                    try:
+                        available = cached[(obj.pk, act.full_name)]
+                    except KeyError:
+                        available = ((act.full_name not in passed or obj.pk in passed[act.full_name])
+                                     and act.check_python_conditions(instance=obj, request_user=request_user))
+                        if keys.get((obj.pk, act.full_name)) is not None:
+                            cache[keys[(obj.pk, act.full_name)]] = available
+                    if available:
+                        result[obj].append(act)
+        return result
+
+    # noinspection PyMethodMayBeStatic
+    def _check_q_conditions_many(self, model, objs, acts, request_user):
+        """ Return, by action full_name, the pks of `objs` matching its `Q` conditions.
 
+        Actions without `Q` conditions are not in the result.
+        """
+        annotations = OrderedDict()
+        for act in acts:
+            q = act.get_conditions_q(cls=model, request_user=request_user)
+            if q is None:
+                continue
+            if not q:
+                # An empty Q() always holds.
+                q = models.Q(pk__isnull=False)
+            annotations[act.full_name] = Case(When(q, then=Value(True)),
+                                              default=Value(False),
+                                              output_field=BooleanField())
+        if not annotations:
+            return {}
+        aliases = OrderedDict(('_vprad_action_%d' % i, full_name)
+                              for i, full_name in enumerate(annotations.keys()))
+        qs = model._base_manager.filter(pk__in=[obj.pk for obj in objs])
+        qs = qs.annotate(**{alias: annotations[full_name] for alias, full_name in aliases.items()})
+        passed = {full_name: set() for full_name in annotations.keys()}
+        for row in qs.values_list('pk', *aliases.keys()):
+            for full_name, holds in zip(aliases.values(), row[1:]):
+                if holds:
+                    passed[full_name].add(row[0])
+        return passed
+
+
+actions_registry = VActionsRegistry()
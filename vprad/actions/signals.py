@@ -8,4 +8,9 @@ transition_pre = Signal(providing_args=['instance',
                                         'new_value'])
 transition_post = Signal(providing_args=['instance',
                                          'old_value',
-                                         'new_value'])
\ No newline at end of file
+                                         'new_value'])
+# Sent once by Action.call_bulk on transitions, with the pks of
+# the affected instances and their previous values (by pk).
+transition_bulk_post = Signal(providing_args=['pks',
+                                              'old_values',
+                                              'new_value'])
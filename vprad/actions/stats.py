@@ -0,0 +1,176 @@
+""" Timing instrumentation of actions and their conditions.
+
+While `settings.VPRAD_ACTIONS_STATS` is True, `Action.check_conditions` and
+`Action.call` record, in process, how many times and for how long they
+(and each condition callable) run, including the runs that raise. Times
+are counted in logarithmic buckets (about 9% wide) to compute p50/p95/p99
+latencies: percentiles are the upper bound of their bucket, and the
+buckets of all the processes merge without bias.
+
+Each process publishes its counters to the Django cache every
+`VPRAD_ACTIONS_STATS_PUBLISH` seconds, under a key of its own listed
+(with the time it last published) in a shared entry, so `get_stats()`
+(the `vprad_actions_stats` command and the staff-only `action/stats`
+endpoint) can aggregate all the processes sharing that cache. Processes
+not publishing for `CACHE_TIMEOUT` seconds drop from the list.
+
+`reset_stats()` forgets the published counters and records when it ran:
+the other processes drop their own counters on their next publish, the
+timings they recorded meanwhile are lost too.
+"""
+import math
+import threading
+import time
+import typing as t
+import uuid
+
+import attr
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_PREFIX = 'vprad_actions_stats'
+CACHE_PROCESSES_KEY = CACHE_PREFIX + ':processes'
+CACHE_RESET_KEY = CACHE_PREFIX + ':reset'
+CACHE_TIMEOUT = 24 * 3600
+# Buckets from 1µs, each 2^(1/8) times wider than the previous.
+BUCKET_MIN = 1e-6
+BUCKET_BASE = 2 ** (1 / 8)
+
+# What is timed:
+CALL = 'call'              # Action.call of an action.
+CHECK = 'check'            # All the conditions of an action.
+CONDITION = 'condition'    # One condition of an action.
+
+
+def _bucket(elapsed: float) -> int:
+    return max(0, math.ceil(math.log(max(elapsed, BUCKET_MIN) / BUCKET_MIN, BUCKET_BASE)))
+
+
+@attr.s(auto_attribs=True, slots=True)
+class TimingStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    # Count of timings by bucket (see `_bucket`).
+    buckets: t.Dict[int, int] = attr.Factory(dict)
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        bucket = _bucket(elapsed)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other: 'TimingStats'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(BUCKET_MIN * BUCKET_BASE ** bucket, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99)}
+
+
+_stats: t.Dict[t.Tuple[str, str], TimingStats] = {}
+_lock = threading.Lock()
+_last_publish = time.monotonic()
+# When `_stats` started counting (time.time()), to tell a later reset.
+_counting_since = time.time()
+# The cache key of the counters of this process.
+_process_key = f'{CACHE_PREFIX}:process:{uuid.uuid4().hex}'
+
+
+def stats_enabled() -> bool:
+    return getattr(settings, 'VPRAD_ACTIONS_STATS', False)
+
+
+def record(kind: str, name: str, elapsed: float):
+    global _last_publish
+    with _lock:
+        try:
+            _stats[(kind, name)].add(elapsed)
+        except KeyError:
+            _stats[(kind, name)] = TimingStats()
+            _stats[(kind, name)].add(elapsed)
+        publish = time.monotonic() - _last_publish > getattr(settings, 'VPRAD_ACTIONS_STATS_PUBLISH', 10)
+        if publish:
+            _last_publish = time.monotonic()
+    if publish:
+        publish_stats()
+
+
+def _snapshot() -> t.Dict[t.Tuple[str, str], TimingStats]:
+    with _lock:
+        return {key: TimingStats(s.count, s.total, s.max, dict(s.buckets))
+                for key, s in _stats.items()}
+
+
+def _live_processes() -> t.Dict[str, float]:
+    """ The cache keys of the processes that published lately, with when they did. """
+    oldest = time.time() - CACHE_TIMEOUT
+    return {key: published for key, published in (cache.get(CACHE_PROCESSES_KEY) or {}).items()
+            if published > oldest}
+
+
+def publish_stats():
+    """ Publish the counters of this process to the cache.
+
+    Drops them first if `reset_stats()` ran (in any process) since they started.
+    """
+    global _counting_since
+    reset = cache.get(CACHE_RESET_KEY)
+    if reset is not None and reset > _counting_since:
+        with _lock:
+            _stats.clear()
+            _counting_since = time.time()
+    cache.set(_process_key, _snapshot(), CACHE_TIMEOUT)
+    # Not atomic: a process lost by a concurrent publish is back on its next one.
+    processes = _live_processes()
+    processes[_process_key] = time.time()
+    cache.set(CACHE_PROCESSES_KEY, processes, CACHE_TIMEOUT)
+
+
+def reset_stats():
+    """ Forget the counters, of this process and the published ones.
+
+    The other processes drop theirs on their next publish.
+    """
+    global _counting_since
+    with _lock:
+        _stats.clear()
+        _counting_since = time.time()
+    cache.set(CACHE_RESET_KEY, _counting_since, CACHE_TIMEOUT)
+    cache.delete_many(list(_live_processes()) + [CACHE_PROCESSES_KEY])
+
+
+def get_stats() -> t.Dict[str, t.Dict[str, dict]]:
+    """ Return the counters of this and the published processes.
+
+    The result is {kind: {name: {'count', 'total', 'p50', 'p95', 'p99'}}},
+    times are in seconds.
+    """
+    merged = _snapshot()
+    keys = [key for key in _live_processes() if key != _process_key]
+    for published in cache.get_many(keys).values():
+        for stat_key, stats in published.items():
+            merged.setdefault(stat_key, TimingStats()).merge(stats)
+    result = {CALL: {}, CHECK: {}, CONDITION: {}}
+    for (kind, name), stats in sorted(merged.items(), key=lambda i: -i[1].total):
+        result.setdefault(kind, {})[name] = stats.as_dict()
+    return result
@@ -1,16 +1,23 @@
+import time
 import types
 import typing as t
 
 import attr
 from attr.validators import instance_of as attr_instance_of, optional as attr_optional
-from django.db import models
-from django.db.models import Field
+from django.db import connections, models, transaction
+from django.db.models import Field, Q
 from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
 from django.shortcuts import resolve_url
-from django.urls import reverse
+from django.utils import timezone
+from model_utils.fields import AutoLastModifiedField
 
-from vprad.actions.signals import action_pre, action_post
-from vprad.helpers import call_with_context
+from vprad.actions.cache import get_conditions_cache, clear_conditions_cache, conditions_cache_key
+from vprad.actions import stats
+from vprad.actions.signals import action_pre, action_post, transition_bulk_post
+from vprad.helpers import call_with_context, get_call_plan
+
+# Attribute of a condition callable holding its `Q` form (see `condition_q`).
+CONDITION_Q_ATTR = '_condition_q'
 
 
 @attr.s(auto_attribs=True, slots=True, frozen=True)
@@ -32,6 +39,14 @@ class Action:
     attached_field: t.Optional[Field] = attr.ib(validator=attr_optional(attr_instance_of((Field,
                                                                                           ForwardManyToOneDescriptor))),
                                                 default=None)
+    # For transitions, the values of `attached_field` they start from ('*' for any),
+    # and the value they lead to.
+    source: t.Union[t.FrozenSet, str, None] = attr.ib(repr=False, default=None)
+    target: t.Any = attr.ib(repr=False, default=None)
+    # Run from a background job instead of the request (see `vprad.actions.jobs`).
+    background: bool = attr.ib(validator=attr_instance_of(bool), repr=False, default=False)
+    # The function only saves the instance, so `call_bulk` can do a single UPDATE (transitions).
+    bulk_update: bool = attr.ib(validator=attr_instance_of(bool), repr=False, default=False)
 
     full_path: str = attr.ib(default=attr.Factory(
         lambda self: f"{self.function.__module__}.{self.function.__qualname__}",
@@ -41,36 +56,223 @@ class Action:
     def get_absolute_url(self, instance=None, next_url=None):
         if self.needs_instance and not instance:
             raise ValueError("Action %s (%s) needs an instance" % (self.full_name, self.full_path))
-        if instance:
-            return reverse(self.full_name, args=[instance.pk]) + (f"?next={next_url}" if next_url else '')
-        return reverse(self.full_name) + (f"?next={next_url}" if next_url else '')
+        from vprad.actions.urls import get_action_url
+        url = get_action_url(self, pk=instance.pk if instance else None)
+        return url + (f"?next={next_url}" if next_url else '')
+
+    def get_bulk_url(self, next_url=None):
+        if not self.needs_instance:
+            raise ValueError("Action %s (%s) does not take an instance" % (self.full_name, self.full_path))
+        from vprad.actions.urls import get_action_url
+        return get_action_url(self, bulk=True) + (f"?next={next_url}" if next_url else '')
 
     def check_conditions(self, cls=None, instance=None, **kwargs):
         if instance and not self.needs_instance:
             return False
         elif self.needs_instance and not instance:
             return False
+        cache = get_conditions_cache()
+        key = conditions_cache_key(self, cls, instance, kwargs) if cache is not None else None
+        if key is None:
+            return self._check(self.conditions, cls, instance, kwargs)
+        if key not in cache:
+            cache[key] = self._check(self.conditions, cls, instance, kwargs)
+        return cache[key]
+
+    def check_python_conditions(self, cls=None, instance=None, **kwargs):
+        """ Like `check_conditions` skipping those that have a `Q` form.
+
+        Used along `get_conditions_q` when the `Q` form is checked
+        on the database for many instances at once.
+        """
+        if instance and not self.needs_instance:
+            return False
+        elif self.needs_instance and not instance:
+            return False
+        conditions = (c for c in self.conditions if not hasattr(c, CONDITION_Q_ATTR))
+        return self._check(conditions, cls, instance, kwargs)
+
+    def get_conditions_q(self, **kwargs) -> t.Optional[Q]:
+        """ Return the `Q` object for the conditions that declare one.
+
+        Returns `None` if no condition has a `Q` form.
+        """
+        ctx = {'action': self,
+               'cls': self.cls}
+        ctx.update(kwargs)
+        q = None
+        for c in self.conditions:
+            if hasattr(c, CONDITION_Q_ATTR):
+                cq = call_with_context(getattr(c, CONDITION_Q_ATTR), **ctx)
+                q = cq if q is None else q & cq
+        return q
+
+    def _check(self, conditions, cls, instance, kwargs):
         ctx = {'action': self,
                'cls': cls,
                'instance': instance,
                'self': instance}
         ctx.update(kwargs)
-        for c in self.conditions:
-            if not call_with_context(c, **ctx):
-                return False
-        return True
+        if not stats.stats_enabled():
+            for c in conditions:
+                if not call_with_context(c, **ctx):
+                    return False
+            return True
+        started = time.perf_counter()
+        try:
+            for c in conditions:
+                c_started = time.perf_counter()
+                try:
+                    holds = call_with_context(c, **ctx)
+                finally:
+                    stats.record(stats.CONDITION,
+                                 f"{self.full_name}:{get_call_plan(c).qualname}",
+                                 time.perf_counter() - c_started)
+                if not holds:
+                    return False
+            return True
+        finally:
+            stats.record(stats.CHECK, self.full_name, time.perf_counter() - started)
 
     def call(self, **kwargs):
+        # The conditions checked before, or during, the call may not hold after it.
+        clear_conditions_cache()
+        try:
+            return self._call(**kwargs)
+        finally:
+            clear_conditions_cache()
+
+    def _call(self, **kwargs):
         action_pre.send(self, **kwargs)
         if 'action' not in kwargs:
             kwargs['action'] = self
         if self.cls and 'cls' not in kwargs:
             kwargs['cls'] = self.cls
-        retval = call_with_context(self.function, **kwargs)
+        started = time.perf_counter() if stats.stats_enabled() else None
+        try:
+            retval = call_with_context(self.function, **kwargs)
+        finally:
+            if started is not None:
+                stats.record(stats.CALL, self.full_name, time.perf_counter() - started)
         kwargs.pop('action')  # don't send it with the signal.
         action_post.send(self, **kwargs)
         return retval
 
+    def call_bulk(self, queryset: models.QuerySet, request_user=None, **kwargs) -> t.List:
+        """ Call the action on every instance of `queryset` for which it is available.
+
+        Returns the pks of the instances the action was called on.
+        Transitions with `bulk_update` whose conditions all have a `Q` form
+        run as one `UPDATE` without calling the function nor sending the
+        per instance signals. Transitions send `transition_bulk_post` once.
+        """
+        if not self.needs_instance:
+            raise ValueError("Action %s (%s) does not take an instance" % (self.full_name, self.full_path))
+        clear_conditions_cache()
+        try:
+            return self._call_bulk(queryset, request_user, **kwargs)
+        finally:
+            clear_conditions_cache()
+
+    def _call_bulk(self, queryset, request_user, **kwargs):
+        field = self.attached_field
+        is_transition = self.source is not None
+        if self.bulk_update and is_transition and all(hasattr(c, CONDITION_Q_ATTR) for c in self.conditions):
+            q = self.get_conditions_q(request_user=request_user)
+            with transaction.atomic(using=queryset.db):
+                rows = self.cls._base_manager.using(queryset.db).filter(pk__in=queryset.values('pk'))
+                rows = rows.filter(q) if q else rows
+                # Lock the rows, no other transition moves them until the UPDATE.
+                lock_of = ('self', ) if connections[rows.db].features.has_select_for_update_of else ()
+                old_values = dict(rows.select_for_update(of=lock_of).values_list('pk', field.attname))
+                updates = {field.attname: self.target}
+                for f in self.cls._meta.concrete_fields:
+                    if isinstance(f, AutoLastModifiedField) or getattr(f, 'auto_now', False):
+                        updates[f.attname] = timezone.now()
+                # The conditions (and source) are checked again by the UPDATE itself.
+                updated = rows.filter(pk__in=old_values.keys()).update(**updates)
+                if updated != len(old_values):
+                    # Without row locks, some rows left the source meanwhile.
+                    moved = set(self.cls._base_manager.using(rows.db).filter(pk__in=old_values.keys())
+                                .exclude(**{field.attname: self.target}).values_list('pk', flat=True))
+                    old_values = {pk: value for pk, value in old_values.items() if pk not in moved}
+        else:
+            old_values = {}
+            with transaction.atomic(using=queryset.db):
+                for instance in queryset.iterator():
+                    if not self.check_conditions(instance=instance, request_user=request_user):
+                        continue
+                    if is_transition:
+                        old_values[instance.pk] = field.value_from_object(instance)
+                    else:
+                        old_values[instance.pk] = None
+                    self.call(instance=instance, request_user=request_user, **kwargs)
+        pks = list(old_values.keys())
+        if is_transition:
+            transition_bulk_post.send(self, pks=pks, old_values=old_values, new_value=self.target)
+        return pks
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class TransitionTable:
+    """ The transitions of a model field, by source value.
+
+    Built by `VActionsRegistry.get_transition_table`.
+    """
+    model: t.Type[models.Model]
+    field: Field
+    # Transitions leaving each value (including those from any value).
+    by_source: t.Dict[t.Any, t.Tuple[Action, ...]]
+    # Transitions with `source='*'`.
+    from_any: t.Tuple[Action, ...]
+
+    @classmethod
+    def from_actions(cls, model, field, actions: t.Iterable[Action]) -> 'TransitionTable':
+        actions = tuple(actions)
+        from_any = tuple(act for act in actions if act.source == '*')
+        values = set()
+        for act in actions:
+            if act.source != '*':
+                values.update(act.source)
+        # Keep the order of the field choices, for a stable graph.
+        order = {value: i for i, (value, _label) in enumerate(field.flatchoices)}
+        values = sorted(values, key=lambda v: order.get(v, len(order)))
+        by_source = {value: tuple(act for act in actions if act.source == '*' or value in act.source)
+                     for value in values}
+        return cls(model=model, field=field, by_source=by_source, from_any=from_any)
+
+    def get_transitions(self, value) -> t.Tuple[Action, ...]:
+        """ Return the transitions leaving `value`, ignoring their other conditions. """
+        return self.by_source.get(value, self.from_any)
+
+    def _value_label(self, value):
+        if value == '*':
+            return '*'
+        return str(dict(self.field.flatchoices).get(value, value))
+
+    def as_dict(self) -> t.Dict[t.Any, t.Dict[str, t.Any]]:
+        """ Return the graph as {source: {action name: target}}.
+
+        Transitions from any value are under the '*' source.
+        """
+        graph = {value: {act.name: act.target for act in acts if act.source != '*'}
+                 for value, acts in self.by_source.items()}
+        if self.from_any:
+            graph['*'] = {act.name: act.target for act in self.from_any}
+        return graph
+
+    def as_dot(self) -> str:
+        """ Return the graph in the Graphviz DOT language. """
+        # noinspection PyProtectedMember
+        lines = ['digraph "%s.%s" {' % (self.model._meta.label, self.field.name)]
+        for source, edges in self.as_dict().items():
+            for name, target in edges.items():
+                lines.append('    "%s" -> "%s" [label="%s"];' % (self._value_label(source),
+                                                              self._value_label(target),
+                                                              name))
+        lines.append('}')
+        return '\n'.join(lines)
+
 
 def default_full_name(name, func, cls):
     """ Create a default full_name for the function `func`. """
@@ -1,27 +1,117 @@
-from django.urls import path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.urls import path, reverse, get_script_prefix
+from django.urls import clear_url_caches as django_clear_url_caches
+from django.utils.encoding import iri_to_uri
 
 from vprad.actions import actions_registry
-from vprad.actions.views import ActionView
+from vprad.actions.views import ActionView, ActionJobView, BulkActionView, action_stats_view, action_dispatch_view
 
 from vprad.helpers import LazyClosureSequence
 
+# Stand-ins reversed once to build the url templates of `get_action_url`.
+_NAME = 'ACTION-NAME'
+_PK = 'ACTION-PK'
+# Url templates (without the script prefix) by (bulk, with_pk).
+_url_templates = {}
+
+
+def dispatcher_enabled():
+    return getattr(settings, 'VPRAD_ACTIONS_DISPATCHER', False)
+
 
 def get_urls():
     """ Return urlpatters for the actions registered.
         action/<action_name>
         action/<action_name>/<pk>
+        action/<action_name>/bulk (for actions needing an instance)
+    And the status page of background jobs and the timing stats:
+        action/job/<pk>
+        action/stats
+    (the registry rejects actions named `job` or `stats`).
+
+    With `settings.VPRAD_ACTIONS_DISPATCHER` the same urls are served by
+    three routes only, finding the action by name (see `action_dispatch_view`).
     """
-    urlpatterns = []
+    urlpatterns = [
+        path('job/<int:pk>', ActionJobView.as_view(), name='vprad_actions_job'),
+        path('stats', action_stats_view, name='vprad_actions_stats'),
+    ]
+    if dispatcher_enabled():
+        urlpatterns += [
+            path('<str:action_name>/bulk', action_dispatch_view,
+                 {'bulk': True}, name='vprad_action_bulk'),
+            path('<str:action_name>/<str:pk>', action_dispatch_view, name='vprad_action_pk'),
+            path('<str:action_name>', action_dispatch_view, name='vprad_action'),
+        ]
+        return urlpatterns
     for act in actions_registry.by_name.values():
-        urlpath = act.full_name
-        if act.needs_instance:
-            urlpath += "/<str:pk>"
-        urlpatterns.append(
-            path(urlpath,
-                 ActionView.as_view(action=act),
-                 name=act.full_name)
-        )
+        urlpatterns += _get_action_paths(act)
     return urlpatterns
 
 
+def _get_action_paths(act):
+    paths = []
+    urlpath = act.full_name
+    if act.needs_instance:
+        paths.append(
+            path(urlpath + "/bulk",
+                 BulkActionView.as_view(action=act),
+                 name=act.full_name + "_bulk")
+        )
+        urlpath += "/<str:pk>"
+    paths.append(
+        path(urlpath,
+             ActionView.as_view(action=act),
+             name=act.full_name)
+    )
+    return paths
+
+
+def _on_action_registered(full_name, act, replaced):
+    """ Append the urls of a new action, without rebuilding the others. """
+    if replaced:
+        urlpatterns.reset_cache()
+    elif not dispatcher_enabled():
+        urlpatterns.append(*_get_action_paths(act))
+    else:
+        return
+    django_clear_url_caches()
+
+
+def _get_url_template(bulk, with_pk):
+    key = (bulk, with_pk)
+    if key not in _url_templates:
+        if bulk:
+            url = reverse('vprad_action_bulk', kwargs={'action_name': _NAME})
+        elif with_pk:
+            url = reverse('vprad_action_pk', kwargs={'action_name': _NAME, 'pk': _PK})
+        else:
+            url = reverse('vprad_action', kwargs={'action_name': _NAME})
+        _url_templates[key] = url[len(get_script_prefix()):]
+    return _url_templates[key]
+
+
+def get_action_url(act, pk=None, bulk=False):
+    """ Return the url of `act` (of its bulk view if `bulk`).
+
+    With the dispatcher the url is built from a template, without walking
+    the urlpatterns as `reverse()` does.
+    """
+    if not dispatcher_enabled():
+        if bulk:
+            return reverse(act.full_name + '_bulk')
+        return reverse(act.full_name, args=[pk] if pk is not None else [])
+    url = _get_url_template(bulk, pk is not None).replace(_NAME, quote(act.full_name))
+    if pk is not None:
+        url = url.replace(_PK, quote(str(pk)))
+    return get_script_prefix() + iri_to_uri(url)
+
+
+def clear_url_templates():
+    _url_templates.clear()
+
+
 urlpatterns = LazyClosureSequence(get_urls)
+actions_registry.by_name.subscribe(_on_action_registered)
@@ -1,4 +1,3 @@
-import inspect
 import traceback
 from collections import OrderedDict
 from typing import Type, Dict
@@ -7,18 +6,23 @@ import attr
 from attr.validators import instance_of as attr_instance_of, optional as attr_optional
 from braces.views import SetHeadlineMixin
 from django import forms
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
 from django.db import models
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, JsonResponse, Http404
 from django.shortcuts import redirect
 from django.urls import path
 from django.utils.decorators import classonlymethod
-from django.views.generic import TemplateView
+from django.utils.translation import gettext as _, ngettext
+from django.views.generic import TemplateView, DetailView
 from django.views.generic.detail import SingleObjectMixin
 
-from . import actions_registry
-from .forms import AnnotationFormFactory
+from . import actions_registry, stats
+from .jobs import enqueue_action
+from .models import ActionJob
 from .types import Action
-from ..helpers import get_url_for
+from ..helpers import get_url_for, get_call_plan
+from ..views.object_cache import CachedObjectMixin
 
 
 @attr.s(auto_attribs=True)
@@ -33,28 +37,53 @@ class ActionViewHelper:
         return self.action.verbose_name
 
     def __attrs_post_init__(self):
-        factory = AnnotationFormFactory(name=self.action.name,
-                                        verbose_name=self.action.verbose_name,
-                                        instance=self.object,
-                                        method=self.action.function,
-                                        model=self.action.cls)
+        factory = actions_registry.get_form_factory(self.action)
         self.action_form = factory.form_class
         self.form_classes = factory.get_form_classes()
 
-    def trigger_action(self, request, request_forms: Dict[str, forms.Form]):
-        data = {'request_user': request.user,
+    def get_form_kwargs(self, name, form_class, data=None, files=None):
+        """Return the keyword arguments for instantiating the form `name`."""
+        kwargs = {'prefix': name}
+        init_names = get_call_plan(form_class.__init__).names
+        if 'instance' in init_names:
+            kwargs['instance'] = self.object
+        if 'target_object' in init_names:
+            kwargs['target_object'] = self.object
+        if data is not None:
+            kwargs.update({
+                'data': data,
+                'files': files,
+            })
+            if issubclass(form_class, forms.ModelForm):
+                kwargs['instance'] = self.object
+        return kwargs
+
+    def bind_forms(self, data, files=None) -> Dict[str, forms.Form]:
+        """ Return the forms of the action bound to `data`. """
+        bound = OrderedDict()
+        for name, form_class in self.form_classes.items():
+            bound[name] = form_class(**self.get_form_kwargs(name, form_class, data, files))
+        return bound
+
+    def get_call_kwargs(self, request_user, request_forms: Dict[str, forms.Form]):
+        """ Return the keyword arguments to call the action with `request_forms`. """
+        data = {'request_user': request_user,
                 'instance': self.object}
         for name, form in request_forms.items():
             if name == '_method':
                 data.update(form.cleaned_data)
             else:
                 data[name] = form
-        return self.action.call(**data)
+        return data
+
+    def call_with_forms(self, request_user, request_forms: Dict[str, forms.Form]):
+        return self.action.call(**self.get_call_kwargs(request_user, request_forms))
+
+    def trigger_action(self, request, request_forms: Dict[str, forms.Form]):
+        return self.call_with_forms(request.user, request_forms)
 
 
-#@register_view(name='action', urlpaths=["action/<str:action_name>",
-#                                        "action/<str:action_name>/<str:pk>"])
-class ActionView(SetHeadlineMixin, SingleObjectMixin, TemplateView):
+class ActionView(SetHeadlineMixin, CachedObjectMixin, SingleObjectMixin, TemplateView):
     template_name = 'vprad/actions/action.jinja.html'
     helper: ActionViewHelper = None
     object: models.Model = None
@@ -93,23 +122,11 @@ class ActionView(SetHeadlineMixin, SingleObjectMixin, TemplateView):
 
     def get_form_kwargs(self, name, form_class):
         """Return the keyword arguments for instantiating the form."""
-        kwargs = {
-            'prefix': name,
-            'initial': self.get_initial(name)
-        }
-        sig = inspect.signature(form_class.__init__)
-        if 'instance' in sig.parameters:
-            kwargs['instance'] = self.object
-        if 'target_object' in sig.parameters:
-            kwargs['target_object'] = self.object
-
+        data = files = None
         if self.request.method in ('POST', 'PUT'):
-            kwargs.update({
-                'data': self.request.POST,
-                'files': self.request.FILES,
-            })
-            if issubclass(form_class, forms.ModelForm):
-                kwargs['instance'] = self.object
+            data, files = self.request.POST, self.request.FILES
+        kwargs = self.helper.get_form_kwargs(name, form_class, data, files)
+        kwargs['initial'] = self.get_initial(name)
         return kwargs
 
     def init_forms(self):
@@ -144,6 +161,9 @@ class ActionView(SetHeadlineMixin, SingleObjectMixin, TemplateView):
         return self.render_to_response(self.get_context_data())
 
     def forms_valid(self):
+        if self.action.background and not self.request.FILES:
+            job = enqueue_action(self.action, self.object, self.request.user, self.request.POST)
+            return job.get_absolute_url()
         res = self.helper.trigger_action(self.request, self.forms)
         return get_url_for(res)
 
@@ -152,3 +172,108 @@ class ActionView(SetHeadlineMixin, SingleObjectMixin, TemplateView):
             return self.request.GET['next']
         return get_url_for(self.object) or 'home'
 
+
+
+class BulkActionView(ActionView):
+    """ Call an instance action on many objects.
+
+    The objects are given by their pk in the querystring (`?pk=1&pk=2`),
+    see `Action.call_bulk`.
+    """
+    objects: models.QuerySet = None
+
+    def dispatch(self, request, *args, **kwargs):
+        self.objects = self.action.cls._default_manager.filter(pk__in=request.GET.getlist('pk'))
+        self.helper = ActionViewHelper(self.action, None)
+        self.init_forms()
+        # Skip ActionView.dispatch, conditions are checked for each object.
+        return super(ActionView, self).dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        count = self.objects.count()
+        context['object'] = ngettext('%(count)d selected object',
+                                     '%(count)d selected objects', count) % {'count': count}
+        return context
+
+    def forms_valid(self):
+        if self.action.background and not self.request.FILES:
+            job = enqueue_action(self.action, None, self.request.user, self.request.POST,
+                                 pks=self.objects.values_list('pk', flat=True))
+            return job.get_absolute_url()
+        data = self.helper.get_call_kwargs(self.request.user, self.forms)
+        data.pop('instance')
+        pks = self.action.call_bulk(self.objects, **data)
+        messages.info(self.request,
+                      _('%(action)s: done on %(count)d objects.') % {'action': self.action.verbose_name,
+                                                                     'count': len(pks)})
+        return None
+
+    def get_next(self):
+        if 'next' in self.request.GET:
+            return self.request.GET['next']
+        return 'home'
+
+
+class ActionJobView(SetHeadlineMixin, DetailView):
+    """ Status of a background action job.
+
+    The page polls itself with intercooler until the job finishes.
+    """
+    model = ActionJob
+    template_name = 'vprad/actions/job.jinja.html'
+    fragment_template_name = 'vprad/actions/job_status.jinja.html'
+
+    def get_headline(self):
+        return str(self.object)
+
+    def get_object(self, queryset=None):
+        job = super().get_object(queryset)
+        user = self.request.user
+        if job.user_id != user.pk and not user.is_staff:
+            raise PermissionDenied("Not your job")
+        return job
+
+    def get_template_names(self):
+        if self.request.META.get('HTTP_X_IC_REQUEST'):
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        kwargs['action'] = actions_registry.by_name.get(self.object.action_name, None)
+        return super().get_context_data(**kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.object.is_finished:
+            response['X-IC-CancelPolling'] = 'true'
+        return response
+
+
+# Views of `action_dispatch_view` by (action full_name, bulk).
+_dispatch_views = {}
+
+
+def action_dispatch_view(request, action_name, pk=None, bulk=False):
+    """ Serve every action from a single route (`VPRAD_ACTIONS_DISPATCHER`).
+
+    The action is found by name in the registry, and the view built
+    for it is kept for the next requests.
+    """
+    act = actions_registry.by_name.get(action_name, None)
+    if act is None or (pk is not None or bulk) != act.needs_instance:
+        raise Http404("No such action")
+    view = _dispatch_views.get((action_name, bulk), None)
+    if view is None or view.view_initkwargs['action'] is not act:
+        view_class = BulkActionView if bulk else ActionView
+        view = _dispatch_views[(action_name, bulk)] = view_class.as_view(action=act)
+    if pk is not None:
+        return view(request, pk=pk)
+    return view(request)
+
+
+def action_stats_view(request):
+    """ Staff only JSON with the timings of actions and conditions. """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Staff only")
+    return JsonResponse(stats.get_stats())
@@ -31,6 +31,7 @@ THIRD_PARTY_APPS = [
 VRAD_APPS = [
     'vprad.actions',
     'vprad.views',
+    'vprad.search',
     'vprad.site',
     'vprad'
 ]
@@ -46,10 +47,12 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'vprad.auth.AuthMiddleware',
+    'vprad.actions.middleware.ConditionsCacheMiddleware',
 ]
 
 if DEBUG:
-    MIDDLEWARE.insert(-1, 'debug_toolbar.middleware.DebugToolbarMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('vprad.auth.AuthMiddleware'),
+                      'debug_toolbar.middleware.DebugToolbarMiddleware')
 
 TEMPLATES = [
     {
@@ -75,6 +78,52 @@ DATABASES = {
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
 DJANGO_TABLES2_TEMPLATE = 'django_tables2/semantic.html'
+# Warn when vprad.helpers.call_with_context gets values not matching
+# the type annotations of the parameters (disable in production).
+VPRAD_CHECK_CALL_ANNOTATIONS = env.bool('VPRAD_CHECK_CALL_ANNOTATIONS',
+                                        default=True)
+# How background action jobs run: 'thread' for a local thread pool,
+# None to leave them for the `vprad_actions_worker` command.
+VPRAD_ACTIONS_JOB_RUNNER = env('VPRAD_ACTIONS_JOB_RUNNER', default='thread')
+VPRAD_ACTIONS_JOB_THREADS = env.int('VPRAD_ACTIONS_JOB_THREADS', default=2)
+# Seconds after which a running job is taken for lost and failed.
+VPRAD_ACTIONS_JOB_TIMEOUT = env.int('VPRAD_ACTIONS_JOB_TIMEOUT', default=3600)
+# Time actions and conditions (see vprad.actions.stats), and how often (seconds)
+# each process publishes its counters to the cache.
+VPRAD_ACTIONS_STATS = env.bool('VPRAD_ACTIONS_STATS', default=False)
+VPRAD_ACTIONS_STATS_PUBLISH = env.int('VPRAD_ACTIONS_STATS_PUBLISH', default=10)
+# Serve all the actions from a single route instead of one per action
+# (see vprad.actions.urls).
+VPRAD_ACTIONS_DISPATCHER = env.bool('VPRAD_ACTIONS_DISPATCHER', default=False)
+# Resolve the model views urls with a dict lookup (see vprad.views.resolvers).
+VPRAD_VIEWS_DICT_RESOLVER = env.bool('VPRAD_VIEWS_DICT_RESOLVER', default=False)
+# Keep a full-text index of the models with search fields, used by their
+# autocomplete widgets, the `q` list filter and the global search (see
+# vprad.search). Supported on SQLite (FTS5) and PostgreSQL.
+VPRAD_SEARCH_INDEX = env.bool('VPRAD_SEARCH_INDEX', default=False)
+# The autocomplete of the pickers (see vprad.search.autocomplete): used by
+# the widgets, results returned, rows cached per term (to narrow the longer
+# terms from), seconds they are cached and ms without typing before asking.
+VPRAD_AUTOCOMPLETE = env.bool('VPRAD_AUTOCOMPLETE', default=False)
+VPRAD_AUTOCOMPLETE_LIMIT = env.int('VPRAD_AUTOCOMPLETE_LIMIT', default=20)
+VPRAD_AUTOCOMPLETE_FETCH = env.int('VPRAD_AUTOCOMPLETE_FETCH', default=200)
+VPRAD_AUTOCOMPLETE_TIMEOUT = env.int('VPRAD_AUTOCOMPLETE_TIMEOUT', default=60)
+VPRAD_AUTOCOMPLETE_DELAY = env.int('VPRAD_AUTOCOMPLETE_DELAY', default=250)
+# Seconds the scopes in the urls of the widgets are accepted for.
+VPRAD_AUTOCOMPLETE_SCOPE_MAX_AGE = env.int('VPRAD_AUTOCOMPLETE_SCOPE_MAX_AGE', default=86400)
+# Share the objects of the detail, embed and action views through the
+# cache, for that many seconds (see vprad.views.object_cache). Needs a
+# cache shared by the processes, they are only forgotten where changed.
+VPRAD_OBJECT_CACHE = env.bool('VPRAD_OBJECT_CACHE', default=False)
+VPRAD_OBJECT_CACHE_TIMEOUT = env.int('VPRAD_OBJECT_CACHE_TIMEOUT', default=300)
+# Cache the `{% cache %}` fragments of the templates (embedded lists, detail
+# fields) for that many seconds (see vprad.site.jinja.cache).
+VPRAD_FRAGMENT_CACHE = env.bool('VPRAD_FRAGMENT_CACHE', default=False)
+VPRAD_FRAGMENT_CACHE_TIMEOUT = env.int('VPRAD_FRAGMENT_CACHE_TIMEOUT', default=600)
+# Answer 304 Not Modified to the detail and embed views when the object, its
+# embedded rows and the available actions are unchanged (see
+# vprad.views.generic.conditional).
+VPRAD_CONDITIONAL_GET = env.bool('VPRAD_CONDITIONAL_GET', default=False)
 STATIC_URL = '/static/'
 
 
@@ -1,17 +1,20 @@
 import copy
 import inspect
 import logging
+import threading
 import typing as t
 import types
+import weakref
 from functools import partial
 from importlib import import_module
 from os.path import relpath
-from typing import Sequence
+from typing import Sequence, Mapping
 
+import attr
 from django.apps import AppConfig
 from django.core.exceptions import FieldDoesNotExist
 from django.db import models
-from django.urls import reverse, NoReverseMatch, clear_url_caches as _clear_url_caches
+from django.urls import NoReverseMatch, clear_url_caches as _clear_url_caches
 from django.utils.module_loading import module_has_submodule
 
 from vprad.views.helpers import get_model_url_name
@@ -23,9 +26,10 @@ def get_url_for(what=None):
     if hasattr(what, 'get_absolute_url'):
         return what.get_absolute_url()
     if isinstance(what, models.Model):
+        from vprad.views.urls import reverse_model_view
         url_name = get_model_url_name(what.__class__, 'detail')
         try:
-            return reverse(url_name, args=[what.pk, ])
+            return reverse_model_view(url_name, what.pk)
         except NoReverseMatch:
             pass
     return None
@@ -58,32 +62,111 @@ def log_with_caller(logger: logging.Logger,
 log_warning = partial(log_with_caller, helpers_logger, logging.WARNING)
 
 
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class CallPlan:
+    """ What `call_with_context` needs to know about a callable.
+
+    Computed once per callable by `get_call_plan`.
+    """
+    qualname: str
+    # Names of the parameters accepted by keyword, in signature order.
+    names: t.Tuple[str, ...]
+    required: t.FrozenSet[str]
+    defaults: t.Dict[str, t.Any]
+    # Parameter annotations usable with isinstance().
+    annotations: t.Dict[str, type]
+    accepts_kwargs: bool
+
+
+_call_plans = weakref.WeakKeyDictionary()
+# Plans of bound methods, by their function: the same for all the instances.
+_method_plans = weakref.WeakKeyDictionary()
+
+
+def _make_call_plan(func: t.Callable) -> CallPlan:
+    params = inspect.signature(func, follow_wrapped=False).parameters
+    names = tuple()
+    required = set()
+    defaults = {}
+    annotations = {}
+    accepts_kwargs = False
+    for name, param in params.items():
+        if param.kind == param.VAR_KEYWORD:
+            accepts_kwargs = True
+            continue
+        elif param.kind in (param.VAR_POSITIONAL, param.POSITIONAL_ONLY):
+            continue
+        names += (name, )
+        if param.default == inspect.Parameter.empty:
+            required.add(name)
+        else:
+            defaults[name] = param.default
+        if isinstance(param.annotation, type) and param.annotation != inspect.Parameter.empty:
+            annotations[name] = param.annotation
+    # functools.partial and callable objects have no names of their own.
+    module = getattr(func, '__module__', type(func).__module__)
+    qualname = getattr(func, '__qualname__', type(func).__qualname__)
+    return CallPlan(qualname=f"{module}.{qualname}",
+                    names=names,
+                    required=frozenset(required),
+                    defaults=defaults,
+                    annotations=annotations,
+                    accepts_kwargs=accepts_kwargs)
+
+
+def get_call_plan(func: t.Callable) -> CallPlan:
+    """ Return the (cached) `CallPlan` of `func`.
+
+    Plans are cached by weak reference to the callable (bound methods by
+    their function), so lambdas and partials made per call are cached too,
+    until they are collected. Callables that can't be weakly referenced
+    get a new plan each time.
+    """
+    plans = _call_plans
+    if inspect.ismethod(func):
+        plans, key = _method_plans, func.__func__
+    else:
+        key = func
+    try:
+        return plans[key]
+    except KeyError:
+        plan = plans[key] = _make_call_plan(func)
+        return plan
+    except TypeError:
+        # Not weak referenceable (or not hashable), don't cache.
+        return _make_call_plan(func)
+
+
 def call_with_context(func: t.Callable,
                       **kwargs):
     """ Helper for calling functions with unkown *args/**kwargs.
 
-    This function will use inspect.signature to see what parameters
-    `func` takes and call it with those parameters taken from `kwargs`.
+    This function will use the `CallPlan` of `func` to see what parameters
+    it takes and call it with those parameters taken from `kwargs`.
+
+    Unless `settings.VPRAD_CHECK_CALL_ANNOTATIONS` is False, a warning is
+    logged for values not matching the type annotation of their parameter.
     """
-    params = inspect.signature(func, follow_wrapped=False).parameters
+    from django.conf import settings
+
+    plan = get_call_plan(func)
+    check_annotations = getattr(settings, 'VPRAD_CHECK_CALL_ANNOTATIONS', True)
     funckw = {}
-    for name, param in params.items():
-        if name in ['args', 'kwargs']:
-            continue
-        if name not in kwargs and param.default == inspect.Parameter.empty:
-            raise TypeError("Missing '%s' parameter to call '%s'" % (
-                name,
-                f"{func.__module__}.{func.__qualname__}",
-            ))
+    for name in plan.names:
         if name in kwargs:
             value = kwargs.pop(name)
-            if param.annotation and param.annotation != inspect.Parameter.empty:
-                if not isinstance(value, param.annotation):
+            if check_annotations and name in plan.annotations:
+                if not isinstance(value, plan.annotations[name]):
                     log_warning(2, "'%s' expects '%s' to be of type '%s' not '%s'",
-                                f"{func.__module__}.{func.__qualname__}",
-                                name, param.annotation, type(value))
+                                plan.qualname,
+                                name, plan.annotations[name], type(value))
             funckw[name] = value
-    if 'kwargs' in params.keys():
+        elif name in plan.required:
+            raise TypeError("Missing '%s' parameter to call '%s'" % (
+                name,
+                plan.qualname,
+            ))
+    if plan.accepts_kwargs:
         funckw.update(kwargs)
     return func(**funckw)
 
@@ -119,22 +202,36 @@ class LazyClosureSequence(Sequence):
     """ Sequence that gets items from a callable.
 
     The callable is called on first item access, and its cache
-    can be reset with `self`.`reset_cache()`
+    can be reset with `self`.`reset_cache()`, or extended with
+    `self`.`append()` without calling it again.
+    The items are kept as a tuple that is swapped whole, so readers
+    in other threads always see a complete list.
     This is mainly used in URLconf's so they can be changed dynamically during testing.
     """
     _cached = None
 
     def __init__(self, get_items):
         self._get_items = get_items
+        self._lock = threading.RLock()
 
     def reset_cache(self):
         self._cached = None
 
+    def append(self, *items):
+        """ Add items to the cached ones (if not cached, the callable returns them). """
+        with self._lock:
+            if self._cached is not None:
+                self._cached = self._cached + tuple(items)
+
     @property
     def _values(self):
-        if not self._cached:
-            self._cached = self._get_items()
-        return self._cached
+        values = self._cached
+        if values is None:
+            with self._lock:
+                values = self._cached
+                if values is None:
+                    values = self._cached = tuple(self._get_items())
+        return values
 
     def __getitem__(self, i):
         return self._values[i]
@@ -146,11 +243,82 @@ class LazyClosureSequence(Sequence):
         return repr(self._values)
 
 
+class SnapshotRegistry(Mapping):
+    """ Registry dict that is never changed in place.
+
+    Each change swaps in a new read-only copy (see `snapshot()`) and
+    bumps `version`, so readers, in any thread, iterate a consistent
+    snapshot. Changes are serialized by a lock, and notified to the
+    `subscribe`d listeners as `listener(key, value, replaced)`, with
+    `key=None` when the registry is cleared.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshot = types.MappingProxyType({})
+        self._listeners = []
+        self.version = 0
+
+    def snapshot(self) -> t.Mapping:
+        return self._snapshot
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def __getitem__(self, key):
+        return self._snapshot[key]
+
+    def __iter__(self):
+        return iter(self._snapshot)
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __contains__(self, key):
+        return key in self._snapshot
+
+    def get(self, key, default=None):
+        return self._snapshot.get(key, default)
+
+    def keys(self):
+        return self._snapshot.keys()
+
+    def values(self):
+        return self._snapshot.values()
+
+    def items(self):
+        return self._snapshot.items()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self._snapshot)!r})"
+
+    def _swap(self, items):
+        self._snapshot = types.MappingProxyType(items)
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            replaced = key in self._snapshot
+            items = dict(self._snapshot)
+            items[key] = value
+            self._swap(items)
+            for listener in self._listeners:
+                listener(key, value, replaced)
+
+    def clear(self):
+        with self._lock:
+            self._swap({})
+            for listener in self._listeners:
+                listener(None, None, True)
+
+
 def clear_url_caches():
     from vprad.actions import urls as actions_urls
     from vprad.views import urls as views_urls
     actions_urls.urlpatterns.reset_cache()
+    actions_urls.clear_url_templates()
     views_urls.urlpatterns.reset_cache()
+    views_urls.clear_url_templates()
     _clear_url_caches()
 
 
@@ -1,3 +1,7 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
 from django_select2 import forms as ds2
 
 
@@ -11,6 +15,53 @@ class SearchFieldsMixin:
         raise NotImplementedError()
 
 
+class SearchSelect2Mixin:
+    """ Filter the choices with `vprad.search.search`, so with the search
+    index when it is enabled.
+
+    While `settings.VPRAD_AUTOCOMPLETE` is True, the choices of models
+    with search fields are fetched from the cached `vprad_autocomplete`
+    endpoint (see vprad.search.autocomplete), after `VPRAD_AUTOCOMPLETE_DELAY`
+    ms without typing.
+    """
+
+    def get_url(self):
+        from vprad.search.autocomplete import get_scope
+        from vprad.search.index import get_search_fields
+        queryset = self.get_queryset()
+        if not getattr(settings, 'VPRAD_AUTOCOMPLETE', False) or not get_search_fields(queryset.model):
+            return super().get_url()
+        scope = get_scope(queryset)
+        if scope is None:
+            return super().get_url()
+        opts = queryset.model._meta
+        url = reverse('vprad_autocomplete', kwargs={'app_label': opts.app_label,
+                                                    'model_name': opts.model_name})
+        return url + '?' + urlencode({'scope': scope})
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.setdefault('data-ajax--delay', getattr(settings, 'VPRAD_AUTOCOMPLETE_DELAY', 250))
+        return attrs
+
+    def filter_queryset(self, request, term, queryset=None, **dependent_fields):
+        from vprad.search.index import search
+        if queryset is None:
+            queryset = self.get_queryset()
+        queryset = search(queryset, term)
+        if dependent_fields:
+            queryset = queryset.filter(**dependent_fields)
+        return queryset
+
+
+class SearchSelect2Widget(SearchSelect2Mixin, ds2.ModelSelect2Widget):
+    pass
+
+
+class SearchSelect2MultipleWidget(SearchSelect2Mixin, ds2.ModelSelect2MultipleWidget):
+    pass
+
+
 # noinspection PyMethodMayBeStatic
 class AutocompleteMixin(SearchFieldsMixin):
     """ Simple mixin to automatically setup autocomplete widgets.
@@ -23,7 +74,7 @@ class AutocompleteMixin(SearchFieldsMixin):
             return ds2.ModelSelect2Widget(search_fields=('name', ))
         """
         try:
-            return ds2.ModelSelect2Widget(search_fields=cls.get_search_fields())
+            return SearchSelect2Widget(search_fields=cls.get_search_fields())
         except NotImplementedError:
             raise NotImplementedError("Implement either .get_search_fields or .get_fk_widget")
 
@@ -34,6 +85,6 @@ class AutocompleteMixin(SearchFieldsMixin):
         ie. a forms.ModelMultipleChoiceField.
         """
         try:
-            return ds2.ModelSelect2MultipleWidget(search_fields=cls.get_search_fields())
+            return SearchSelect2MultipleWidget(search_fields=cls.get_search_fields())
         except NotImplementedError:
             raise NotImplementedError("Implement either .get_search_fields or .get_multi_widget")
@@ -0,0 +1 @@
+default_app_config = 'vprad.search.apps.VSearchConfig'
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
+from django.utils.translation import gettext_lazy
+
+
+class VSearchConfig(AppConfig):
+    name = 'vprad.search'
+    label = 'vprad_search'
+    verbose_name = gettext_lazy('VPRad Search')
+
+    def ready(self):
+        from vprad.search import signals
+        post_save.connect(signals.index_saved, dispatch_uid='vprad_search_index_saved')
+        post_delete.connect(signals.remove_deleted, dispatch_uid='vprad_search_remove_deleted')
+        post_save.connect(signals.bump_autocomplete, dispatch_uid='vprad_search_autocomplete_saved')
+        post_delete.connect(signals.bump_autocomplete, dispatch_uid='vprad_search_autocomplete_deleted')
@@ -0,0 +1,218 @@
+""" Autocomplete of the models with search fields.
+
+`autocomplete()` answers the pickers of `AutocompleteMixin` models with the
+first matches of a term, caching them (for `VPRAD_AUTOCOMPLETE_TIMEOUT`
+seconds) by model, scope and term. While typing, each term extends the
+previous one: when a shorter prefix of the term has cached results that
+were complete (less than `VPRAD_AUTOCOMPLETE_FETCH` rows), those are
+narrowed in Python, without querying the database.
+
+A scope is a queryset of the model restricted by the widget (ie. by
+`limit_choices_to`). The widget sends it along the term as a signed token
+holding the model and the lookups of the queryset as JSON, so every
+process can rebuild it, and nothing else can be listed. The tokens expire
+after `VPRAD_AUTOCOMPLETE_SCOPE_MAX_AGE` seconds. Querysets filtered by
+other means (joins, negations, expressions) have no scope, their widgets
+keep the django_select2 view. Saving or deleting an object of a model
+starts a new generation of its cached terms.
+
+Used by the widgets while `settings.VPRAD_AUTOCOMPLETE` is True. The
+counters of exact hits, narrowed hits and misses are per process.
+"""
+import hashlib
+import json
+import threading
+import typing as t
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldError, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from vprad.search.backends import get_words
+from vprad.search.index import get_search_text, is_enabled, search
+
+CACHE_PREFIX = 'vprad:autocomplete'
+SCOPE_SALT = 'vprad.search.autocomplete.scope'
+
+HIT = 'hits'            # The term was cached.
+NARROWED = 'narrowed'   # Narrowed from the results of a prefix.
+MISS = 'misses'         # Queried.
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def _record(kind: str):
+    with _lock:
+        _counters[kind] += 1
+
+
+def get_autocomplete_stats() -> t.Dict[str, t.Union[int, float]]:
+    """ Return the counters of this process, and the ratio of requests not queried. """
+    with _lock:
+        counts = {kind: _counters[kind] for kind in (HIT, NARROWED, MISS)}
+    total = sum(counts.values())
+    counts['hit_ratio'] = (counts[HIT] + counts[NARROWED]) / total if total else 0.0
+    return counts
+
+
+def reset_autocomplete_stats():
+    with _lock:
+        _counters.clear()
+
+
+def _fold(text: str) -> str:
+    """ Remove the diacritics of `text`, as the search index does. """
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def _matches(words: t.Sequence[str], text: str, prefixes: bool) -> bool:
+    """ Tell if `text` (a search text) matches all `words` like `search()` would.
+
+    With the index, each word is the prefix of a word of the text,
+    otherwise it is contained in the text.
+    """
+    if prefixes:
+        text_words = _fold(text).split()
+        return all(any(text_word.startswith(_fold(word)) for text_word in text_words) for word in words)
+    return all(word in text for word in words)
+
+
+class _ScopeSerializer:
+    """ JSON, with the dates and decimals of the lookups as strings. """
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+# The lookups a scope can hold, on the columns of the model itself.
+SCOPE_LOOKUPS = {'exact', 'iexact', 'in', 'gt', 'gte', 'lt', 'lte', 'isnull', 'range',
+                 'contains', 'icontains', 'startswith', 'istartswith'}
+
+
+def _get_scope_filters(queryset: models.QuerySet) -> t.Optional[t.List[t.Tuple[str, t.Any]]]:
+    """ Return the (lookup, value) filtering `queryset`, None if it is filtered otherwise.
+
+    Only a conjunction of lookups on the columns of the model can be told.
+    """
+    query = queryset.query
+    if (query.distinct or query.annotations or query.extra or query.low_mark or query.high_mark is not None
+            or len(query.alias_map) > 1):
+        return None
+    if query.where.negated or (len(query.where.children) > 1 and query.where.connector != 'AND'):
+        return None
+    filters = []
+    for child in query.where.children:
+        target = getattr(getattr(child, 'lhs', None), 'target', None)
+        if (getattr(child, 'lookup_name', None) not in SCOPE_LOOKUPS or target is None
+                or child.lhs.alias != query.base_table or hasattr(child.rhs, 'resolve_expression')):
+            return None
+        value = list(child.rhs) if isinstance(child.rhs, (set, tuple, list)) else child.rhs
+        filters.append((f'{target.attname}__{child.lookup_name}', value))
+    return filters
+
+
+def get_scope(queryset: models.QuerySet) -> t.Optional[str]:
+    """ Return the signed scope of `queryset`: its model and lookups.
+
+    None if the filters of `queryset` can not be held in a scope.
+    """
+    filters = _get_scope_filters(queryset)
+    if filters is None or not all(isinstance(order, str) for order in queryset.query.order_by):
+        return None
+    try:
+        return signing.dumps({'model': queryset.model._meta.label,
+                              'filters': filters,
+                              'order': list(queryset.query.order_by)},
+                             salt=SCOPE_SALT, serializer=_ScopeSerializer, compress=True)
+    except TypeError:
+        # A value JSON can not hold.
+        return None
+
+
+def get_scope_queryset(model: t.Type[models.Model],
+                       scope: str) -> t.Optional[t.Tuple[models.QuerySet, str]]:
+    """ Return the queryset of `scope` and the key telling it apart from other scopes.
+
+    None if the scope is invalid, expired or of another model.
+    """
+    try:
+        data = signing.loads(scope, salt=SCOPE_SALT, serializer=_ScopeSerializer,
+                             max_age=getattr(settings, 'VPRAD_AUTOCOMPLETE_SCOPE_MAX_AGE', 86400))
+    except signing.BadSignature:
+        return None
+    if not isinstance(data, dict) or data.get('model') != model._meta.label:
+        return None
+    try:
+        queryset = model._default_manager.filter(**dict(data['filters']))
+        if data['order']:
+            queryset = queryset.order_by(*data['order'])
+    except (KeyError, TypeError, ValueError, FieldError, ValidationError):
+        # Signed by us, but for fields that changed since.
+        return None
+    return queryset, _ScopeSerializer().dumps(data).decode()
+
+
+def _generation_key(model):
+    return f'{CACHE_PREFIX}:{model._meta.concrete_model._meta.label}:generation'
+
+
+def bump_generation(model: t.Type[models.Model]):
+    """ Make the cached terms of `model` stale. """
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _cache_key(model, generation, scope, term):
+    return '%s:%s:%s' % (CACHE_PREFIX, model._meta.label,
+                         hashlib.md5(f'{generation}:{scope}:{term}'.encode()).hexdigest())
+
+
+def autocomplete(queryset: models.QuerySet,
+                 term: str,
+                 scope: str = '',
+                 limit: int = None,
+                 label=str) -> t.Tuple[t.List[t.Tuple[t.Any, str]], bool]:
+    """ Return the first (pk, label) matching `term` in `queryset`, and if there are more.
+
+    `scope` tells apart the cached results of the querysets of a model.
+    """
+    limit = limit or getattr(settings, 'VPRAD_AUTOCOMPLETE_LIMIT', 20)
+    fetch = max(limit, getattr(settings, 'VPRAD_AUTOCOMPLETE_FETCH', 200))
+    timeout = getattr(settings, 'VPRAD_AUTOCOMPLETE_TIMEOUT', 60)
+    model = queryset.model
+    words = get_words(term)
+    term = ' '.join(words)
+    generation = cache.get(_generation_key(model), 0)
+    # The term and its prefixes, longest first, down to the empty term.
+    keys = [_cache_key(model, generation, scope, term[:length]) for length in range(len(term), -1, -1)]
+    found = cache.get_many(keys)
+    entry = found.get(keys[0], None)
+    if entry is not None:
+        _record(HIT)
+    else:
+        prefix_entry = next((found[key] for key in keys[1:] if key in found and found[key]['complete']), None)
+        if prefix_entry is not None:
+            _record(NARROWED)
+            prefixes = is_enabled(queryset.db)
+            entry = {'rows': [row for row in prefix_entry['rows'] if _matches(words, row[2], prefixes)],
+                     'complete': True}
+        else:
+            _record(MISS)
+            objects = list(search(queryset, term)[:fetch + 1])
+            entry = {'rows': [(obj.pk, str(label(obj)), get_search_text(obj)) for obj in objects[:fetch]],
+                     'complete': len(objects) <= fetch}
+        cache.set(keys[0], entry, timeout)
+    rows = entry['rows']
+    return [(pk, text) for pk, text, _ in rows[:limit]], len(rows) > limit or not entry['complete']
@@ -0,0 +1,111 @@
+""" Database side of the search index.
+
+Every indexed object has a row in `vprad_search_doc`, with its normalized
+text in `body`. Each backend has its own index over the body: a FTS5
+table on SQLite, a GIN tsvector index on PostgreSQL, both created by the
+migrations of the app. There is no index on the other databases
+(searching falls back to the search fields then).
+"""
+import re
+import typing as t
+
+from django.db import connections
+
+DOC_TABLE = 'vprad_search_doc'
+FTS_TABLE = 'vprad_search_fts'
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def get_words(text: str) -> t.List[str]:
+    """ Split `text` into the lowercase words the index is made of. """
+    return _WORD_RE.findall(str(text).lower())
+
+
+class SearchBackend:
+    """ Keep the search documents of a database and match words against them. """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def upsert(self, rows: t.Iterable[t.Tuple[int, str, str]]):
+        """ Index the (content type id, object id, body) of `rows`. """
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {DOC_TABLE} (content_type_id, object_id, body) "
+                               f"VALUES (%s, %s, %s) "
+                               f"ON CONFLICT (content_type_id, object_id) DO UPDATE SET body = EXCLUDED.body",
+                               list(rows))
+
+    def delete(self, content_type_id: int, object_ids: t.Sequence[str] = None):
+        """ Remove `object_ids` (all the objects if None) from the index. """
+        sql = f"DELETE FROM {DOC_TABLE} WHERE content_type_id = %s"
+        params = [content_type_id]
+        if object_ids is not None:
+            sql += " AND object_id IN (%s)" % ', '.join(['%s'] * len(object_ids))
+            params += list(object_ids)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def match_sql(self, words: t.Sequence[str], content_type_id: int = None, cast: str = None,
+                  ranked: bool = False) -> t.Tuple[str, list]:
+        """ Return the SQL (and params) selecting the object ids matching all `words`.
+
+        The ids are CAST to `cast` (if given), and the content type id is
+        also selected when `content_type_id` is None.
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def _select(content_type_id, cast):
+        object_id = f'CAST(d.object_id AS {cast})' if cast else 'd.object_id'
+        if content_type_id is None:
+            return f'd.content_type_id, {object_id}'
+        return object_id
+
+
+class SqliteSearchBackend(SearchBackend):
+    """ FTS5 index, kept in sync with the documents by triggers. """
+
+    def match_sql(self, words, content_type_id=None, cast=None, ranked=False):
+        # Every word as a prefix: "jo"* "smi"*
+        query = ' '.join(f'"{word}"*' for word in words)
+        sql = (f"SELECT {self._select(content_type_id, cast)} FROM {FTS_TABLE} f "
+               f"JOIN {DOC_TABLE} d ON d.id = f.rowid WHERE {FTS_TABLE} MATCH %s")
+        params = [query]
+        if content_type_id is not None:
+            sql += " AND d.content_type_id = %s"
+            params.append(content_type_id)
+        if ranked:
+            sql += " ORDER BY f.rank"
+        return sql, params
+
+
+class PostgresSearchBackend(SearchBackend):
+    """ GIN index on the tsvector of the body, matched with prefix queries. """
+
+    def match_sql(self, words, content_type_id=None, cast=None, ranked=False):
+        # Every word as a prefix: jo:* & smi:*
+        query = ' & '.join(f'{word}:*' for word in words)
+        sql = (f"SELECT {self._select(content_type_id, cast)} FROM {DOC_TABLE} d "
+               f"WHERE to_tsvector('simple', d.body) @@ to_tsquery('simple', %s)")
+        params = [query]
+        if content_type_id is not None:
+            sql += " AND d.content_type_id = %s"
+            params.append(content_type_id)
+        if ranked:
+            sql += " ORDER BY ts_rank(to_tsvector('simple', d.body), to_tsquery('simple', %s)) DESC"
+            params.append(query)
+        return sql, params
+
+
+backends = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(using: str) -> t.Optional[SearchBackend]:
+    """ Return the search backend of the database `using`, None if not supported. """
+    connection = connections[using]
+    backend_class = backends.get(connection.vendor, None)
+    return backend_class(connection) if backend_class else None
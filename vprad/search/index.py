@@ -0,0 +1,184 @@
+import typing as t
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, models, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from vprad.models import SearchFieldsMixin
+from vprad.search.backends import get_backend, get_words
+
+# Lookups ending the search fields ('full_name__icontains'), not part of the path.
+_LOOKUPS = {'exact', 'iexact', 'contains', 'icontains', 'startswith', 'istartswith',
+            'endswith', 'iendswith', 'search', 'unaccent', 'trigram_similar'}
+
+
+def get_search_fields(model: t.Type[models.Model]) -> t.Tuple[str, ...]:
+    """ Return the search fields of `model`, empty if it has none. """
+    if not issubclass(model, SearchFieldsMixin):
+        return ()
+    try:
+        return tuple(model.get_search_fields())
+    except NotImplementedError:
+        return ()
+
+
+def get_search_paths(model):
+    paths = []
+    for lookup in get_search_fields(model):
+        parts = lookup.split('__')
+        while len(parts) > 1 and parts[-1] in _LOOKUPS:
+            parts.pop()
+        paths.append(parts)
+    return paths
+
+
+def get_search_text(instance: models.Model) -> str:
+    """ Return the indexed text of `instance`: the words of its search fields.
+
+    Search fields through relations ('contact__full_name') are followed,
+    but the index is only updated when `instance` itself is saved.
+    """
+    texts = []
+    for parts in get_search_paths(type(instance)):
+        value = instance
+        for part in parts:
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if value is not None:
+            texts.append(str(value))
+    return ' '.join(get_words(' '.join(texts)))
+
+
+def get_indexed_models() -> t.List[t.Type[models.Model]]:
+    return [model for model in apps.get_models() if get_search_fields(model)]
+
+
+def is_enabled(using: str) -> bool:
+    return getattr(settings, 'VPRAD_SEARCH_INDEX', False) and get_backend(using) is not None
+
+
+def _content_type_id(model, using):
+    return ContentType.objects.db_manager(using).get_for_model(model).pk
+
+
+def _object_id(model, pk, using):
+    return str(model._meta.pk.get_db_prep_value(pk, connections[using]))
+
+
+def index_instances(instances: t.Sequence[models.Model], using: str = None):
+    """ Add (or update) `instances`, all of the same model, to the index. """
+    if not instances:
+        return
+    model = type(instances[0])
+    using = using or instances[0]._state.db or router.db_for_write(model)
+    if not is_enabled(using):
+        return
+    ct_id = _content_type_id(model, using)
+    get_backend(using).upsert((ct_id, _object_id(model, instance.pk, using), get_search_text(instance))
+                              for instance in instances)
+
+
+def remove_instances(model: t.Type[models.Model], pks: t.Sequence, using: str = None):
+    """ Remove the objects of `model` with `pks` from the index. """
+    using = using or router.db_for_write(model)
+    if not pks or not is_enabled(using):
+        return
+    get_backend(using).delete(_content_type_id(model, using),
+                              [_object_id(model, pk, using) for pk in pks])
+
+
+def reindex(models_: t.Iterable[t.Type[models.Model]] = None, using: str = 'default',
+            chunk_size: int = 2000) -> t.Dict[str, int]:
+    """ Rebuild the index of `models_` (all the indexed models by default).
+
+    Needed after changes that send no signals (`QuerySet.update`,
+    `bulk_create`, ...). Returns the count of objects indexed per model.
+    """
+    backend = get_backend(using)
+    if backend is None:
+        return {}
+    counts = {}
+    for model in models_ or get_indexed_models():
+        ct_id = _content_type_id(model, using)
+        backend.delete(ct_id)
+        batch = []
+        count = 0
+        # The base manager, to index the soft deleted too.
+        for instance in model._base_manager.using(using).iterator(chunk_size=chunk_size):
+            batch.append((ct_id, _object_id(model, instance.pk, using), get_search_text(instance)))
+            if len(batch) >= chunk_size:
+                backend.upsert(batch)
+                count += len(batch)
+                batch = []
+        backend.upsert(batch)
+        counts[model._meta.label] = count + len(batch)
+    return counts
+
+
+def search(queryset: models.QuerySet, term: str) -> models.QuerySet:
+    """ Filter `queryset` to the objects with all the words of `term`.
+
+    The words match the beginning of the words of the search fields,
+    from the index when enabled, or `icontains` the search fields (as
+    django_select2 does) when not.
+    """
+    words = get_words(term)
+    if not words:
+        return queryset
+    model = queryset.model
+    using = queryset.db
+    if is_enabled(using):
+        sql, params = get_backend(using).match_sql(words, _content_type_id(model, using),
+                                                   cast=model._meta.pk.cast_db_type(connections[using]))
+        return queryset.filter(pk__in=RawSQL(sql, params))
+    fields = get_search_fields(model)
+    if not fields:
+        return queryset.none()
+    select = Q()
+    for word in term.split():
+        select &= reduce(or_, (Q(**{field: word}) for field in fields))
+    return queryset.filter(select).distinct()
+
+
+def search_all(term: str, limit: int = 10, using: str = 'default') -> t.List[t.Tuple[t.Type[models.Model], list]]:
+    """ Search all the indexed models, return (model, objects) for those with results.
+
+    At most `limit` objects per model, the best matches first.
+    """
+    words = get_words(term)
+    if not words:
+        return []
+    if not is_enabled(using):
+        results = [(model, list(search(model._default_manager.using(using).all(), term)[:limit]))
+                   for model in get_indexed_models()]
+        return [(model, objects) for model, objects in results if objects]
+    backend = get_backend(using)
+    sql, params = backend.match_sql(words, ranked=True)
+    sql += " LIMIT %s"
+    params.append(limit * max(1, len(get_indexed_models())))
+    ids = defaultdict(list)
+    with backend.connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for ct_id, object_id in cursor:
+            if len(ids[ct_id]) < limit:
+                ids[ct_id].append(object_id)
+    results = []
+    for ct_id, object_ids in ids.items():
+        model = ContentType.objects.db_manager(using).get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        pk_field = model._meta.pk
+        found = {_object_id(model, obj.pk, using): obj
+                 for obj in model._default_manager.using(using).filter(pk__in=[pk_field.to_python(object_id)
+                                                                               for object_id in object_ids])}
+        objects = [found[object_id] for object_id in object_ids if object_id in found]
+        if objects:
+            results.append((model, objects))
+    return results
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from vprad.search.index import reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index, of all the models with search fields or of those given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                            help="Only reindex these models.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="The database to reindex.")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Objects read and indexed at once.")
+
+    def handle(self, *args, **options):
+        models = [apps.get_model(label) for label in options['models']]
+        counts = reindex(models or None, using=options['database'], chunk_size=options['chunk_size'])
+        for label, count in counts.items():
+            self.stdout.write("%-40s %10d" % (label, count))
@@ -0,0 +1,64 @@
+from django.db import migrations, router
+
+# The documents, and the index over their body, on the databases supported
+# (see vprad.search.backends). IF NOT EXISTS: they were created after
+# migrating before this migration.
+CREATE_SQL = {
+    'sqlite': [
+        "CREATE TABLE IF NOT EXISTS vprad_search_doc ("
+        "id INTEGER PRIMARY KEY, content_type_id INTEGER NOT NULL, object_id VARCHAR(255) NOT NULL, "
+        "body TEXT NOT NULL, UNIQUE (content_type_id, object_id))",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS vprad_search_fts USING fts5("
+        "body, content='vprad_search_doc', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS vprad_search_fts_ai AFTER INSERT ON vprad_search_doc BEGIN "
+        "INSERT INTO vprad_search_fts (rowid, body) VALUES (new.id, new.body); END",
+        "CREATE TRIGGER IF NOT EXISTS vprad_search_fts_ad AFTER DELETE ON vprad_search_doc BEGIN "
+        "INSERT INTO vprad_search_fts (vprad_search_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+        "CREATE TRIGGER IF NOT EXISTS vprad_search_fts_au AFTER UPDATE ON vprad_search_doc BEGIN "
+        "INSERT INTO vprad_search_fts (vprad_search_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+        "INSERT INTO vprad_search_fts (rowid, body) VALUES (new.id, new.body); END",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS vprad_search_doc ("
+        "id serial PRIMARY KEY, content_type_id integer NOT NULL, object_id varchar(255) NOT NULL, "
+        "body text NOT NULL, UNIQUE (content_type_id, object_id))",
+        "CREATE INDEX IF NOT EXISTS vprad_search_doc_body ON vprad_search_doc "
+        "USING gin (to_tsvector('simple', body))",
+    ],
+}
+DROP_SQL = {
+    'sqlite': [
+        "DROP TABLE IF EXISTS vprad_search_fts",
+        "DROP TABLE IF EXISTS vprad_search_doc",
+    ],
+    'postgresql': [
+        "DROP TABLE IF EXISTS vprad_search_doc",
+    ],
+}
+
+
+class RunVendorSQL(migrations.RunSQL):
+    """ RunSQL taking {vendor: statements}, nothing runs on the other vendors. """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if router.allow_migrate(schema_editor.connection.alias, app_label, **self.hints):
+            self._run_sql(schema_editor, self.sql.get(schema_editor.connection.vendor, []))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if router.allow_migrate(schema_editor.connection.alias, app_label, **self.hints):
+            self._run_sql(schema_editor, self.reverse_sql.get(schema_editor.connection.vendor, []))
+
+    def describe(self):
+        return "Create the search index tables"
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        RunVendorSQL(sql=CREATE_SQL, reverse_sql=DROP_SQL),
+    ]
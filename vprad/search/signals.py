@@ -0,0 +1,23 @@
+from django.db import transaction
+
+from vprad.search import autocomplete
+from vprad.search.index import get_search_fields, index_instances, remove_instances, get_search_paths
+
+
+def index_saved(sender, instance, using, update_fields=None, **kwargs):
+    if not get_search_fields(sender):
+        return
+    if update_fields is not None and not {parts[0] for parts in get_search_paths(sender)} & set(update_fields):
+        return
+    index_instances([instance], using=using)
+
+
+def remove_deleted(sender, instance, using, **kwargs):
+    if get_search_fields(sender):
+        remove_instances(sender, [instance.pk], using=using)
+
+
+def bump_autocomplete(sender, using, **kwargs):
+    """ New objects can be picked, deleted ones not, once committed. """
+    if get_search_fields(sender):
+        transaction.on_commit(lambda: autocomplete.bump_generation(sender), using=using)
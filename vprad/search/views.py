@@ -0,0 +1,45 @@
+from django.apps import apps
+from django.http import Http404, JsonResponse, HttpResponseForbidden
+from django.shortcuts import render
+
+from vprad.helpers import get_url_for
+from vprad.search.autocomplete import autocomplete, get_autocomplete_stats, get_scope_queryset
+from vprad.search.index import get_search_fields, search_all
+from vprad.views.registry import register_view
+
+
+@register_view(name='search', urlpaths='search')
+def search_view(request):
+    """ The global search box: the best matches of each model. """
+    term = request.GET.get('q', '').strip()
+    results = [(model, [(obj, get_url_for(obj)) for obj in objects])
+               for model, objects in search_all(term)]
+    return render(request, 'vprad/search/results.jinja.html',
+                  {'term': term, 'results': results})
+
+
+@register_view(name='vprad_autocomplete', urlpaths='autocomplete/<str:app_label>/<str:model_name>')
+def autocomplete_view(request, app_label, model_name):
+    """ The choices of the pickers, as select2 expects them. """
+    try:
+        model = apps.get_model(app_label, model_name)
+    except LookupError:
+        raise Http404("Unknown model")
+    scope = request.GET.get('scope', '')
+    scoped = get_scope_queryset(model, scope) if get_search_fields(model) else None
+    if scoped is None:
+        raise Http404("Unknown model or scope")
+    queryset, scope_key = scoped
+    rows, more = autocomplete(queryset, request.GET.get('term', ''), scope_key)
+    # No pages: `more` only tells there are matches beyond the limit.
+    return JsonResponse({'results': [{'id': pk, 'text': text} for pk, text in rows],
+                         'more': False,
+                         'limited': more})
+
+
+@register_view(name='vprad_autocomplete_stats', urlpaths='autocomplete/stats')
+def autocomplete_stats_view(request):
+    """ Staff only JSON with the autocomplete cache counters of this process. """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Staff only")
+    return JsonResponse(get_autocomplete_stats())
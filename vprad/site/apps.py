@@ -1,6 +1,7 @@
 import logging
 
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.utils.translation import gettext_lazy
 
 from vprad.helpers import autodiscover_modules
@@ -15,6 +16,10 @@ class VSiteConfig(AppConfig):
     verbose_name = gettext_lazy('VPRad Site')
 
     def ready(self):
+        from vprad.site.jinja import cache
+        post_save.connect(cache.bump_saved, dispatch_uid='vprad_fragment_cache_saved')
+        post_delete.connect(cache.bump_saved, dispatch_uid='vprad_fragment_cache_deleted')
+        m2m_changed.connect(cache.bump_m2m_changed, dispatch_uid='vprad_fragment_cache_m2m')
         autodiscover_modules('jinja')
         logging.getLogger('vprad.jinja').info("VPRad Jinja ready with %d filters and %d globals",
                                               len(jinja_filters.keys()),
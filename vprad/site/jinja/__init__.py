@@ -9,6 +9,7 @@ def environment(**options):
     options.setdefault('extensions', [])
     options['extensions'].append('jinja2.ext.i18n')
     options['extensions'].append('jinja2.ext.debug')
+    options['extensions'].append('vprad.site.jinja.cache.FragmentCacheExtension')
     env = Environment(**options)
     env.globals.update(jinja_globals)
     env.filters.update(jinja_filters)
@@ -0,0 +1,191 @@
+""" Fragment cache for the jinja templates:
+
+    {% cache 'name', object, ... %} ... {% endcache %}
+
+While `settings.VPRAD_FRAGMENT_CACHE` is True the rendered body is kept in
+the Django cache (for `VPRAD_FRAGMENT_CACHE_TIMEOUT` seconds), keyed by the
+template, the name and the values after it:
+  - model instances by their identity, `modified` and generation, and the
+    generations of the objects they point to (ForeignKey, GenericForeignKey);
+  - model classes by their label;
+  - anything else by its repr;
+plus the actions available to the user on those instances and classes,
+the language and the path of the request.
+
+The generation of an object changes when it, or an object pointing to
+it, is saved or deleted: a contact's fragments are stale once one of its
+phone numbers changes, or its assignee. It changes again once the
+transaction commits, so a render reading the old rows meanwhile is not
+kept. Adding or removing many-to-many relations changes the generations
+of both sides, but clearing them only the one of the object cleared.
+Changes that send no signals (`QuerySet.update`) are not seen until the
+timeout.
+
+Hits and misses are counted per fragment name and process.
+"""
+import hashlib
+import threading
+import typing as t
+import uuid
+from collections import Counter, defaultdict
+from inspect import isclass
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils.translation import get_language
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+CACHE_PREFIX = 'vprad:fragment'
+
+_counters: t.Dict[str, Counter] = defaultdict(Counter)
+_lock = threading.Lock()
+
+
+def fragment_cache_enabled() -> bool:
+    return getattr(settings, 'VPRAD_FRAGMENT_CACHE', False)
+
+
+def _record(name: str, kind: str):
+    with _lock:
+        _counters[name][kind] += 1
+
+
+def get_fragment_cache_stats() -> t.Dict[str, t.Dict[str, t.Union[int, float]]]:
+    """ Return {fragment name: {'hits', 'misses', 'hit_ratio'}} of this process. """
+    with _lock:
+        counts = {name: (counter['hits'], counter['misses']) for name, counter in _counters.items()}
+    return {name: {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses)}
+            for name, (hits, misses) in counts.items()}
+
+
+def reset_fragment_cache_stats():
+    with _lock:
+        _counters.clear()
+
+
+def _generation_key(model, pk):
+    return f'{CACHE_PREFIX}:generation:{model._meta.concrete_model._meta.label}:{pk}'
+
+
+def _pointed_keys(instance: models.Model) -> t.List[str]:
+    """ The generation keys of the objects `instance` points to. """
+    keys = []
+    for field in instance._meta.concrete_fields:
+        if field.many_to_one or field.one_to_one:
+            value = getattr(instance, field.attname)
+            if value is not None:
+                keys.append(_generation_key(field.related_model, value))
+    for field in instance._meta.private_fields:
+        if isinstance(field, GenericForeignKey):
+            ct_id = getattr(instance, instance._meta.get_field(field.ct_field).attname)
+            pk = getattr(instance, field.fk_field)
+            model = ContentType.objects.get_for_id(ct_id).model_class() if ct_id else None
+            if model is not None and pk is not None:
+                keys.append(_generation_key(model, pk))
+    return keys
+
+
+def _get_generations(keys: t.List[str]) -> t.Dict[str, str]:
+    generations = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in generations}
+    if missing:
+        # Never back to a previous generation, even if evicted.
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return generations
+
+
+def _bump(keys: t.List[str]):
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def bump_generations(instance: models.Model, using: str = None):
+    """ Make stale the fragments of `instance` and of the objects it points to.
+
+    Now, and again once the transaction commits.
+    """
+    keys = [_generation_key(type(instance), instance.pk)] + _pointed_keys(instance)
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys), using=using)
+
+
+def _actions_fingerprint(parts, user) -> t.List[str]:
+    from vprad.actions import actions_registry
+    names = []
+    for part in parts:
+        if isinstance(part, models.Model):
+            actions = actions_registry.get_available_actions_for(instance=part, request_user=user)
+        elif isclass(part) and issubclass(part, models.Model):
+            actions = actions_registry.get_available_actions_for(cls=part, request_user=user)
+        else:
+            continue
+        names.extend(action.full_name for action in actions)
+    return names
+
+
+def get_fragment_key(template_name: str, name: str, parts: t.Sequence, request=None) -> str:
+    instances = [part for part in parts if isinstance(part, models.Model) and part.pk is not None]
+    instance_keys = {id(instance): [_generation_key(type(instance), instance.pk)] + _pointed_keys(instance)
+                     for instance in instances}
+    generations = _get_generations([key for keys in instance_keys.values() for key in keys])
+    bits = [template_name, name, get_language(), request.get_full_path() if request else '']
+    for part in parts:
+        if isinstance(part, models.Model):
+            bits.append('%s:%s:%s:%s' % (part._meta.label, part.pk, getattr(part, 'modified', ''),
+                                         ','.join(generations[key] for key in instance_keys.get(id(part), ()))))
+        elif isclass(part) and issubclass(part, models.Model):
+            bits.append(part._meta.label)
+        else:
+            bits.append(repr(part))
+    bits.extend(_actions_fingerprint(parts, getattr(request, 'user', None)))
+    digest = hashlib.md5('|'.join(str(bit) for bit in bits).encode()).hexdigest()
+    return f'{CACHE_PREFIX}:{name}:{digest}'
+
+
+class FragmentCacheExtension(Extension):
+    """ The `{% cache name, values... %}` tag (see the module doc). """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.ContextReference(), nodes.List(args)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render(self, context, args, caller):
+        if not fragment_cache_enabled():
+            return caller()
+        name, *parts = args
+        key = get_fragment_key(context.name, name, parts, context.get('request'))
+        content = cache.get(key)
+        if content is None:
+            _record(name, 'misses')
+            content = caller()
+            cache.set(key, str(content), getattr(settings, 'VPRAD_FRAGMENT_CACHE_TIMEOUT', 600))
+        else:
+            _record(name, 'hits')
+        return Markup(content)
+
+
+def bump_saved(sender, instance, using=None, **kwargs):
+    """ post_save/post_delete receiver, connected by VSiteConfig. """
+    if fragment_cache_enabled() and instance.pk is not None:
+        bump_generations(instance, using)
+
+
+def bump_m2m_changed(sender, instance, action, model, pk_set, using=None, **kwargs):
+    """ m2m_changed receiver, connected by VSiteConfig. """
+    if not fragment_cache_enabled() or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    keys = [_generation_key(type(instance), instance.pk)]
+    keys += [_generation_key(model, pk) for pk in pk_set or ()]
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys), using=using)
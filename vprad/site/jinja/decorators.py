@@ -1,11 +1,11 @@
 import logging
 from functools import partial
 
-from vprad.helpers import log_with_caller
+from vprad.helpers import log_with_caller, SnapshotRegistry
 
 logger = logging.getLogger('vprad.jinja.registry')
-jinja_globals = {}
-jinja_filters = {}
+jinja_globals = SnapshotRegistry()
+jinja_filters = SnapshotRegistry()
 
 
 def _registry_decorator(registry, registry_name: str, name: str, replace: bool = False):
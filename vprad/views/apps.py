@@ -1,8 +1,10 @@
 import logging
 
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 from django.utils.translation import gettext_lazy
 
+from vprad.actions.signals import action_post, transition_bulk_post
 from vprad.helpers import autodiscover_modules
 from vprad.views.registry import views_registry, model_views_registry
 
@@ -17,6 +19,12 @@ class VViewsConfig(AppConfig):
     def ready(self):
         # noinspection PyUnresolvedReferences
         import vprad.views.defaults
+        from vprad.views import object_cache
+        post_save.connect(object_cache.forget_saved, dispatch_uid='vprad_object_cache_saved')
+        post_delete.connect(object_cache.forget_saved, dispatch_uid='vprad_object_cache_deleted')
+        action_post.connect(object_cache.forget_action_instance, dispatch_uid='vprad_object_cache_action')
+        transition_bulk_post.connect(object_cache.forget_bulk_transition,
+                                     dispatch_uid='vprad_object_cache_bulk_transition')
         autodiscover_modules('views')
         logger.info("VPRad Views ready with %d views and %d model views",
                     len(views_registry.keys()),
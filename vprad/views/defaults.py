@@ -1,7 +1,9 @@
 from django.contrib.auth import logout
+from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
+from vprad.site.jinja.cache import get_fragment_cache_stats
 from vprad.views.registry import register_view
 
 
@@ -20,3 +22,11 @@ def login_view(request):
 def logout_view(request):
     logout(request)
     return render(request, 'vprad/views/logout.jinja.html')
+
+
+@register_view(urlpaths='fragments/stats', name='vprad_fragment_cache_stats')
+def fragment_cache_stats_view(request):
+    """ Staff only JSON with the fragment cache counters of this process. """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Staff only")
+    return JsonResponse(get_fragment_cache_stats())
@@ -0,0 +1,105 @@
+""" Conditional GET (ETag and Last-Modified) for the detail and embed views.
+
+While `settings.VPRAD_CONDITIONAL_GET` is True (or the view sets
+`conditional_get = True`), the views compute a validator before rendering:
+the `modified` of the object (or the last `modified` and the count of the
+embedded rows), the actions available to the user, the user, the
+language and the path of the request. A request whose If-None-Match / If-Modified-Since still matches
+gets a `304 Not Modified` without rendering any template.
+
+Only the rows themselves are looked at: a change to an object they show
+(ie. a renamed assignee) is not seen until they are modified.
+"""
+import hashlib
+import typing as t
+from calendar import timegm
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+from vprad.actions import actions_registry
+
+# Passed by `VEmbeddingMixin.render_embeds`: the embeds rendered together
+# need their content, never a 304.
+EMBED_BATCH_KWARG = 'embed_batch'
+
+
+def has_modified(model: t.Type[models.Model]) -> bool:
+    try:
+        model._meta.get_field('modified')
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def get_rows_state(queryset: models.QuerySet) -> t.Optional[t.Tuple[list, t.Optional[datetime]]]:
+    """ Return the state of the rows of `queryset`: their count and last `modified`. """
+    if not has_modified(queryset.model):
+        return None
+    state = queryset.order_by().aggregate(last_modified=Max('modified'), count=Count('pk'))
+    return [state['count'], state['last_modified']], state['last_modified']
+
+
+def get_object_state(obj: models.Model) -> t.Optional[t.Tuple[list, t.Optional[datetime]]]:
+    if not has_modified(type(obj)):
+        return None
+    return [obj._meta.label, obj.pk, obj.modified], obj.modified
+
+
+class ConditionalGetMixin:
+    """ Answer 304 to the requests for content the client already has. """
+    # None follows settings.VPRAD_CONDITIONAL_GET.
+    conditional_get: bool = None
+
+    def get_conditional_state(self) -> t.Optional[t.Tuple[list, t.Optional[datetime]]]:
+        """ Return (the values the content depends on, its last modification).
+
+        None (the default) disables the conditional GET for the request.
+        """
+        return None
+
+    def get_actions_fingerprint(self) -> t.List[str]:
+        """ The names of the actions available to the user on the shown object or model. """
+        # noinspection PyUnresolvedReferences
+        user = self.request.user
+        obj = getattr(self, 'object', None)
+        if isinstance(obj, models.Model):
+            actions = actions_registry.get_available_actions_for(instance=obj, request_user=user)
+        else:
+            # noinspection PyUnresolvedReferences
+            actions = actions_registry.get_available_actions_for(cls=self.model, request_user=user)
+        return [action.full_name for action in actions]
+
+    def conditional(self, render: t.Callable[[], t.Any]):
+        """ Return a 304 if the client has the current content, or `render()` it. """
+        enabled = self.conditional_get if self.conditional_get is not None else \
+            getattr(settings, 'VPRAD_CONDITIONAL_GET', False)
+        # noinspection PyUnresolvedReferences
+        if not enabled or self.kwargs.get(EMBED_BATCH_KWARG, False):
+            return render()
+        state = self.get_conditional_state()
+        if state is None:
+            return render()
+        parts, last_modified = state
+        # noinspection PyUnresolvedReferences
+        parts = parts + self.get_actions_fingerprint() + [self.request.user.pk, get_language(),
+                                                           self.request.get_full_path()]
+        etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        last_modified = timegm(last_modified.utctimetuple()) if last_modified else None
+        # noinspection PyUnresolvedReferences
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            # Revalidate on every use, with the validators.
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
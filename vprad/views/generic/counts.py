@@ -0,0 +1,75 @@
+import hashlib
+import json
+import logging
+import typing as t
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections, models, DatabaseError
+from django.utils.functional import cached_property
+
+logger = logging.getLogger('vprad.views')
+
+
+class CountedPaginator(Paginator):
+    """ Paginator that can be given its `count`, instead of counting `object_list`. """
+
+    def __init__(self, *args, count: int = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        return super().count
+
+
+def get_cached_count(queryset: models.QuerySet, prefix: str, timeout: int) -> int:
+    """ Count `queryset`, keeping the result in the cache for `timeout` seconds.
+
+    The key is made of `prefix` (the view) and the SQL of the queryset, so
+    the count is shared by the requests with the same filters.
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # ie. filtered `__in` an empty list, or `.none()`.
+        return 0
+    key = 'vprad:count:%s:%s' % (prefix, hashlib.md5(f'{sql}:{params!r}'.encode()).hexdigest())
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def get_estimated_count(queryset: models.QuerySet) -> t.Optional[int]:
+    """ Estimate the rows of `queryset` from the planner statistics.
+
+    Only PostgreSQL is supported, None is returned on the other backends
+    (or when there are no statistics).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    try:
+        if not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            plan = queryset.order_by().explain(format='json')
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            estimate = plan[0]['Plan']['Plan Rows']
+    except (DatabaseError, ValueError, KeyError, IndexError):
+        logger.exception("Could not estimate the count of %s", queryset.model)
+        return None
+    return int(estimate) if estimate >= 0 else None
@@ -16,19 +16,33 @@ from django.views.generic import DetailView
 
 from vprad.actions import actions_registry, ActionDoesNotExist
 from vprad.helpers import get_url_for
+from vprad.views.generic.conditional import ConditionalGetMixin, get_object_state
 from vprad.views.generic.embedding import VEmbeddableMixin, VEmbeddingMixin
 from vprad.views.generic.mixin import FieldsAttrMixin, ModelDataMixin
 from vprad.views.helpers import get_model_url_name
+from vprad.views.object_cache import CachedObjectMixin
 
 logger = logging.getLogger(__name__)
 
 
-class VDetailViewBase(FieldsAttrMixin,
+class VDetailViewBase(ConditionalGetMixin,
+                      FieldsAttrMixin,
                       ModelDataMixin,
                       DetailView):
     context_object_name = 'object'
     template_name = 'vprad/views/detail/object_detail.jinja.html'
 
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return self.conditional(
+            lambda: self.render_to_response(self.get_context_data(object=self.object)))
+
+    def get_conditional_state(self):
+        return get_object_state(self.object)
+
+    def get_queryset(self):
+        return self.apply_related_lookups(super().get_queryset())
+
     def get_context_data(self, **kwargs):
         kwargs['headline'] = self.get_headline()
         kwargs['headline_subtitle'] = self.get_headline_subtitle()
@@ -61,7 +75,7 @@ class VEmbeddableDetailView(VEmbeddableMixin, VDetailViewBase):
         return get_url_for(self.object) or ''
 
 
-class VDetailView(VEmbeddingMixin, VDetailViewBase):
+class VDetailView(VEmbeddingMixin, CachedObjectMixin, VDetailViewBase):
     """ An object Detail View.
 
     VPRAD's equivalent to Django's DetailView.
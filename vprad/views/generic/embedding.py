@@ -9,11 +9,15 @@ from urllib.parse import urlencode
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.http import Http404
+from django.shortcuts import render
 from django.utils.decorators import classonlymethod
+from django.utils.safestring import mark_safe
 from django.views import View
 
 from vprad.actions import actions_registry, ActionDoesNotExist
 from vprad.helpers import get_generic_foreign_key
+from vprad.views.generic.conditional import EMBED_BATCH_KWARG
 from vprad.views.helpers import get_model_url_name
 from vprad.views.registry import model_views_registry
 from vprad.views.types import ViewType
@@ -167,11 +171,49 @@ class VEmbeddingMixin:
     # noinspection PyUnresolvedReferences
     def dispatch(self, request, *args, **kwargs):
         if EMBEDDABLE_GET_PARAM in request.GET:
+            # One embeddable, or several (`?_embed_related=a,b,c`) rendered together.
+            names = request.GET[EMBEDDABLE_GET_PARAM].split(',')
+            if any(name not in self._embeddables for name in names):
+                raise Http404("No such embeddable")
             kwargs['parent_object'] = self.get_object()
-            embeddable = self._embeddables[request.GET[EMBEDDABLE_GET_PARAM]]
-            return embeddable(request, *args, **kwargs)
+            if len(names) == 1:
+                return self._embeddables[names[0]](request, *args, **kwargs)
+            return self.render_embeds(names, *args, **kwargs)
         return super().dispatch(request, *args, **kwargs)
 
+    def render_embeds(self, names: t.Sequence[str], *args, **kwargs):
+        """ Render the embeddables `names` of the parent object in one response.
+
+        The parent object, the middlewares and the session are processed
+        once for all of them. The embeds raising or not answering 200
+        (errors, redirects) are shown as an error in their slot.
+        """
+        kwargs[EMBED_BATCH_KWARG] = True
+        batch_embeds = []
+        failed_embeds = set()
+        for name in names:
+            embeddable = self._embeddables[name]
+            try:
+                # noinspection PyUnresolvedReferences
+                response = embeddable(self.request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+            except Exception:
+                logger.exception("Embed '%s' of %s failed", name, type(self).__name__)
+                failed_embeds.add(name)
+                batch_embeds.append((embeddable.view_class, None))
+                continue
+            if response.status_code != 200:
+                logger.warning("Embed '%s' of %s answered %s", name, type(self).__name__, response.status_code)
+                failed_embeds.add(name)
+                batch_embeds.append((embeddable.view_class, None))
+                continue
+            batch_embeds.append((embeddable.view_class,
+                                 mark_safe(response.content.decode(response.charset))))
+        # noinspection PyUnresolvedReferences
+        return render(self.request, 'vprad/views/detail/embed_batch.jinja.html',
+                      {'batch_embeds': batch_embeds, 'failed_embeds': failed_embeds})
+
     @classmethod
     def _embed_related_default(cls, model: t.Type[models.Model]):
         """ Produce a default for cls.embed_related """
@@ -222,5 +264,26 @@ class VEmbeddingMixin:
                     raise ValueError("Dont know how to proceed")
             return r
         kwargs['embed_blocks'] = _inner(self.embed_related)
+        kwargs['embed_groups'] = self._group_embed_blocks(kwargs['embed_blocks'])
         return super().get_context_data(**kwargs)
 
+    @staticmethod
+    def _group_embed_blocks(embed_blocks):
+        """ Group the consecutive standalone embeds, to load them in one request.
+
+        Returns a list of {'tabs': block} and {'embeds': [(embed, None), ...], 'url': url}.
+        """
+        groups = []
+        for block in embed_blocks:
+            if not isclass(block):
+                groups.append({'tabs': block})
+            elif groups and 'embeds' in groups[-1]:
+                groups[-1]['embeds'].append((block, None))
+            else:
+                groups.append({'embeds': [(block, None)]})
+        for group in groups:
+            if 'embeds' in group:
+                group['url'] = '?%s=%s' % (EMBEDDABLE_GET_PARAM,
+                                           ','.join(embed.name for embed, _ in group['embeds']))
+        return groups
+
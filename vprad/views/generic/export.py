@@ -0,0 +1,104 @@
+""" Streaming exports of the list views.
+
+The rows are read with `QuerySet.iterator()` and written as they go
+into a `StreamingHttpResponse`, so memory stays flat whatever the size
+of the list. `iterator()` ignores `prefetch_related`, querysets with
+prefetches are read page by page with keyset pagination instead (in the
+same order), so each page is prefetched.
+"""
+import csv
+import datetime
+import decimal
+import json
+import typing as t
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import StreamingHttpResponse
+from django_tables2 import Table
+from django_tables2.rows import BoundRow
+
+from vprad.views.generic.keyset import keyset_paginate
+from vprad.views.jinja import filter_format_plain_value
+
+# The parameter in GET for requesting an export, and the formats:
+EXPORT_GET_PARAM = '_export'
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+# Text starting with these is run as a formula by spreadsheets.
+CSV_FORMULA_CHARS = ('=', '+', '-', '@', '\t', '\r')
+# Values written as they are in JSON (DjangoJSONEncoder takes the dates and decimals).
+JSON_RAW_TYPES = (bool, int, float, decimal.Decimal, datetime.date, datetime.time)
+
+
+class _Echo:
+    """ File-like object handing back what is written, for csv.writer. """
+
+    def write(self, value):
+        return value
+
+
+def _iter_records(queryset: t.Iterable, chunk_size: int):
+    if not isinstance(queryset, models.QuerySet):
+        yield from queryset
+    elif not queryset._prefetch_related_lookups:
+        yield from queryset.iterator(chunk_size=chunk_size)
+    else:
+        cursor = None
+        while True:
+            page = keyset_paginate(queryset, chunk_size, cursor)
+            yield from page.object_list
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+
+def _iter_rows(table: Table, queryset: models.QuerySet, chunk_size: int):
+    """ Yield the (column name, plain value) of each row of `queryset` in `table`. """
+    columns = [column for column in table.columns if column.name != '_selected']
+    for record in _iter_records(queryset, chunk_size):
+        row = BoundRow(record, table=table)
+        yield [(column, row.get_cell_value(column.name)) for column in columns]
+
+
+def _csv_cell(value) -> str:
+    """ The text of `value`, quoted with ' when a spreadsheet would run it. """
+    text = filter_format_plain_value(value)
+    if text.startswith(CSV_FORMULA_CHARS) and \
+            (isinstance(value, bool) or not isinstance(value, (int, float, decimal.Decimal))):
+        return "'" + text
+    return text
+
+
+def _json_value(value):
+    if value is None or isinstance(value, JSON_RAW_TYPES):
+        return value
+    return filter_format_plain_value(value)
+
+
+def _stream_csv(table, queryset, chunk_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([_csv_cell(str(column.header)) for column in table.columns if column.name != '_selected'])
+    for row in _iter_rows(table, queryset, chunk_size):
+        yield writer.writerow([_csv_cell(value) for column, value in row])
+
+
+def _stream_jsonl(table, queryset, chunk_size):
+    for row in _iter_rows(table, queryset, chunk_size):
+        data = {column.name: _json_value(value) for column, value in row}
+        yield json.dumps(data, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_response(table: Table,
+                    queryset: t.Iterable,
+                    export_format: str,
+                    filename: str,
+                    chunk_size: int = 2000) -> StreamingHttpResponse:
+    """ Stream the rows of `queryset`, as shown by the columns of `table`. """
+    stream = _stream_csv if export_format == 'csv' else _stream_jsonl
+    response = StreamingHttpResponse(stream(table, queryset, chunk_size),
+                                     content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
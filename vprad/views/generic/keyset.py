@@ -0,0 +1,166 @@
+import base64
+import json
+import typing as t
+
+import attr
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import F, Q
+
+# Prefix of the annotations holding the ordering values of each row.
+_KEY_PREFIX = '_keyset_'
+CURSOR_SALT = 'vprad.views.generic.keyset.cursor'
+
+
+def get_keyset_ordering(queryset: models.QuerySet) -> t.Tuple[str, ...]:
+    """ Return the ordering of `queryset`, ending with the pk so it is total.
+
+    Only field ordering is kept ('name', '-partner__name', ...), expressions
+    can't be compared against a cursor.
+    """
+    ordering = queryset.query.order_by or queryset.model._meta.ordering or ()
+    ordering = tuple(o for o in ordering if isinstance(o, str) and o.lstrip('-') != '?')
+    pk_names = {'pk', queryset.model._meta.pk.name}
+    if not any(o.lstrip('-') in pk_names for o in ordering):
+        ordering += ('pk', )
+    return ordering
+
+
+def _get_ordering_field(model: t.Type[models.Model], name: str) -> t.Optional[models.Field]:
+    """ Return the field `name` (ie. 'partner__name') of `model`, None if not a field. """
+    field = None
+    for part in name.split('__'):
+        if model is None:
+            return None
+        try:
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    # Reverse relations have no values of their own.
+    return field if isinstance(field, models.Field) else None
+
+
+def encode_cursor(ordering, values, backwards=False) -> str:
+    data = json.dumps([list(ordering), values, backwards], cls=DjangoJSONEncoder)
+    data = base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+    return signing.Signer(salt=CURSOR_SALT).sign(data)
+
+
+def decode_cursor(cursor: str, ordering, model: t.Type[models.Model] = None) -> t.Tuple[t.Optional[list], bool]:
+    """ Return the (values, backwards) of `cursor`.
+
+    A cursor that is invalid, not signed by us, or made for another ordering
+    (the user sorted by another column), gives no values: the first page.
+    With `model`, the values are converted by the fields they come from.
+    """
+    try:
+        data = signing.Signer(salt=CURSOR_SALT).unsign(cursor)
+        data = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+        cursor_ordering, values, backwards = json.loads(data)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None, False
+    if cursor_ordering != list(ordering) or not isinstance(values, list) or len(values) != len(ordering):
+        return None, False
+    if model is not None:
+        try:
+            values = [value if value is None or field is None else field.to_python(value)
+                      for value, field in zip(values, (_get_ordering_field(model, o.lstrip('-'))
+                                                       for o in ordering))]
+        except (ValueError, TypeError, ValidationError):
+            return None, False
+    return values, bool(backwards)
+
+
+def _order_expressions(ordering, backwards=False) -> list:
+    """ The ORDER BY of `ordering`, with NULLs pinned after the other values.
+
+    NULL counts as the greatest value on every database, which `_seek_q`
+    relies on: last when ascending, first when descending.
+    """
+    expressions = []
+    for order in ordering:
+        if order.startswith('-') != backwards:
+            expressions.append(F(order.lstrip('-')).desc(nulls_first=True))
+        else:
+            expressions.append(F(order.lstrip('-')).asc(nulls_last=True))
+    return expressions
+
+
+def _seek_q(ordering, values, backwards) -> Q:
+    """ Q for the rows after (or before, if `backwards`) the row with `values`.
+
+    NULL is the greatest value (see `_order_expressions`).
+    """
+    q = Q()
+    equal = {}
+    for order, value in zip(ordering, values):
+        name = order.lstrip('-')
+        descending = order.startswith('-') != backwards
+        if value is None:
+            if descending:
+                # Every value is before NULL.
+                q |= Q(**equal, **{f'{name}__isnull': False})
+            equal[f'{name}__isnull'] = True
+        else:
+            if descending:
+                q |= Q(**equal, **{f'{name}__lt': value})
+            else:
+                q |= Q(**equal) & (Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True}))
+            equal[name] = value
+    return q
+
+
+@attr.s(auto_attribs=True)
+class KeysetPage:
+    """ A page of a keyset (seek) paginated queryset.
+
+    There is no page number nor total count, only cursors to the
+    previous and next pages.
+    """
+    object_list: t.List[models.Model]
+    ordering: t.Tuple[str, ...]
+    has_next: bool
+    has_previous: bool
+    next_cursor: t.Optional[str] = None
+    previous_cursor: t.Optional[str] = None
+
+
+def keyset_paginate(queryset: models.QuerySet, per_page: int, cursor: str = None) -> KeysetPage:
+    """ Return the page of `queryset` (in its current ordering) at `cursor`.
+
+    Each page costs the same query, however deep it is: the rows are
+    seeked by their ordering values (`WHERE (name, pk) > (...)`) instead
+    of being skipped with OFFSET.
+    """
+    ordering = get_keyset_ordering(queryset)
+    values, backwards = decode_cursor(cursor, ordering, queryset.model) if cursor else (None, False)
+    annotations = {f'{_KEY_PREFIX}{i}': F(o.lstrip('-')) for i, o in enumerate(ordering)}
+    qs = queryset.annotate(**annotations)
+    qs = qs.order_by(*_order_expressions(ordering, backwards))
+    if values is not None:
+        qs = qs.filter(_seek_q(ordering, values, backwards))
+    rows = list(qs[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, more
+    else:
+        has_next, has_previous = more, values is not None
+
+    def _cursor(obj, to_back):
+        keys = [f'{_KEY_PREFIX}{i}' for i in range(len(ordering))]
+        if isinstance(obj, dict):
+            # Rows of a `values()` queryset.
+            return encode_cursor(ordering, [obj[key] for key in keys], to_back)
+        return encode_cursor(ordering, [getattr(obj, key) for key in keys], to_back)
+
+    return KeysetPage(object_list=rows,
+                      ordering=ordering,
+                      has_next=has_next,
+                      has_previous=has_previous,
+                      next_cursor=_cursor(rows[-1], False) if has_next and rows else None,
+                      previous_cursor=_cursor(rows[0], True) if has_previous and rows else None)
@@ -1,19 +1,111 @@
+from collections.abc import Mapping
+from functools import lru_cache
 from urllib.parse import urlencode
 
 import django_tables2 as tables
-from django.core.exceptions import ImproperlyConfigured
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import ImproperlyConfigured, FieldDoesNotExist
+from django.core.paginator import Paginator
 from django.urls import reverse, NoReverseMatch
+from django.utils.translation import gettext_lazy as _
+from django_filters import CharFilter, FilterSet
+from django_filters.filterset import filterset_factory
 from django_filters.views import FilterView
-from django_tables2 import Table
+from django_tables2 import Table, RequestConfig
 
+from vprad.actions import actions_registry
 from vprad.helpers import get_url_for
+from vprad.search.index import get_search_fields, search
+from vprad.views.generic.conditional import ConditionalGetMixin, get_rows_state
+from vprad.views.generic.counts import CountedPaginator, get_cached_count, get_estimated_count
 from vprad.views.generic.embedding import VEmbeddableMixin
+from vprad.views.generic.export import EXPORT_GET_PARAM, export_response
+from vprad.views.generic.keyset import KeysetPage, keyset_paginate
 from vprad.views.generic.mixin import FieldsAttrMixin, ModelDataMixin
-from vprad.views.helpers import get_model_url_name
+from vprad.views.helpers import get_model_url_name, get_related_lookups
+from vprad.views.urls import reverse_model_view
+
+
+def _get_record_url(record, table):
+    if isinstance(record, Mapping):
+        # A row of a `values()` projection.
+        try:
+            return reverse_model_view(get_model_url_name(table._meta.model, 'detail'), record['pk'])
+        except (KeyError, NoReverseMatch):
+            return None
+    return get_url_for(record)
 
 
 class VTableBase(Table):
-    id = tables.Column(linkify=lambda record: get_url_for(record))
+    id = tables.Column(linkify=_get_record_url)
+
+
+def _freeze(fields):
+    """ Make `fields` (a list, a dict of lookups or '__all__') hashable. """
+    if isinstance(fields, dict):
+        return tuple((name, _freeze(lookups)) for name, lookups in fields.items())
+    if isinstance(fields, (list, tuple)):
+        return tuple(fields)
+    return fields
+
+
+# The generated classes, by view class and fields, shared by the list views.
+@lru_cache(maxsize=512)
+def _get_table_class(view_class, model, table_base, fields):
+    return tables.table_factory(model, table=table_base, fields=fields)
+
+
+class VSearchFilterSet(FilterSet):
+    """ Filterset with a `q` filter searching the model (see vprad.search). """
+    q = CharFilter(label=_('Search'), method='filter_search')
+
+    def filter_search(self, queryset, name, value):
+        return search(queryset, value)
+
+
+@lru_cache(maxsize=512)
+def _get_filterset_class(view_class, model, fields):
+    if fields and isinstance(fields[0], tuple):
+        fields = {name: list(lookups) for name, lookups in fields}
+    if not get_search_fields(model):
+        return filterset_factory(model=model, fields=fields)
+    meta = type('Meta', (object,), {'model': model, 'fields': fields})
+    return type('%sFilterSet' % model._meta.object_name, (VSearchFilterSet,), {'Meta': meta})
+
+
+@lru_cache(maxsize=512)
+def _get_projection(view_class, model, table_class, select, prefetch):
+    """ Return ('values' or 'only', field names) loading what `table_class` shows.
+
+    `values()` is used when every column shows a plain model field, the
+    rows need no model instances then. Otherwise the instances get only
+    the local fields shown (plus those the related lookups need).
+    """
+    opts = model._meta
+    names = ['pk']
+    plain = not select and not prefetch
+    for name, column in table_class.base_columns.items():
+        parts = str(column.accessor or name).replace('.', '__').split('__')
+        try:
+            field = opts.get_field(parts[0])
+        except FieldDoesNotExist:
+            # Computed by the table, or by the record.
+            plain = False
+            continue
+        if isinstance(field, GenericForeignKey):
+            names += [field.ct_field, field.fk_field]
+        elif field.concrete:
+            names.append(field.name)
+        plain = plain and (len(parts) == 1 and field.concrete and not field.is_relation
+                           and not field.choices
+                           and type(column) is tables.Column
+                           and not hasattr(table_class, 'render_' + name)
+                           and not hasattr(table_class, 'value_' + name))
+    for lookup in select:
+        field = opts.get_field(lookup.split('__')[0])
+        if field.concrete:
+            names.append(field.name)
+    return ('values' if plain else 'only'), tuple(dict.fromkeys(names))
 
 
 class VListViewBase(FieldsAttrMixin,
@@ -23,6 +115,28 @@ class VListViewBase(FieldsAttrMixin,
     template_name = 'vprad/views/list/object_list.html'
     paginate_by = 10
     table_base = VTableBase
+    # Allow selecting rows to call instance actions on them (see `Action.call_bulk`).
+    bulk_actions = False
+    # 'offset' (numbered pages) or 'keyset': previous/next pages seeked from
+    # an opaque cursor in `cursor_param`, without counting the rows.
+    pagination = 'offset'
+    cursor_param = 'cursor'
+    keyset_page: KeysetPage = None
+    # Load only the columns the table shows: rows as dicts when those are
+    # plain fields, model instances with `only()` otherwise.
+    projection = False
+    # Formats the list can be exported in (`?_export=csv`), see `export`.
+    export_formats = ('csv', 'jsonl')
+    export_chunk_size = 2000
+    # How the rows are counted for 'offset' pagination: 'exact', 'cached'
+    # (for `count_cache_timeout` seconds) or 'estimated' from the planner
+    # statistics (exact below `count_estimate_threshold` or if unsupported).
+    count_strategy = 'exact'
+    count_cache_timeout = 60
+    count_estimate_threshold = 10000
+    paginator_class = CountedPaginator
+    row_count: int = None
+    row_count_estimated = False
 
     def get_table_class(self):
         """
@@ -31,16 +145,144 @@ class VListViewBase(FieldsAttrMixin,
         if self.table_class:
             return self.table_class
         if self.model:
-            return tables.table_factory(self.model, table=self.table_base,
-                                        fields=self.fields)
+            return _get_table_class(type(self), self.model, self.table_base,
+                                    _freeze(self.fields))
 
         raise ImproperlyConfigured(
             "You must either specify {0}.table_class or {0}.model".format(type(self).__name__)
         )
 
+    def get_filterset_class(self):
+        if self.filterset_class or not self.model:
+            return super().get_filterset_class()
+        return _get_filterset_class(type(self), self.model, _freeze(self.filterset_fields))
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(EXPORT_GET_PARAM, None)
+        if export_format and export_format in self.export_formats:
+            return self.export(export_format)
+        return super().get(request, *args, **kwargs)
+
+    def export(self, export_format):
+        """ Stream all the rows of the list, filtered and sorted as requested. """
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        if not self.filterset.is_bound or self.filterset.is_valid() or not self.get_strict():
+            queryset = self.filterset.qs
+        else:
+            queryset = self.filterset.queryset.none()
+        table = self.get_table_class()(data=queryset)
+        RequestConfig(self.request, paginate=False).configure(table)
+        return export_response(table, table.data.data, export_format,
+                               filename=self.model._meta.model_name,
+                               chunk_size=self.export_chunk_size)
+
+    def get_export_urls(self):
+        urls = []
+        for export_format in self.export_formats:
+            params = self.request.GET.copy()
+            params[EXPORT_GET_PARAM] = export_format
+            params.pop(self.cursor_param, None)
+            urls.append((export_format, '?' + params.urlencode()))
+        return urls
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.projection:
+            return self.apply_related_lookups(queryset)
+        mode, names = self.get_projection(queryset)
+        if mode == 'values':
+            return queryset.values(*names)
+        return self.apply_related_lookups(queryset).only(*names)
+
+    def get_projection(self, queryset):
+        select, prefetch = get_related_lookups(queryset.model, self.get_related_paths())
+        return _get_projection(type(self), queryset.model, self.get_table_class(), select, prefetch)
+
+    def get_related_paths(self):
+        # The table shows `fields`, unless a `table_class` with its own columns is given.
+        columns = self.get_table_class().base_columns.items()
+        return tuple(str(column.accessor or name) for name, column in columns)
+
+    def get_paginate_by(self, queryset):
+        if self.pagination == 'keyset':
+            # The table is paginated by `get_table`.
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get_table_pagination(self, table):
+        if self.pagination == 'keyset':
+            return False
+        paginate = super().get_table_pagination(table)
+        if paginate is True:
+            paginate = {}
+        if paginate is not False and issubclass(paginate.get('paginator_class', Paginator), CountedPaginator):
+            paginate['count'] = self.get_row_count(table.data.data)
+        return paginate
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if issubclass(self.paginator_class, CountedPaginator):
+            kwargs['count'] = self.get_row_count(queryset)
+        return super().get_paginator(queryset, per_page, **kwargs)
+
+    def get_row_count(self, queryset):
+        """ Count the rows of the (filtered) `queryset`, see `count_strategy`. """
+        if self.row_count is None:
+            self.row_count_estimated = False
+            if self.count_strategy == 'estimated':
+                estimate = get_estimated_count(queryset)
+                if estimate is not None and estimate >= self.count_estimate_threshold:
+                    self.row_count, self.row_count_estimated = estimate, True
+            if self.row_count is None and self.count_strategy == 'cached':
+                self.row_count = get_cached_count(queryset,
+                                                  f'{self.__module__}.{self.__class__.__qualname__}',
+                                                  self.count_cache_timeout)
+            elif self.row_count is None:
+                self.row_count = queryset.count()
+        return self.row_count
+
+    def get_table(self, **kwargs):
+        table = super().get_table(**kwargs)
+        if self.pagination == 'keyset':
+            # The table has ordered its queryset as requested, seek the page on it.
+            self.keyset_page = keyset_paginate(table.data.data,
+                                               self.paginate_by,
+                                               self.request.GET.get(self.cursor_param, None))
+            table.data.data = self.keyset_page.object_list
+            table.data._length = None
+        return table
+
+    def get_cursor_url(self, cursor):
+        params = self.request.GET.copy()
+        params[self.cursor_param] = cursor
+        return '?' + params.urlencode()
+
+    def get_bulk_actions(self):
+        if not self.bulk_actions or not self.model:
+            return ()
+        return actions_registry.get_bulk_actions_for(self.model)
+
+    def get_table_kwargs(self):
+        kwargs = super().get_table_kwargs()
+        if self.get_bulk_actions():
+            kwargs['extra_columns'] = [
+                ('_selected', tables.CheckBoxColumn(accessor='pk', attrs={'input': {'name': 'pk'}})),
+            ]
+            kwargs['sequence'] = ('_selected', '...')
+        return kwargs
+
     def get_context_data(self, **kwargs):
         kwargs['model'] = self.model
-        return super().get_context_data(**kwargs)
+        kwargs['bulk_actions'] = self.get_bulk_actions()
+        context = super().get_context_data(**kwargs)
+        context['export_urls'] = self.get_export_urls()
+        context['row_count'] = self.row_count
+        context['row_count_estimated'] = self.row_count_estimated
+        page = self.keyset_page
+        if page:
+            context['keyset_page'] = page
+            context['next_url'] = self.get_cursor_url(page.next_cursor) if page.next_cursor else None
+            context['previous_url'] = self.get_cursor_url(page.previous_cursor) if page.previous_cursor else None
+        return context
 
 
 class VListView(VListViewBase):
@@ -55,19 +297,28 @@ class EmbeddedTableBase(VTableBase):
         }
 
 
-class VEmbeddableListView(VEmbeddableMixin, VListViewBase):
+class VEmbeddableListView(VEmbeddableMixin, ConditionalGetMixin, VListViewBase):
     """ Embedded view for rendering a list of related objects. """
     template_name = 'vprad/views/list/embedded_object_list.jinja.html'
     table_pagination = False
     table_base = EmbeddedTableBase
+    bulk_actions = False
+    export_formats = ()
     object_limit = 15
 
     def get_queryset(self):
-        qs = getattr(self.parent_object, self.parent_field_name).all()
+        qs = self.apply_related_lookups(getattr(self.parent_object, self.parent_field_name).all())
         if self.object_limit:
             return qs[:self.object_limit]
         return qs
 
+    def get(self, request, *args, **kwargs):
+        return self.conditional(lambda: super(VEmbeddableListView, self).get(request, *args, **kwargs))
+
+    def get_conditional_state(self):
+        # All the related rows: the ones past the limit are counted in the header.
+        return get_rows_state(getattr(self.parent_object, self.parent_field_name).all())
+
     def get_filterset_kwargs(self, filterset_class):
         kwargs = super().get_filterset_kwargs(filterset_class)
         kwargs['prefix'] = 'embed_filter_' + self.name
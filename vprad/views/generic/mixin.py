@@ -5,6 +5,8 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 
+from vprad.views.helpers import get_related_lookups
+
 
 class ModelDataMixin:
     """ Simple mixin to enable headline, icon, ... """
@@ -59,6 +61,8 @@ class FieldsAttrMixin:
     default_fields = False  # Indicate if the _fields() are from _make_default_fields.
     model: t.Type[models.Model]
     _always_excluded = ('modified', 'created')
+    # Join and prefetch the relations shown (see `get_related_lookups`).
+    infer_related = True
 
     def _make_default_fields(self):
         opts = self.model._meta
@@ -90,3 +94,18 @@ class FieldsAttrMixin:
                 # noinspection PyAttributeOutsideInit
                 self.filterset_fields = self._fields
         return self._fields
+
+    def get_related_paths(self):
+        """ Return the field paths shown, to infer the relations to fetch. """
+        return self.fields
+
+    def apply_related_lookups(self, queryset):
+        """ Add to `queryset` the select_related/prefetch_related the view needs. """
+        if not self.infer_related or not isinstance(queryset, models.QuerySet):
+            return queryset
+        select, prefetch = get_related_lookups(queryset.model, self.get_related_paths())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
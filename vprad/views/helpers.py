@@ -1,5 +1,7 @@
 import typing as t
+from functools import lru_cache
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 
 from vprad.views.types import ViewType
@@ -27,3 +29,69 @@ def get_model_url_path(model: t.Type[models.Model],
     if action:
         urlpath += "/" + action
     return urlpath
+
+
+def _flatten_paths(paths):
+    for path in paths:
+        if isinstance(path, str):
+            yield path.replace('.', '__')
+        elif isinstance(path, (list, tuple)):
+            yield from _flatten_paths(path)
+
+
+def get_related_lookups(model: t.Type[models.Model],
+                        paths: t.Iterable) -> t.Tuple[t.Tuple[str, ...], t.Tuple[str, ...]]:
+    """ Return the (select_related, prefetch_related) needed to show `paths` of `model`.
+
+    `paths` are field names or `related__field` paths (possibly nested in
+    tuples, as in the views' `fields`). Forward and reverse one-to-one
+    relations are joined, many relations (and GenericForeignKey) are
+    prefetched. A relation shown as a value also needs what its model
+    declares in `display_related` (the relations its `__str__` uses).
+    """
+    return _get_related_lookups(model, tuple(_flatten_paths(paths)))
+
+
+@lru_cache(maxsize=512)
+def _get_related_lookups(model, paths):
+    select, prefetch = [], []
+    for path in paths + tuple(getattr(model, 'display_related', ())):
+        _add_related_lookups(model, path, select, prefetch)
+    # 'a__b' already joins 'a'.
+    select = [s for s in select if not any(o.startswith(s + '__') for o in select)]
+    return tuple(dict.fromkeys(select)), tuple(dict.fromkeys(prefetch))
+
+
+def _add_related_lookups(model, path, select, prefetch, prefix='', depth=0):
+    parts = path.split('__')
+    joined = None
+    for i, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.is_relation:
+            break
+        lookup = prefix + '__'.join(parts[:i + 1])
+        if field.many_to_many or field.one_to_many or field.related_model is None:
+            # Reverse foreign keys, m2m, generic relations and generic foreign keys,
+            # prefetched along with the relations after them.
+            model = field.related_model
+            for more in parts[i + 1:]:
+                try:
+                    field = model._meta.get_field(more) if model else None
+                except FieldDoesNotExist:
+                    field = None
+                if field is None or not field.is_relation:
+                    break
+                lookup += '__' + more
+                model = field.related_model
+            prefetch.append(lookup)
+            break
+        joined, model = lookup, field.related_model
+        if i == len(parts) - 1 and depth < 2:
+            # Its __str__ is shown (only a couple of levels, display_related may loop).
+            for shown in getattr(model, 'display_related', ()):
+                _add_related_lookups(model, shown, select, prefetch, lookup + '__', depth + 1)
+    if joined:
+        select.append(joined)
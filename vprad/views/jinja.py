@@ -4,6 +4,7 @@ import bleach
 from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.template.defaultfilters import safe
+from django.utils.translation import gettext
 
 from vprad.helpers import get_url_for
 from vprad.site.jinja import register_filter
@@ -78,6 +79,19 @@ def filter_format_value(value):
     return str(value)
 
 
+@register_filter(name='format_plain_value')
+def filter_format_plain_value(value):
+    """ Format a value nicely for humans, without html (as for exports).
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, bool):
+        return gettext('Yes') if value else gettext('No')
+    elif isinstance(value, str):
+        return value
+    return filter_format_value(value)
+
+
 @register_filter(name='timesince')
 def filter_timesince(value: datetime.datetime,
                      until: datetime.datetime = None) -> str:
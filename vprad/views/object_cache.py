@@ -0,0 +1,131 @@
+""" Shared cache of the objects of the detail, embed and action views.
+
+While `settings.VPRAD_OBJECT_CACHE` is True, `CachedObjectMixin.get_object`
+reads the object from the Django cache by (model, generation, pk), and on
+a miss fetches and stores it there. Browsing a record (its page, its
+embeds, its actions) then loads it once for all the views and users.
+
+Objects are cached without their related objects (select_related or
+prefetched), those are loaded again when used, so changes to them are
+never hidden. The trade-off: on a hit the `select_related` and
+`prefetch_related` of the view's queryset are lost, each relation shown
+costs a query of its own. Views showing many relations of an object
+read often may be better off with `object_cache = False`. An object is forgotten on post_save and post_delete, after
+an action is called on it and after bulk transitions, and again once the
+transaction commits (a request reading it meanwhile caches the old row).
+Changes that send no signals (`QuerySet.update`) must call
+`bump_generation(model)`, which makes all the cached objects of the model
+stale at once.
+
+Only GET and HEAD requests are served from the cache: an action saves the
+object it gets, it must not be a stale copy.
+
+A cached object is only served when the view's queryset has it (a cheap
+`exists()` query), so querysets limited by user or tenant still apply.
+
+With a cache backend local to each process (LocMemCache, the default),
+the objects are only forgotten on the process that changed them: use a
+shared backend (memcached, redis) with more than one process.
+"""
+import copy
+import typing as t
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+CACHE_PREFIX = 'vprad:object'
+
+
+def object_cache_enabled() -> bool:
+    return getattr(settings, 'VPRAD_OBJECT_CACHE', False)
+
+
+def _generation_key(model):
+    return f'{CACHE_PREFIX}:{model._meta.concrete_model._meta.label}:generation'
+
+
+def _object_keys(model, pks):
+    generation = cache.get(_generation_key(model), 0)
+    label = model._meta.concrete_model._meta.label
+    return [f'{CACHE_PREFIX}:{label}:{generation}:{pk}' for pk in pks]
+
+
+def get_cached_object(model: t.Type[models.Model], pk) -> t.Optional[models.Model]:
+    obj = cache.get(_object_keys(model, [pk])[0])
+    # A proxy of the model may have cached it.
+    return obj if type(obj) is model else None
+
+
+def cache_object(obj: models.Model):
+    """ Cache `obj`, without its related objects. """
+    cached = copy.copy(obj)
+    cached._state = copy.copy(obj._state)
+    cached._state.fields_cache = {}
+    cached.__dict__.pop('_prefetched_objects_cache', None)
+    cache.set(_object_keys(type(obj), [obj.pk])[0], cached,
+              getattr(settings, 'VPRAD_OBJECT_CACHE_TIMEOUT', 300))
+
+
+def forget_objects(model: t.Type[models.Model], pks: t.Iterable):
+    cache.delete_many(_object_keys(model, pks))
+
+
+def bump_generation(model: t.Type[models.Model]):
+    """ Make all the cached objects of `model` stale. """
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class CachedObjectMixin:
+    """ Read `get_object()` through the object cache (see module doc). """
+    # None follows settings.VPRAD_OBJECT_CACHE.
+    object_cache: bool = None
+
+    def get_object(self, queryset=None):
+        enabled = self.object_cache if self.object_cache is not None else object_cache_enabled()
+        # noinspection PyUnresolvedReferences
+        pk = self.kwargs.get(self.pk_url_kwarg, None)
+        # noinspection PyUnresolvedReferences
+        safe = self.request.method in ('GET', 'HEAD')
+        if not enabled or not safe or queryset is not None or pk is None:
+            # noinspection PyUnresolvedReferences
+            return super().get_object(queryset)
+        # noinspection PyUnresolvedReferences
+        model = self.model or self.get_queryset().model
+        obj = get_cached_object(model, pk)
+        # noinspection PyUnresolvedReferences
+        if obj is not None and not self.get_queryset().filter(pk=obj.pk).exists():
+            obj = None
+        if obj is None:
+            # noinspection PyUnresolvedReferences
+            obj = super().get_object()
+            cache_object(obj)
+        return obj
+
+
+# Invalidation, connected by VViewsConfig.
+
+def _forget(model, pks, using=None):
+    """ Forget now, and after the commit, when no request can read the old rows. """
+    pks = list(pks)
+    forget_objects(model, pks)
+    transaction.on_commit(lambda: forget_objects(model, pks), using=using)
+
+
+def forget_saved(sender, instance, using=None, **kwargs):
+    if object_cache_enabled() and instance.pk is not None:
+        _forget(sender, [instance.pk], using)
+
+
+def forget_action_instance(sender, instance=None, **kwargs):
+    if object_cache_enabled() and isinstance(instance, models.Model) and instance.pk is not None:
+        _forget(type(instance), [instance.pk], instance._state.db)
+
+
+def forget_bulk_transition(sender, pks, **kwargs):
+    if object_cache_enabled() and sender.cls is not None:
+        _forget(sender.cls, pks)
@@ -4,13 +4,14 @@ import typing as t
 from django.db import models
 from django.urls import path
 
+from vprad.helpers import SnapshotRegistry
 from vprad.views.helpers import get_model_url_name, get_model_url_path
 from vprad.views.types import ModelViewItem, ViewItem, ViewType
 
 logger = logging.getLogger("vprad.views")
 
-views_registry = {}
-model_views_registry = {}
+views_registry = SnapshotRegistry()
+model_views_registry = SnapshotRegistry()
 
 
 def register_model_view(*,
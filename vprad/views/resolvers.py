@@ -0,0 +1,71 @@
+import typing as t
+from urllib.parse import quote
+
+from django.urls import URLResolver, ResolverMatch, Resolver404, path
+from django.urls.resolvers import RoutePattern
+
+from vprad.views.helpers import get_model_url_path
+from vprad.views.types import ModelViewItem
+
+
+class ModelViewsResolver(URLResolver):
+    """ Resolve the urls of the model views with a dict lookup.
+
+    The model views urls have a fixed shape:
+        <app_label>/<model_name>/<suffix>
+        <app_label>/<model_name>/<pk>/<suffix>
+    so the path is split once and `(app_label, model_name, suffix, has_pk)`
+    looked up, instead of trying a regex per model view.
+
+    The usual `path()` patterns are kept as `url_patterns`, so `reverse()`
+    and the `url` jinja global work as before, and `reverse_path` builds
+    the paths by string formatting.
+    """
+
+    def __init__(self, items: t.Iterable[ModelViewItem]):
+        self._views = {}
+        self._paths = {}
+        patterns = []
+        for mvi in items:
+            suffix = mvi.name.split('_')[-1]
+            opts = mvi.model._meta
+            view = mvi.get_view()
+            key = (opts.app_label, opts.model_name, suffix, mvi.needs_instance)
+            # The first one wins, as it would with the urlpatterns.
+            if key not in self._views:
+                self._views[key] = (view, mvi.name)
+            if mvi.name not in self._paths:
+                if mvi.needs_instance:
+                    self._paths[mvi.name] = f'{opts.app_label}/{opts.model_name}/{{pk}}/{suffix}'
+                else:
+                    self._paths[mvi.name] = f'{opts.app_label}/{opts.model_name}/{suffix}'
+            urlpath = get_model_url_path(mvi.model, suffix, 'id' if mvi.needs_instance else None)
+            patterns.append(path(urlpath, view, name=mvi.name))
+        super().__init__(RoutePattern(''), patterns)
+
+    def resolve(self, path):
+        parts = str(path).split('/')
+        if len(parts) == 3:
+            app_label, model_name, suffix = parts
+            pk = None
+        elif len(parts) == 4:
+            app_label, model_name, pk, suffix = parts
+        else:
+            raise Resolver404({'tried': [], 'path': path})
+        found = None
+        if all(parts):
+            found = self._views.get((app_label, model_name, suffix, pk is not None), None)
+        if found is None:
+            raise Resolver404({'tried': [], 'path': path})
+        view, name = found
+        kwargs = {'pk': pk} if pk is not None else {}
+        route = self._paths[name].replace('{pk}', '<str:pk>')
+        return ResolverMatch(view, (), kwargs, name, route=route)
+
+    def reverse_path(self, name, pk=None) -> t.Optional[str]:
+        """ Return the path (relative to where the resolver is included)
+        of the model view `name`, or None if it is not known. """
+        urlpath = self._paths.get(name, None)
+        if urlpath is None or ((pk is None) == ('{pk}' in urlpath)):
+            return None
+        return urlpath.format(pk=quote(str(pk))) if pk is not None else urlpath
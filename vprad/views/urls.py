@@ -1,6 +1,10 @@
 import traceback
+from urllib.parse import quote
 
-from django.urls import path
+from django.conf import settings
+from django.utils.http import RFC3986_SUBDELIMS
+from django.urls import path, get_resolver, get_script_prefix, URLResolver, NoReverseMatch, reverse
+from django.urls import clear_url_caches as django_clear_url_caches
 
 from vprad.actions import actions_registry
 from vprad.actions.views import ActionView
@@ -8,6 +12,19 @@ from vprad.actions.views import ActionView
 from vprad.helpers import LazyClosureSequence
 from vprad.views.helpers import get_model_url_path
 from vprad.views.registry import views_registry, model_views_registry
+from vprad.views.resolvers import ModelViewsResolver
+
+# Where the ModelViewsResolver is included, see `reverse_model_view`.
+_resolver_prefix = None
+# Stand-in pk reversed once to build the url templates.
+_PK = 'VPRAD-PK'
+# Url templates (without the script prefix, None if there is no such view)
+# by (view name, with pk), see `reverse_model_view`.
+_url_templates = {}
+
+
+def dict_resolver_enabled():
+    return getattr(settings, 'VPRAD_VIEWS_DICT_RESOLVER', False)
 
 
 def get_views_urls():
@@ -22,6 +39,9 @@ def get_views_urls():
 
     So, for a users.User, the url users_user_detail would be:
         /users/user/<pk>/detail
+
+    With `settings.VPRAD_VIEWS_DICT_RESOLVER` the model views are
+    resolved by a single `ModelViewsResolver`.
     """
     urlpatterns = []
     for name, vi in views_registry.items():
@@ -29,18 +49,98 @@ def get_views_urls():
             urlpatterns.append(
                 path(p, vi.get_view(), name=vi.name)
             )
+    if dict_resolver_enabled():
+        urlpatterns.append(ModelViewsResolver(mvi for mvi in model_views_registry.values()
+                                              if mvi.create_url))
+        return urlpatterns
     for name, mvi in model_views_registry.items():
         if not mvi.create_url:
             continue
-        action = mvi.name.split('_')[-1]
-        urlpath = get_model_url_path(mvi.model,
-                                     action,
-                                     'id' if mvi.needs_instance else None)
-        view = mvi.view
-        urlpatterns.append(
-            path(urlpath, mvi.get_view(), name=mvi.name)
-        )
+        urlpatterns.append(_get_model_view_path(mvi))
     return urlpatterns
 
 
+def _get_model_view_path(mvi):
+    action = mvi.name.split('_')[-1]
+    urlpath = get_model_url_path(mvi.model,
+                                 action,
+                                 'id' if mvi.needs_instance else None)
+    return path(urlpath, mvi.get_view(), name=mvi.name)
+
+
+def _on_model_view_registered(name, mvi, replaced):
+    """ Append the url of a new model view, without rebuilding the others. """
+    if replaced or dict_resolver_enabled():
+        urlpatterns.reset_cache()
+    elif mvi.create_url:
+        urlpatterns.append(_get_model_view_path(mvi))
+    else:
+        return
+    clear_url_templates()
+    django_clear_url_caches()
+
+
+def _on_view_registered(name, vi, replaced):
+    # Those go before the model views, so the urls are rebuilt.
+    urlpatterns.reset_cache()
+    clear_url_templates()
+    django_clear_url_caches()
+
+
+def _find_resolver(resolver, prefix=''):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, ModelViewsResolver):
+            return pattern, prefix
+        if isinstance(pattern, URLResolver):
+            found = _find_resolver(pattern, prefix + str(pattern.pattern))
+            if found:
+                return found
+    return None
+
+
+def _get_url_template(name, with_pk):
+    key = (name, with_pk)
+    if key in _url_templates:
+        return _url_templates[key]
+    global _resolver_prefix
+    template = None
+    if dict_resolver_enabled():
+        if _resolver_prefix is None:
+            _resolver_prefix = _find_resolver(get_resolver()) or False
+        # Only plain prefixes, like the site's `path('', include(...))`.
+        if _resolver_prefix and '<' not in _resolver_prefix[1]:
+            resolver, prefix = _resolver_prefix
+            urlpath = resolver.reverse_path(name, _PK if with_pk else None)
+            _url_templates[key] = prefix + urlpath if urlpath is not None else None
+            return _url_templates[key]
+    try:
+        template = reverse(name, args=[_PK] if with_pk else [])[len(get_script_prefix()):]
+    except NoReverseMatch:
+        pass
+    _url_templates[key] = template
+    return template
+
+
+def reverse_model_view(name, pk=None):
+    """ Return the url of the model view `name`, as `reverse()` would.
+
+    The url of each view is reversed once (by string formatting with the
+    dict resolver), then the pk is substituted in it.
+    """
+    template = _get_url_template(name, pk is not None)
+    if template is None:
+        raise NoReverseMatch("Model view '%s' not found" % name)
+    if pk is not None:
+        template = template.replace(_PK, quote(str(pk), safe=RFC3986_SUBDELIMS + '~:@'))
+    return get_script_prefix() + template
+
+
+def clear_url_templates():
+    global _resolver_prefix
+    _resolver_prefix = None
+    _url_templates.clear()
+
+
 urlpatterns = LazyClosureSequence(get_views_urls)
+model_views_registry.subscribe(_on_model_view_registered)
+views_registry.subscribe(_on_view_registered)